@@ -6,75 +6,7 @@ from rest_framework import serializers
 from django.contrib.auth import authenticate
 from django.utils.translation import gettext as _
 from core.models import UserProfile
-import PIL.Image
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from io import BytesIO
-import os.path
-
-
-def resize_image(image):
-    """
-    Helper method that will analyse the uploaded image by user.
-    If the image width is less than 200px and exception will be thrown.
-    Else it will be resized and cropped to match square 200x200px.
-    """
-
-    img_name = image.name
-    img_content_type = image.content_type
-    # print(f'type(img_name): {type(img_name)}, {img_name}')
-    image = PIL.Image.open(image)
-    if image.width < 200:
-        raise Exception('Image should be at least 200x200 px.')
-
-    else:
-        if image.height > image.width:
-            """
-            Image is portrait
-            """
-            updated_width = 200
-            updated_height = int((200 * image.height) / image.width)
-            image = image.resize((updated_width, updated_height), PIL.Image.ANTIALIAS)
-
-            crop_left = 0
-            crop_top = int((updated_height - updated_width) / 2)
-            crop_right = updated_width
-            crop_bottom = updated_width + crop_top
-
-            # left, top, right, bottom
-            resized_image = image.crop((crop_left, crop_top, crop_right, crop_bottom))
-
-        else:
-            """
-            Image is landscape
-            """
-            updated_height = 200
-            updated_width = int((updated_height * image.width) / image.height)
-            image = image.resize((updated_width, updated_height), PIL.Image.ANTIALIAS)
-
-            crop_left = int((updated_width - updated_height) / 2)
-            crop_top = 0
-            crop_right = crop_left + updated_height
-            crop_bottom = updated_height
-            # left, top, right, bottom
-            resized_image = image.crop((crop_left, crop_top, crop_right, crop_bottom))
-
-        # Create a BytesIO buffer to temporarily hold the resized image data
-        buffer = BytesIO()
-
-        # Save the resized image to the buffer in the same format as the uploaded image
-        resized_image.save(buffer, format='JPEG')
-
-        # Create an InMemoryUploadedFile from the buffer with the same name as the original
-        resized_image_file = InMemoryUploadedFile(
-            buffer,
-            None,  # field_name, not needed in this case
-            img_name,  # the original image filename
-            img_content_type,  # content type of the original image
-            resized_image.tell(),  # size of the resized image in bytes
-            None,  # charset, not needed in this case
-        )
-
-        return resized_image_file
+from core.images import set_profile_image, ImageError
 
 
 class UserSerializer(serializers.ModelSerializer):
@@ -203,8 +135,10 @@ class UserProfileSerializer(serializers.ModelSerializer):
 
         uploaded_image = validated_data.get('image')  # Get the uploaded image from validated_data
         if uploaded_image:
-            resized_image = resize_image(image=uploaded_image)  # Resize the uploaded image
-            instance.image.delete()  # Delete the original image
-            instance.image = resized_image
+            # Resize, crop and replace the previous image, see core.images
+            try:
+                set_profile_image(instance, uploaded_image)
+            except ImageError as exc:
+                raise serializers.ValidationError({'image': [str(exc)]})
         instance.save()
         return instance
@@ -285,8 +285,8 @@ class PrivateUserProfileApiTests(APITestCase):
         # Refresh the user profile from the database
         self.user_profile.refresh_from_db()
 
-        # Assert that the path to the uploaded image exists in UserProfile
-        self.assertIn('upload_image.jpg', str(self.user_profile.image))
+        # Assert that UserProfile points to the largest rendition, named by content hash
+        self.assertRegex(str(self.user_profile.image), r'^avatars/[0-9a-f]{32}/200\.jpg$')
 
         # Delete the uploaded image from the user profile
         self.user_profile.image.delete()
@@ -308,13 +308,13 @@ class PrivateUserProfileApiTests(APITestCase):
         image_file.seek(0)
 
         # Upload the small image via the API and expect a ValidationError
-        with self.assertRaises(Exception) as context:
-            self.client.patch(reverse('api-user-profile'),
-                              {'image': image_file},
-                              format='multipart')
+        response = self.client.patch(reverse('api-user-profile'),
+                                     {'image': image_file},
+                                     format='multipart')
 
-        # Confirm that the exception is raised and contains the expected error message
-        self.assertEqual(str(context.exception), 'Image should be at least 200x200 px.')
+        # Confirm that the error is returned with the expected error message
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data['image'], ['Image should be at least 200x200 px.'])
 
         # Refresh the user profile from the database
         self.user_profile.refresh_from_db()
@@ -324,3 +324,17 @@ class PrivateUserProfileApiTests(APITestCase):
 
         # Clean up
         image_file.close()
+
+    def test_upload_not_an_image_error(self):
+        """
+        Test that a file that is not an image is rejected with 400
+        """
+        image_data = {
+            'image': SimpleUploadedFile('not_an_image.jpg', b'not an image', content_type='image/jpeg')
+        }
+        response = self.client.patch(reverse('api-user-profile'), data=image_data, format='multipart')
+
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('image', response.data)
+        self.user_profile.refresh_from_db()
+        self.assertFalse(self.user_profile.image)
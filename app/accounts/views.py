@@ -136,7 +136,8 @@ class UserProfileRetrieveUpdateAPIView(generics.RetrieveUpdateAPIView):
     def get_object(self):
         try:
             user = self.request.user
-            obj = self.queryset.get(pk=user.pk)
+            # The serializer reads user fields, join them
+            obj = self.queryset.select_related('user').get(pk=user.pk)
             return obj
         except UserProfile.DoesNotExist:
             raise Http404("User profile not found")
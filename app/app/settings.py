@@ -50,6 +50,7 @@ INSTALLED_APPS = [
 
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
+    'core.middleware.CompressionMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -71,6 +72,7 @@ TEMPLATES = [
                 'django.template.context_processors.request',
                 'django.contrib.auth.context_processors.auth',
                 'django.contrib.messages.context_processors.messages',
+                'core.context_processors.user_profile',
             ],
         },
     },
@@ -88,9 +90,17 @@ DATABASES = {
         'NAME': os.environ.get('DB_NAME'),
         'USER': os.environ.get('DB_USER'),
         'PASSWORD': os.environ.get('DB_PASS'),
+        # Seconds a connection is kept for the next request of the same thread, 0 closes it
+        # after every request, see core.db
+        'CONN_MAX_AGE': int(os.environ.get('DB_CONN_MAX_AGE', 60)),
     }
 }
 
+# Test kept connections at the start of every request, see core.db.check_connections
+DB_CONN_HEALTH_CHECKS = os.environ.get('DB_CONN_HEALTH_CHECKS', '1') == '1'
+# Threads (and connections) of populate_model_stock when it updates many stocks
+REFRESH_WORKERS = int(os.environ.get('REFRESH_WORKERS', 1))
+
 # Password validation
 # https://docs.djangoproject.com/en/4.2/ref/settings/#auth-password-validators
 
@@ -144,6 +154,57 @@ from django.contrib.messages import constants as messages
 MESSAGE_TAGS = {
     messages.ERROR: 'danger',
 }
+
+# Avatar uploads, see core.images
+AVATAR_MAX_PIXELS = int(os.environ.get('AVATAR_MAX_PIXELS', 50_000_000))
+AVATAR_PROCESS_IN_BACKGROUND = os.environ.get('AVATAR_PROCESS_IN_BACKGROUND', '0') == '1'
+
+# Response compression, see core.middleware
+COMPRESSION_MIN_SIZE = int(os.environ.get('COMPRESSION_MIN_SIZE', 1024))
+
+# Cache, shared by all workers when MEMCACHED_LOCATION is set (host:port)
+if os.environ.get('MEMCACHED_LOCATION'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.memcached.PyMemcacheCache',
+            'LOCATION': os.environ.get('MEMCACHED_LOCATION'),
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Session storage (SESSION_BACKEND): cached_db reads sessions from the cache and
+# writes to the database only when they change, signed_cookies keeps them in the
+# browser. cached_db needs a cache shared by all workers, with the per process
+# locmem cache a logout would not reach the other workers, so it is the default
+# only with memcached, see bench_sessions.
+SESSION_BACKEND = os.environ.get('SESSION_BACKEND', 'cached_db' if os.environ.get('MEMCACHED_LOCATION') else 'db')
+SESSION_ENGINE = f'django.contrib.sessions.backends.{SESSION_BACKEND}'
+
 REST_FRAMEWORK = {
     'DEFAULT_SCHEMA_CLASS': 'drf_spectacular.openapi.AutoSchema',
+    'DEFAULT_AUTHENTICATION_CLASSES': [
+        'rest_framework.authentication.SessionAuthentication',
+        'rest_framework.authentication.BasicAuthentication',
+        'rest_framework.authentication.TokenAuthentication',
+    ],
+    # Rates of the stock API scopes, see pages.throttling
+    'DEFAULT_THROTTLE_RATES': {
+        'stock_list': os.environ.get('THROTTLE_STOCK_LIST', '120/min'),
+        'stock_detail': os.environ.get('THROTTLE_STOCK_DETAIL', '600/min'),
+        'stock_bulk': os.environ.get('THROTTLE_STOCK_BULK', '60/min'),
+        'stock_export': os.environ.get('THROTTLE_STOCK_EXPORT', '20/min'),
+        'stock_stream': os.environ.get('THROTTLE_STOCK_STREAM', '30/min'),
+    },
 }
+
+# Broker of indicator updates for stock-stream: database, redis or local, see core.pubsub
+PUBSUB_REDIS_URL = os.environ.get('PUBSUB_REDIS_URL', '')
+PUBSUB_BROKER = os.environ.get('PUBSUB_BROKER', 'redis' if PUBSUB_REDIS_URL else 'database')
+
+# Rates of single users by scope, e.g. {'username': {'stock_list': '1000/min'}}
+API_THROTTLE_USER_RATES = {}
@@ -15,15 +15,19 @@ Including another URLconf
     2. Add a URL to urlpatterns:  path('blog/', include('blog.urls'))
 """
 from django.contrib import admin
-from django.urls import path, include
+from django.urls import path, re_path, include
 from django.conf.urls.static import static
 from django.conf import settings
+from core.views import serve_avatar
 from drf_spectacular.views import (
     SpectacularAPIView,
     SpectacularSwaggerView,
 )
 
 urlpatterns = [
+    # Avatar renditions with immutable cache headers, see core.images
+    re_path(r'^%savatars/(?P<path>[0-9a-f]+/\d+\.(?:jpg|webp))$' % settings.MEDIA_URL.lstrip('/'),
+            serve_avatar, name='avatar'),
     path('admin/', admin.site.urls),
     path('', include('pages.urls')),
     path('accounts/', include('accounts.urls')),
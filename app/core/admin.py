@@ -1,5 +1,5 @@
 from django.contrib import admin
-from .models import Stock, UserProfile, File
+from .models import Stock, UserProfile, File, Universe
 from .management.commands.populate_model_stock import Command
 import os
 
@@ -60,6 +60,12 @@ class UserProfileAdmin(admin.ModelAdmin):
 class FileAdmin(admin.ModelAdmin):
     model = File
 
+    def save_model(self, request, obj, form, change):
+        super().save_model(request, obj, form, change)
+        summary = getattr(obj, 'import_summary', None)
+        if summary is not None:
+            self.message_user(request, f'{obj}: {summary}.')
+
     def delete_queryset(self, request, queryset):
         for file_obj in queryset:
             # Delete the associated file from the Docker volume
@@ -71,6 +77,16 @@ class FileAdmin(admin.ModelAdmin):
             file_obj.delete()
 
 
+class UniverseAdmin(admin.ModelAdmin):
+    """
+    Ticker lists are loaded from File uploads and all_stock_codes.txt, see core.universe
+    """
+    list_display = ('name', 'source', 'updated_at')
+    readonly_fields = ('source', 'source_version', 'updated_at')
+    exclude = ('stocks',)
+
+
 admin.site.register(Stock, StockAdmin)
 admin.site.register(UserProfile, UserProfileAdmin)
 admin.site.register(File, FileAdmin)
+admin.site.register(Universe, UniverseAdmin)
@@ -1,6 +1,11 @@
 from django.apps import AppConfig
+from django.core.signals import request_started
 
 
 class CoreConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'core'
+
+    def ready(self):
+        from .db import check_connections
+        request_started.connect(check_connections, dispatch_uid='core.db.check_connections')
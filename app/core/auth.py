@@ -0,0 +1,27 @@
+"""
+Profile of the logged in user, loaded once per request.
+
+Every page renders the avatar of the user in the navbar, so the profile is
+needed on every request. get_user_profile() loads it with one query the
+first time it is asked for and caches it on the request and on
+request.user, so user.profile does not query it again.
+Users keep the default ModelBackend, sessions are not affected.
+"""
+from .models import UserProfile
+
+
+def get_user_profile(request):
+    """
+    Profile of the user of request, None for anonymous users
+    and users without a profile.
+    """
+    user = getattr(request, 'user', None)
+    if user is None or not user.is_authenticated:
+        return None
+    if not hasattr(request, '_user_profile'):
+        profile = UserProfile.objects.filter(user_id=user.pk).first()
+        if profile is not None:
+            # Caches both sides of the relation, profile.user is request.user
+            user.profile = profile
+        request._user_profile = profile
+    return request._user_profile
@@ -0,0 +1,119 @@
+"""
+Price charts: daily bars of a stock downsampled on the server to the
+width of the chart in pixels with Largest-Triangle-Three-Buckets (LTTB),
+which keeps the visual shape of the series (peaks and drops).
+Results are cached per stock, range and width until new bars are stored.
+"""
+import time
+from datetime import date, timedelta
+
+from django.core.cache import cache
+from django.db import transaction
+from django.utils import timezone
+
+from .models import PriceBar
+
+# Chart ranges in days, None is the whole history
+CHART_RANGES = {
+    '1m': 31,
+    '3m': 92,
+    '6m': 183,
+    '1y': 366,
+    '5y': 5 * 366,
+    'max': None,
+}
+DEFAULT_RANGE = '1y'
+DEFAULT_WIDTH = 600
+MIN_WIDTH = 10
+MAX_WIDTH = 4000
+CHART_CACHE_TIMEOUT = 60 * 60
+# Bars saved per INSERT
+BAR_BATCH_SIZE = 1000
+
+
+def lttb(points, threshold):
+    """
+    Downsample [(x, y)] sorted by x to threshold points with
+    Largest-Triangle-Three-Buckets. First and last points are always kept,
+    from every bucket between them the point that makes the largest triangle
+    with the previous selected point and the average of the next bucket.
+    """
+    count = len(points)
+    if threshold >= count or threshold < 3:
+        return list(points)
+
+    every = (count - 2) / (threshold - 2)
+    sampled = [points[0]]
+    selected = 0
+    for bucket in range(threshold - 2):
+        # Average of the next bucket
+        next_start = int((bucket + 1) * every) + 1
+        next_end = min(int((bucket + 2) * every) + 1, count)
+        next_points = points[next_start:next_end]
+        avg_x = sum(x for x, _ in next_points) / len(next_points)
+        avg_y = sum(y for _, y in next_points) / len(next_points)
+
+        # Point of this bucket with the largest triangle
+        selected_x, selected_y = points[selected]
+        max_area = -1
+        for index in range(int(bucket * every) + 1, int((bucket + 1) * every) + 1):
+            x, y = points[index]
+            area = abs((selected_x - avg_x) * (y - selected_y) - (selected_x - x) * (avg_y - selected_y))
+            if area > max_area:
+                max_area, candidate = area, index
+        sampled.append(points[candidate])
+        selected = candidate
+
+    sampled.append(points[-1])
+    return sampled
+
+
+def _version_key(stock_pk):
+    return f'chart-version:{stock_pk}'
+
+
+def store_price_bars(stock, prices):
+    """
+    Save daily prices as returned by YahooFinancials.get_historical_price_data,
+    a list of dicts with formatted_date, open, high, low, close and volume.
+    Stored bars in the date range of prices are replaced, so revised and
+    split or dividend adjusted prices overwrite the old ones (Django 3.2
+    bulk_create has no update_conflicts). Returns the number of bars saved.
+    """
+    # One bar per day, the last given price of a day wins
+    bars = {}
+    for price in prices:
+        if price.get('formatted_date') and price.get('close') is not None:
+            day = date.fromisoformat(price['formatted_date'])
+            bars[day] = PriceBar(stock=stock, date=day,
+                                 open=price.get('open'), high=price.get('high'), low=price.get('low'),
+                                 close=price.get('close'), volume=price.get('volume'))
+    if bars:
+        with transaction.atomic():
+            PriceBar.objects.filter(stock=stock, date__range=(min(bars), max(bars))).delete()
+            PriceBar.objects.bulk_create(bars.values(), batch_size=BAR_BATCH_SIZE)
+        # New cache keys for the charts of this stock
+        cache.set(_version_key(stock.pk), time.time(), None)
+    return len(bars)
+
+
+def get_chart(stock, range_name=DEFAULT_RANGE, width=DEFAULT_WIDTH):
+    """
+    Return [{'date': ..., 'close': ...}] of the stock in the range,
+    at most width points
+    """
+    version = cache.get(_version_key(stock.pk), '')
+    key = f'chart:{stock.pk}:{range_name}:{width}:{version}'
+    points = cache.get(key)
+    if points is not None:
+        return points
+
+    bars = PriceBar.objects.filter(stock=stock)
+    days = CHART_RANGES[range_name]
+    if days:
+        bars = bars.filter(date__gte=timezone.now().date() - timedelta(days=days))
+    series = [(day.toordinal(), close) for day, close in bars.order_by('date').values_list('date', 'close')]
+
+    points = [{'date': date.fromordinal(x).isoformat(), 'close': round(y, 4)} for x, y in lttb(series, width)]
+    cache.set(key, points, CHART_CACHE_TIMEOUT)
+    return points
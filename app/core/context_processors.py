@@ -0,0 +1,8 @@
+from .auth import get_user_profile
+
+
+def user_profile(request):
+    """
+    Profile of the logged in user for the navbar of every page
+    """
+    return {'user_profile': get_user_profile(request)}
@@ -0,0 +1,79 @@
+"""
+Database connection reuse.
+
+With DATABASES CONN_MAX_AGE > 0 (DB_CONN_MAX_AGE) every worker thread keeps
+its PostgreSQL connection between requests instead of opening a new one.
+A kept connection may have been closed by the server or a proxy meanwhile,
+so with DB_CONN_HEALTH_CHECKS check_connections() tests it at the start of
+every request and drops it when it is broken. This is the health check that
+Django 4.1 added as CONN_HEALTH_CHECKS, Django 3.2 does not have it.
+
+Django has no connection pool of its own: connections belong to threads.
+run_in_threads() runs work on a fixed number of threads, each of them uses
+one connection for all its items and closes it when done, so a refresh with
+N workers needs N connections however many items it processes.
+"""
+import queue
+import threading
+
+from django.conf import settings
+from django.db import connections
+
+
+def check_connections(**kwargs):
+    """
+    request_started receiver: close persistent connections that do not work any more,
+    the next query opens a new one
+    """
+    if not getattr(settings, 'DB_CONN_HEALTH_CHECKS', False):
+        return
+    for connection in connections.all():
+        if connection.connection is None or connection.in_atomic_block:
+            continue
+        if not connection.is_usable():
+            connection.close()
+
+
+def run_in_threads(func, items, workers=4):
+    """
+    Call func(item) for every item on workers threads, every thread with its own connection.
+    Returns the list of (item, exception) of failed calls.
+    """
+    if workers <= 1:
+        return _run_items(func, items)
+
+    pending = queue.Queue()
+    for item in items:
+        pending.put(item)
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        try:
+            while True:
+                try:
+                    item = pending.get_nowait()
+                except queue.Empty:
+                    return
+                item_errors = _run_items(func, [item])
+                with lock:
+                    errors.extend(item_errors)
+        finally:
+            connections.close_all()
+
+    threads = [threading.Thread(target=worker, name=f'db-worker-{index}') for index in range(workers)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def _run_items(func, items):
+    errors = []
+    for item in items:
+        try:
+            func(item)
+        except Exception as exc:
+            errors.append((item, exc))
+    return errors
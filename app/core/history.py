@@ -0,0 +1,104 @@
+"""
+History of stock indicators: one IndicatorSnapshot per stock and day,
+written at the end of every populate_model_stock run.
+"""
+from django.db import connection, transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import Stock, IndicatorSnapshot
+
+# Indicators kept in the history
+HISTORY_FIELDS = (
+    'rsi',
+    'fa_score',
+    'avg_gain_loss',
+    'five_year_avg_dividend_yield',
+    'composite_score',
+)
+# Default and largest number of points returned for a series
+DEFAULT_POINTS = 200
+MAX_POINTS = 2000
+
+
+def record_indicator_snapshots(day=None):
+    """
+    Copy the current indicators of every stock that has any into the history.
+    Records of the same day are replaced, so the command can run again the
+    same day. Delete and copy run in one transaction and the copy is a
+    single INSERT ... SELECT, rows are not loaded into Python.
+    Returns the number of records written.
+    """
+    day = day or timezone.now().date()
+    quote = connection.ops.quote_name
+
+    def column(model, field):
+        return quote(model._meta.get_field(field).column)
+
+    insert_columns = ', '.join(column(IndicatorSnapshot, field) for field in ('stock', 'date') + HISTORY_FIELDS)
+    select_columns = [column(Stock, field) for field in HISTORY_FIELDS]
+    # -1 is the "no dividend data" default of Stock, it is kept as NULL
+    dividend = HISTORY_FIELDS.index('five_year_avg_dividend_yield')
+    select_columns[dividend] = f'CASE WHEN {select_columns[dividend]} = -1 THEN NULL ' \
+                               f'ELSE {select_columns[dividend]} END'
+    sql = f"INSERT INTO {quote(IndicatorSnapshot._meta.db_table)} ({insert_columns}) " \
+          f"SELECT {quote(Stock._meta.pk.column)}, %s, {', '.join(select_columns)} " \
+          f"FROM {quote(Stock._meta.db_table)} " \
+          f"WHERE {column(Stock, 'rsi')} IS NOT NULL OR {column(Stock, 'fa_score')} IS NOT NULL"
+
+    with transaction.atomic():
+        IndicatorSnapshot.objects.filter(date=day).delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql, [day])
+            return cursor.rowcount
+
+
+def downsample(points, max_points):
+    """
+    Reduce a list of (date, {field: value}) to at most max_points.
+    Points are split into equal buckets and every bucket becomes one point
+    with its last date and the average of the values that are not None.
+    """
+    if len(points) <= max_points:
+        return points
+
+    result = []
+    size = len(points) / max_points
+    for bucket in range(max_points):
+        chunk = points[int(bucket * size):int((bucket + 1) * size)]
+        if not chunk:
+            continue
+        values = {}
+        for field in chunk[0][1]:
+            present = [value[field] for _, value in chunk if value[field] is not None]
+            values[field] = sum(present) / len(present) if present else None
+        result.append((chunk[-1][0], values))
+    return result
+
+
+def get_history(stock, fields=HISTORY_FIELDS, start=None, end=None, max_points=DEFAULT_POINTS):
+    """
+    Return [{'date': ..., field: value}] of the stock between start and end,
+    downsampled to at most max_points
+    """
+    conditions = Q(stock=stock)
+    if start:
+        conditions &= Q(date__gte=start)
+    if end:
+        conditions &= Q(date__lte=end)
+    rows = IndicatorSnapshot.objects.filter(conditions).order_by('date').values_list('date', *fields)
+
+    points = [(row[0], dict(zip(fields, (_to_number(value) for value in row[1:])))) for row in rows]
+    return [
+        {'date': day, **{field: _to_number(value) for field, value in values.items()}}
+        for day, values in downsample(points, max_points)
+    ]
+
+
+def _to_number(value):
+    """
+    Decimals and averages become floats with 2 decimal places, JSON friendly
+    """
+    if value is None or isinstance(value, int):
+        return value
+    return round(float(value), 2)
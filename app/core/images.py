@@ -0,0 +1,330 @@
+"""
+Avatar processing shared by page profile-update and the user profile API.
+
+Uploads are cropped to a centered square and scaled to AVATAR_SIZES in
+JPEG and, when Pillow supports it, WebP. Large JPEGs are scaled down while
+they are decoded (Image.draft), other formats with Image.reduce() before
+the final resize, so a 24 MP photo is never decoded at full resolution.
+Image size is read from the header and checked before any pixel is decoded.
+
+Renditions are stored as avatars/<hash of the upload>/<size>.<jpg|webp>.
+A name never points to other content, so the files can be cached by
+browsers forever, see core.views.serve_avatar. profile.image points to
+the largest JPEG, the avatar template tag picks the right rendition.
+Identical uploads are stored once: every content hash has an Avatar row
+counting the profiles that use it, the files are deleted with the last one.
+Counts and files change only when the profile save is committed, a rolled
+back save leaves both as they were.
+With AVATAR_PROCESS_IN_BACKGROUND the resize runs in a worker thread and
+the request returns as soon as the upload is validated. When the renditions
+can not be stored, the profile gets its previous image back.
+"""
+import functools
+import hashlib
+import logging
+import re
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
+from io import BytesIO
+
+import PIL.Image
+import PIL.features
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.db import connections, transaction
+from django.db.models import F
+
+from .models import Avatar, UserProfile
+
+# Sides of the square renditions in pixels, the largest is the avatar size
+AVATAR_SIZES = (32, 64, 200)
+AVATAR_SIZE = AVATAR_SIZES[-1]
+# Extension -> Pillow format of the renditions, the first is the fallback for all browsers
+AVATAR_FORMATS = {'jpg': 'JPEG'}
+if PIL.features.check('webp'):
+    AVATAR_FORMATS['webp'] = 'WEBP'
+AVATAR_DIRECTORY = 'avatars'
+re_avatar_name = re.compile(r'^%s/(?P<digest>[0-9a-f]{32})/\d+\.\w+$' % AVATAR_DIRECTORY)
+# Largest accepted upload in pixels (width * height), about a 50 MP photo
+DEFAULT_MAX_PIXELS = 50_000_000
+JPEG_QUALITY = 85
+WEBP_QUALITY = 80
+
+_executor = None
+
+logger = logging.getLogger(__name__)
+
+# Image change of a profile, applied when its save is committed.
+# data is the upload, old_digest and old_name the image in the database.
+AvatarChange = namedtuple('AvatarChange', 'digest data old_digest old_name')
+
+
+class ImageError(ValueError):
+    """
+    Uploaded file can not be used as avatar
+    """
+
+
+class ImageTooSmall(ImageError):
+    pass
+
+
+class ImageTooLarge(ImageError):
+    pass
+
+
+def open_image(source, size=AVATAR_SIZE):
+    """
+    Open an image and validate its size from the header, pixels are not decoded.
+    Raises ImageError.
+    """
+    max_pixels = getattr(settings, 'AVATAR_MAX_PIXELS', DEFAULT_MAX_PIXELS)
+    try:
+        image = PIL.Image.open(source)
+    except PIL.Image.DecompressionBombError:
+        # The header declares more than twice PIL.Image.MAX_IMAGE_PIXELS
+        raise ImageTooLarge(f'Image should have at most {max_pixels:,} pixels.')
+    except (PIL.UnidentifiedImageError, OSError) as exc:
+        raise ImageError(f'Unsupported image: {exc}')
+
+    if image.width * image.height > max_pixels:
+        raise ImageTooLarge(f'Image should have at most {max_pixels:,} pixels.')
+    if min(image.width, image.height) < size:
+        raise ImageTooSmall(f'Image should be at least {size}x{size} px.')
+    return image
+
+
+def square_image(image, size=AVATAR_SIZE):
+    """
+    Return the centered square of image scaled to size x size, in RGB
+    """
+    # JPEG only: decode at 1/2, 1/4 or 1/8 scale, but not smaller than size
+    image.draft('RGB', (size, size))
+
+    side = min(image.width, image.height)
+    left = (image.width - side) // 2
+    top = (image.height - side) // 2
+    image = image.crop((left, top, left + side, top + side))
+
+    # Fast integer downscale, the final resize then works on a small image
+    factor = side // (size * 2)
+    if factor > 1:
+        image = image.reduce(factor)
+
+    if image.mode != 'RGB':
+        image = image.convert('RGB')
+    return image.resize((size, size), PIL.Image.LANCZOS)
+
+
+def encode(image, image_format='JPEG'):
+    buffer = BytesIO()
+    if image_format == 'WEBP':
+        image.save(buffer, format='WEBP', quality=WEBP_QUALITY, method=4)
+    else:
+        image.save(buffer, format=image_format, quality=JPEG_QUALITY, optimize=True)
+    return buffer.getvalue()
+
+
+def encode_jpeg(image):
+    return encode(image, 'JPEG')
+
+
+def make_avatar(source, size=AVATAR_SIZE):
+    """
+    Return the JPEG bytes of the square avatar of source (path or file object)
+    """
+    return encode_jpeg(square_image(open_image(source, size), size))
+
+
+def make_renditions(source):
+    """
+    Return {(size, extension): bytes} of all renditions of source.
+    The image is decoded once, smaller sizes are scaled from the largest.
+    """
+    largest = square_image(open_image(source, AVATAR_SIZE), AVATAR_SIZE)
+    renditions = {}
+    for size in AVATAR_SIZES:
+        image = largest if size == AVATAR_SIZE else largest.resize((size, size), PIL.Image.LANCZOS)
+        for extension, image_format in AVATAR_FORMATS.items():
+            renditions[(size, extension)] = encode(image, image_format)
+    return renditions
+
+
+def content_hash(data):
+    return hashlib.sha256(data).hexdigest()[:32]
+
+
+def rendition_name(digest, size=AVATAR_SIZE, extension='jpg'):
+    return f'{AVATAR_DIRECTORY}/{digest}/{size}.{extension}'
+
+
+def get_digest(name):
+    """
+    Return the content hash of an avatar file name, None for other files
+    (e.g. images uploaded before renditions were introduced)
+    """
+    match = re_avatar_name.match(name or '')
+    return match.group('digest') if match else None
+
+
+def _write_renditions(storage, data, digest):
+    """
+    Store all renditions of data, unless they are stored already.
+    Returns the name of the largest JPEG.
+    """
+    name = rendition_name(digest)
+    if storage.exists(name):
+        return name
+
+    renditions = make_renditions(BytesIO(data))
+    # The largest JPEG is written last, it marks a complete set
+    renditions[(AVATAR_SIZE, 'jpg')] = renditions.pop((AVATAR_SIZE, 'jpg'))
+    for (size, extension), content in renditions.items():
+        rendition = rendition_name(digest, size, extension)
+        # Left by an interrupted run, the name has to stay the same
+        if storage.exists(rendition):
+            storage.delete(rendition)
+        storage.save(rendition, ContentFile(content))
+    return name
+
+
+def _delete_image(storage, name):
+    """
+    Delete an image file, for an avatar all its renditions
+    """
+    digest = get_digest(name)
+    if digest is None:
+        storage.delete(name)
+        return
+    for size in AVATAR_SIZES:
+        for extension in AVATAR_FORMATS:
+            storage.delete(rendition_name(digest, size, extension))
+
+
+def _get_executor():
+    global _executor
+    if _executor is None:
+        _executor = ThreadPoolExecutor(max_workers=getattr(settings, 'AVATAR_WORKERS', 2),
+                                       thread_name_prefix='avatar')
+    return _executor
+
+
+def _acquire_avatar(digest):
+    """
+    Add a user to the Avatar of digest, returns (avatar, created)
+    """
+    with transaction.atomic():
+        # The row lock orders this with a concurrent _release_avatar of the same digest
+        avatar, created = Avatar.objects.select_for_update().get_or_create(digest=digest)
+        Avatar.objects.filter(pk=digest).update(ref_count=F('ref_count') + 1)
+    return avatar, created
+
+
+def _release_avatar(digest):
+    """
+    Remove a user from the Avatar of digest.
+    Returns True when it was the last one, the row is deleted then
+    and the caller deletes the files.
+    """
+    with transaction.atomic():
+        avatar = Avatar.objects.select_for_update().filter(pk=digest).first()
+        if avatar is None:
+            return False
+        if avatar.ref_count > 1:
+            Avatar.objects.filter(pk=digest).update(ref_count=F('ref_count') - 1)
+            return False
+        avatar.delete()
+    return True
+
+
+def release_avatar(digest):
+    """
+    Remove a user from the Avatar of digest and delete its files
+    when nobody uses it any more, e.g. when a profile is deleted
+    """
+    if _release_avatar(digest):
+        _delete_image(UserProfile._meta.get_field('image').storage, rendition_name(digest))
+
+
+def set_profile_image(profile, uploaded_file):
+    """
+    Validate an uploaded avatar and set it as profile.image, the caller saves profile.
+    Identical uploads share one Avatar, its renditions are made and stored only once.
+    When the save is committed the Avatar counts one more profile, the renditions
+    are stored and the previous image is deleted when no other profile uses it,
+    see apply_avatar_change().
+    Uploading the image that is already set does nothing.
+    Raises ImageError for unusable uploads.
+    """
+    data = uploaded_file.read()
+    digest = content_hash(data)
+    name = rendition_name(digest)
+    if profile.avatar_id == digest or profile.image.name == name:
+        return
+    open_image(BytesIO(data))
+
+    # A second upload before the save replaces the first one, the old image stays the one in the database
+    pending = getattr(profile, '_avatar_change', None)
+    if pending is not None:
+        old_digest, old_name = pending.old_digest, pending.old_name
+    else:
+        old_digest, old_name = profile.avatar_id, profile.image.name or None
+
+    # The row has to exist for the foreign key, it is counted on commit
+    avatar, _ = Avatar.objects.get_or_create(digest=digest)
+    profile.avatar = avatar
+    profile.image.name = name
+    profile._avatar_change = AvatarChange(digest, data, old_digest, old_name)
+
+
+def apply_avatar_change(profile):
+    """
+    post_save of UserProfile: apply the change of set_profile_image()
+    when the save is committed. profile.avatar_job is the Future
+    of the background job, None without it.
+    """
+    change = profile.__dict__.pop('_avatar_change', None)
+    if change is None:
+        return
+    transaction.on_commit(functools.partial(_commit_avatar_change, profile, change))
+
+
+def _commit_avatar_change(profile, change):
+    _acquire_avatar(change.digest)
+    storage = profile.image.storage
+    if getattr(settings, 'AVATAR_PROCESS_IN_BACKGROUND', False):
+        profile.avatar_job = _get_executor().submit(_store_avatar, storage, profile.pk, change, True)
+        return
+
+    profile.avatar_job = None
+    if _store_avatar(storage, profile.pk, change) is None:
+        profile.avatar_id = change.old_digest
+        profile.image.name = change.old_name or ''
+
+
+def _store_avatar(storage, profile_pk, change, in_thread=False):
+    """
+    Store the renditions of change, then release the previous image.
+    When the renditions can not be stored the error is logged, the profile
+    gets its previous image back and the new Avatar loses its user.
+    Returns the name of the largest JPEG or None.
+    """
+    try:
+        try:
+            name = _write_renditions(storage, change.data, change.digest)
+        except Exception:
+            logger.exception('Avatar %s of profile %s could not be stored', change.digest, profile_pk)
+            UserProfile.objects.filter(pk=profile_pk, avatar_id=change.digest).update(
+                avatar_id=change.old_digest, image=change.old_name or '')
+            release_avatar(change.digest)
+            return None
+
+        if change.old_digest:
+            release_avatar(change.old_digest)
+        elif change.old_name and not UserProfile.objects.filter(image=change.old_name).exists():
+            # Images uploaded before Avatar was introduced
+            _delete_image(storage, change.old_name)
+        return name
+    finally:
+        if in_thread:
+            connections.close_all()
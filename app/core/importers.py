@@ -0,0 +1,137 @@
+"""
+Bulk import of stock codes from uploaded txt files, one code per line.
+
+The file is read line by line, codes are normalized like Stock.save does
+and duplicates are dropped in memory. New codes are collected in chunks of
+IMPORT_CHUNK_SIZE, every chunk costs one query for the codes that exist
+already and one bulk INSERT, instead of two queries per line.
+With a universe name the codes also become its members, see core.universe.
+"""
+from django.db import transaction
+
+from .models import Stock
+from .universe import UniverseSync, get_or_create_stock_ids
+
+# Codes checked and inserted at once
+IMPORT_CHUNK_SIZE = 1000
+# Accepted length of a stock code, same rule as the original File upload
+MIN_CODE_LENGTH = 3
+MAX_CODE_LENGTH = 4
+
+
+class ImportSummary:
+    """
+    Counts of an import:
+    lines - lines read, including empty ones
+    created - new Stock rows
+    existing - codes that were in model Stock already
+    duplicates - repeated codes in the file
+    invalid - non empty lines that are not a valid code
+    added, removed - changes of the universe membership
+    """
+
+    def __init__(self):
+        self.lines = 0
+        self.created = 0
+        self.existing = 0
+        self.duplicates = 0
+        self.invalid = 0
+        self.added = 0
+        self.removed = 0
+
+    def as_dict(self):
+        return {
+            'lines': self.lines,
+            'created': self.created,
+            'existing': self.existing,
+            'duplicates': self.duplicates,
+            'invalid': self.invalid,
+            'added': self.added,
+            'removed': self.removed,
+        }
+
+    def __str__(self):
+        return (f'{self.created} stocks added, {self.existing} already existed, '
+                f'{self.duplicates} duplicates and {self.invalid} invalid lines skipped, '
+                f'{self.added} universe members added and {self.removed} removed')
+
+
+def is_valid_code(stock_code):
+    return MIN_CODE_LENGTH <= len(stock_code) <= MAX_CODE_LENGTH
+
+
+def iter_codes(lines, summary):
+    """
+    Yield normalized, valid codes of lines (str or bytes) once each
+    """
+    seen = set()
+    for line in lines:
+        summary.lines += 1
+        if isinstance(line, bytes):
+            line = line.decode('utf-8', errors='replace')
+        stock_code = Stock.normalize_code(line.lstrip('\ufeff'))
+        if not stock_code:
+            continue
+        if not is_valid_code(stock_code):
+            summary.invalid += 1
+        elif stock_code in seen:
+            summary.duplicates += 1
+        else:
+            seen.add(stock_code)
+            yield stock_code
+
+
+def _insert_chunk(chunk, summary, sync=None):
+    if sync is None:
+        existing = set(Stock.objects.filter(stock_code__in=chunk).values_list('stock_code', flat=True))
+        new_stocks = [Stock(stock_code=stock_code) for stock_code in chunk if stock_code not in existing]
+        # A code added by a concurrent import is skipped by the unique constraint
+        Stock.objects.bulk_create(new_stocks, ignore_conflicts=True)
+        summary.existing += len(existing)
+        summary.created += len(new_stocks)
+        return
+
+    # The universe needs the ids of the new stocks as well
+    stock_ids, created = get_or_create_stock_ids(chunk)
+    sync.add(stock_ids.values())
+    summary.existing += len(chunk) - created
+    summary.created += created
+
+
+def import_stock_codes(lines, chunk_size=IMPORT_CHUNK_SIZE, universe=None, source=''):
+    """
+    Add the stock codes of lines to model Stock, returns an ImportSummary.
+    lines can be any iterable of str or bytes, e.g. an open file.
+    When universe is given, the codes replace the members of that universe,
+    they are recorded in the same chunks, in one transaction.
+    """
+    summary = ImportSummary()
+    if universe is None:
+        _import_chunks(lines, chunk_size, summary)
+        return summary
+
+    with transaction.atomic():
+        sync = UniverseSync(universe)
+        _import_chunks(lines, chunk_size, summary, sync)
+        summary.added = sync.added
+        summary.removed = sync.finish(source=source, chunk_size=chunk_size)
+    return summary
+
+
+def _import_chunks(lines, chunk_size, summary, sync=None):
+    chunk = []
+    for stock_code in iter_codes(lines, summary):
+        chunk.append(stock_code)
+        if len(chunk) >= chunk_size:
+            _insert_chunk(chunk, summary, sync)
+            chunk = []
+    if chunk:
+        _insert_chunk(chunk, summary, sync)
+
+
+def import_stock_file(file, chunk_size=IMPORT_CHUNK_SIZE, universe=None):
+    """
+    Import the stock codes of a Django File (e.g. File.file), read line by line
+    """
+    with file.open('rb') as f:
+        return import_stock_codes(f, chunk_size, universe=universe, source=file.name)
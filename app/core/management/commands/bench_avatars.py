@@ -0,0 +1,87 @@
+"""
+Django command to measure avatar processing of large uploads.
+
+A JPEG of the given size is generated in memory and made into an avatar
+by a full decode and resize (the previous implementation) and by
+core.images. Every run is done in a forked process, so the reported
+peak RSS growth belongs to that run only.
+"""
+import multiprocessing
+import resource
+import time
+from io import BytesIO
+
+import PIL.Image
+from django.core.management.base import BaseCommand
+
+from core import images
+
+
+def full_decode(data, size=images.AVATAR_SIZE):
+    """
+    Previous implementation: decode at full resolution, resize, then crop
+    """
+    image = PIL.Image.open(BytesIO(data)).convert('RGB')
+    scale = size / min(image.width, image.height)
+    image = image.resize((round(image.width * scale), round(image.height * scale)), PIL.Image.LANCZOS)
+    left = (image.width - size) // 2
+    top = (image.height - size) // 2
+    return images.encode_jpeg(image.crop((left, top, left + size, top + size)))
+
+
+def draft_and_reduce(data, size=images.AVATAR_SIZE):
+    return images.make_avatar(BytesIO(data), size)
+
+
+METHODS = {
+    'full decode': full_decode,
+    'draft + reduce': draft_and_reduce,
+}
+
+
+def _measure(method, data, results):
+    start_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    start = time.perf_counter()
+    METHODS[method](data)
+    elapsed = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    results.put((elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - start_rss))
+
+
+def make_jpeg(width, height):
+    """
+    JPEG with some detail, so it does not compress to almost nothing
+    """
+    image = PIL.Image.radial_gradient('L').resize((width, height)).convert('RGB')
+    buffer = BytesIO()
+    image.save(buffer, format='JPEG', quality=90)
+    return buffer.getvalue()
+
+
+class Command(BaseCommand):
+    """
+    Print latency and peak RSS growth of every method
+    """
+    help = 'Benchmark avatar processing of large uploads'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--width', type=int, default=6000)
+        parser.add_argument('--height', type=int, default=4000)
+        parser.add_argument('--repeat', type=int, default=3)
+
+    def handle(self, *args, **options):
+        data = make_jpeg(options['width'], options['height'])
+        self.stdout.write(f"{options['width']}x{options['height']} JPEG, {len(data):,} bytes")
+
+        context = multiprocessing.get_context('fork')
+        for method in METHODS:
+            runs = []
+            for _ in range(options['repeat']):
+                results = context.Queue()
+                process = context.Process(target=_measure, args=(method, data, results))
+                process.start()
+                runs.append(results.get())
+                process.join()
+            latency = min(elapsed for elapsed, _ in runs) * 1000
+            rss = max(rss for _, rss in runs) / 1024
+            self.stdout.write(f'  {method:<16} {latency:>9.1f} ms  peak RSS +{rss:>7.1f} MB')
@@ -0,0 +1,72 @@
+"""
+Django command to measure response compression of the stock APIs.
+
+Payloads are built from the stock data in the database the same way the
+views build them, then compressed with every supported encoding.
+"""
+import time
+
+from django.core.management.base import BaseCommand
+
+from core.middleware import ENCODINGS
+from core.models import Stock
+from core.snapshot import screener_queryset
+from pages import export
+from pages.renderers import FastJSONRenderer
+from pages.screener import ScreenerQuery
+from pages.serializers import StockSerializer, screener_queryset_rows
+from pages.views import DASHBOARD_DEFAULTS
+
+
+def dashboard_api_payload(limit):
+    query = ScreenerQuery.from_params({}, defaults=DASHBOARD_DEFAULTS)
+    return [FastJSONRenderer().render(screener_queryset_rows(query.apply(screener_queryset())[:limit]))]
+
+
+def stock_detail_payload(limit):
+    stock = Stock.objects.order_by('pk').first()
+    return [FastJSONRenderer().render(StockSerializer(stock).data)] if stock else []
+
+
+def export_csv_payload(limit):
+    queryset = screener_queryset().order_by('pk')[:limit]
+    return [piece.encode() for piece in export.stream_csv(queryset)]
+
+
+# Endpoint -> function returning the response body as a list of pieces
+ENDPOINTS = {
+    'dashboard-api': dashboard_api_payload,
+    'stock-detail': stock_detail_payload,
+    'dashboard-export (csv, streamed)': export_csv_payload,
+}
+
+
+class Command(BaseCommand):
+    """
+    Print uncompressed and compressed bytes and compression CPU time per endpoint.
+    """
+    help = 'Benchmark response compression of the stock APIs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--limit', type=int, default=None,
+                            help='Largest number of stocks in list payloads')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'Encodings: {", ".join(ENCODINGS)}')
+        for name, get_payload in ENDPOINTS.items():
+            pieces = get_payload(options['limit'])
+            if not pieces:
+                self.stdout.write(f'{name}: no data')
+                continue
+
+            size = sum(len(piece) for piece in pieces)
+            self.stdout.write(f'{name}: {size:,} bytes')
+            for encoding, (compress, compress_pieces) in ENCODINGS.items():
+                start = time.process_time()
+                if len(pieces) == 1:
+                    compressed = len(compress(pieces[0]))
+                else:
+                    compressed = sum(len(piece) for piece in compress_pieces(iter(pieces)))
+                cpu_ms = (time.process_time() - start) * 1000
+                self.stdout.write(f'  {encoding:<5} {compressed:>12,} bytes  '
+                                  f'{compressed / size:>6.1%}  {cpu_ms:>9.2f} ms CPU')
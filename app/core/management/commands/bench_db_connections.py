@@ -0,0 +1,97 @@
+"""
+Django command to measure dashboard-api requests per second with and
+without persistent database connections.
+
+Requests go through the whole Django stack in process (test Client). The
+test client disconnects close_old_connections from request_started and
+request_finished, so the command calls it before and after every request
+like the handlers of a server do. Connections are counted with the
+connection_created signal: CONN_MAX_AGE=0 opens one per request, a longer
+age one for the whole run. Run it against PostgreSQL,
+e.g. the db service of docker-compose:
+
+    docker compose up -d db
+    docker compose run --rm app sh -c "python manage.py bench_db_connections"
+
+On SQLite opening a connection is almost free and the numbers are flat,
+an in-memory SQLite database is never closed.
+"""
+import time
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import close_old_connections, connection
+from django.db.backends.signals import connection_created
+from django.test import Client, override_settings
+from django.urls import reverse
+
+BENCH_USERNAME = 'bench-db-connections@example.com'
+
+
+class Command(BaseCommand):
+    """
+    Print requests per second of dashboard-api for every CONN_MAX_AGE.
+    """
+    help = 'Benchmark dashboard-api with and without persistent database connections'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=300,
+                            help='Requests per setting')
+        parser.add_argument('--conn-max-age', type=int, nargs='+', default=[0, 60],
+                            help='CONN_MAX_AGE values to compare, 0 is a new connection per request')
+        parser.add_argument('--params',
+                            default='fa_score=0&rsi=100&avg_gain_loss=-100&five_year_avg_dividend_yield=0',
+                            help='Query string of the dashboard-api requests')
+
+    def handle(self, *args, **options):
+        user, _ = User.objects.get_or_create(username=BENCH_USERNAME)
+        client = Client()
+        client.force_login(user)
+        url = f"{reverse('dashboard-api-list')}?{options['params']}"
+        self.stdout.write(f'{connection.vendor} database, {options["requests"]} requests of {url}')
+
+        original_max_age = connection.settings_dict['CONN_MAX_AGE']
+        try:
+            for max_age in options['conn_max_age']:
+                rate, connects = self._run(client, url, max_age, options['requests'])
+                line = (f'CONN_MAX_AGE={max_age:<6} {rate:>10,.1f} requests/s  '
+                        f'{connects:>6} connections opened')
+                expected = options['requests'] if max_age == 0 else 1
+                if connects != expected:
+                    line = self.style.WARNING(f'{line}, expected {expected}')
+                self.stdout.write(line)
+        finally:
+            connection.settings_dict['CONN_MAX_AGE'] = original_max_age
+            connection.close()
+            user.delete()
+
+    @staticmethod
+    def _run(client, url, max_age, count):
+        connection.close()
+        connection.settings_dict['CONN_MAX_AGE'] = max_age
+        connects = 0
+
+        def count_connection(sender, connection, **kwargs):
+            nonlocal connects
+            connects += 1
+
+        connection_created.connect(count_connection)
+        # Without a rate the bench user is not throttled, see pages.throttling
+        # The test client sends Host: testserver
+        try:
+            with override_settings(API_THROTTLE_USER_RATES={BENCH_USERNAME: {'stock_list': None}},
+                                   ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+                start = time.perf_counter()
+                for _ in range(count):
+                    # request_started and request_finished of a server, the connection
+                    # is closed at the end of the request unless it is kept
+                    close_old_connections()
+                    response = client.get(url)
+                    close_old_connections()
+                    if response.status_code != 200:
+                        raise RuntimeError(f'dashboard-api returned {response.status_code}')
+                elapsed = time.perf_counter() - start
+        finally:
+            connection_created.disconnect(count_connection)
+        return count / elapsed, connects
@@ -0,0 +1,76 @@
+"""
+Django command to compare the JSON rendering paths of the stock APIs.
+
+Rows are built in memory, the database is not used, so the numbers show
+the cost of serialization and rendering only.
+"""
+import time
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand
+from rest_framework.renderers import JSONRenderer
+
+from core.models import Stock
+from pages.renderers import FastJSONRenderer, orjson
+from pages.serializers import StockSerializer, ScreenerSerializer, SCREENER_FIELDS, STOCK_FIELDS, \
+    screener_rows, stock_rows
+
+
+def _make_stocks(count):
+    return [
+        Stock(id=index + 1, stock_code=f'S{index}', sector='Technology', industry='Software',
+              country='USA', exchange_short_name='NASDAQ', company_name=f'Company {index}',
+              rsi=index % 100, fa_score=index % 40, avg_gain_loss=Decimal('10.50'),
+              five_year_avg_dividend_yield=Decimal('2.30'), composite_score=55.5)
+        for index in range(count)
+    ]
+
+
+def _as_rows(stocks):
+    return [
+        (stock.pk,) + tuple(getattr(stock, field) for field in SCREENER_FIELDS)
+        for stock in stocks
+    ]
+
+
+def _as_stock_rows(stocks):
+    return [tuple(getattr(stock, field) for field in STOCK_FIELDS) for stock in stocks]
+
+
+class Command(BaseCommand):
+    """
+    Print rows per second for every rendering path and number of rows.
+    """
+    help = 'Benchmark serializers and JSON renderers of the stock APIs'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--rows', type=int, nargs='+', default=[1000, 50000],
+                            help='Numbers of rows to render')
+        parser.add_argument('--repeat', type=int, default=3,
+                            help='Runs per path, the best one is reported')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f'orjson installed: {orjson is not None}')
+        for count in options['rows']:
+            stocks = _make_stocks(count)
+            rows = _as_rows(stocks)
+            stock_field_rows = _as_stock_rows(stocks)
+            paths = (
+                ('StockSerializer + JSONRenderer',
+                 lambda: JSONRenderer().render(StockSerializer(stocks, many=True).data)),
+                ('stock_rows + FastJSONRenderer',
+                 lambda: FastJSONRenderer().render(stock_rows(stock_field_rows))),
+                ('ScreenerSerializer + JSONRenderer',
+                 lambda: JSONRenderer().render(ScreenerSerializer(stocks, many=True).data)),
+                ('screener_rows + FastJSONRenderer',
+                 lambda: FastJSONRenderer().render(screener_rows(rows))),
+            )
+            for name, render in paths:
+                best = min(self._time(render) for _ in range(options['repeat']))
+                self.stdout.write(f'{count:>8} rows  {name:<36} {count / best:>12,.0f} rows/s')
+
+    @staticmethod
+    def _time(render):
+        start = time.perf_counter()
+        render()
+        return time.perf_counter() - start
@@ -0,0 +1,91 @@
+"""
+Django command to count session writes of a scripted browsing load
+for every session backend.
+
+Every virtual user logs in, opens page dashboard, clicks through the sort
+columns, opens a stock and the profile page and logs out. Queries on
+table django_session are counted by kind, so the numbers show what each
+SESSION_BACKEND costs the database, independent of the machine.
+"""
+import time
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand
+from django.db import connection
+from django.test import Client, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Stock
+from pages.views import SORT_FIELDS
+
+BENCH_USERNAME = 'bench-sessions@example.com'
+BENCH_PASSWORD = 'bench-sessions-password'
+QUERY_KINDS = ('SELECT', 'INSERT', 'UPDATE', 'DELETE')
+
+
+def browse(client, stock=None):
+    """
+    One visit of a user, returns the number of requests
+    """
+    pages = [
+        ('post', reverse('login'), {'email': BENCH_USERNAME, 'password': BENCH_PASSWORD}),
+        ('get', reverse('dashboard'), {}),
+    ]
+    for field, _ in SORT_FIELDS:
+        for direction in ('ascending', 'descending'):
+            pages.append(('get', reverse('dashboard'), {'sort': field, 'direction': direction}))
+    if stock is not None:
+        pages.append(('get', reverse('detail-by-code', args=[stock.stock_code]), {}))
+    pages.append(('get', reverse('profile'), {}))
+    pages.append(('post', reverse('logout'), {}))
+
+    for method, url, data in pages:
+        getattr(client, method)(url, data)
+    return len(pages)
+
+
+class Command(BaseCommand):
+    """
+    Print django_session queries per backend for the same browsing load.
+    """
+    help = 'Benchmark session database writes of a scripted browsing load'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=20,
+                            help='Visits per backend')
+        parser.add_argument('--backends', nargs='+', default=['db', 'cached_db', 'signed_cookies'],
+                            help='Backends of django.contrib.sessions.backends to compare')
+
+    def handle(self, *args, **options):
+        user = User.objects.create_user(username=BENCH_USERNAME, password=BENCH_PASSWORD)
+        stock = Stock.objects.order_by('pk').first()
+        try:
+            for backend in options['backends']:
+                self._run(backend, options['users'], stock)
+        finally:
+            user.delete()
+
+    def _run(self, backend, users, stock):
+        counts = Counter()
+        requests = 0
+        # The test client sends Host: testserver
+        with override_settings(SESSION_ENGINE=f'django.contrib.sessions.backends.{backend}',
+                               ALLOWED_HOSTS=[*settings.ALLOWED_HOSTS, 'testserver']):
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                for _ in range(users):
+                    # A new client loads the middleware with the current SESSION_ENGINE
+                    requests += browse(Client(), stock)
+            elapsed = time.perf_counter() - start
+
+        for query in queries.captured_queries:
+            sql = query['sql'].lstrip().upper()
+            if 'DJANGO_SESSION' in sql:
+                counts[sql.split(None, 1)[0]] += 1
+        writes = counts['INSERT'] + counts['UPDATE'] + counts['DELETE']
+        summary = '  '.join(f'{kind} {counts[kind]:>5}' for kind in QUERY_KINDS)
+        self.stdout.write(f'{backend:<16} {requests:>6} requests  {summary}  '
+                          f'writes/request {writes / requests:.2f}  {requests / elapsed:,.0f} requests/s')
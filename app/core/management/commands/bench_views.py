@@ -0,0 +1,86 @@
+"""
+Django command to check the query and latency budgets of all views
+on seeded data, see pages.benchmarks.
+
+Stocks are added in one transaction that is rolled back at the end, so
+the command can run against a copy of the production database:
+
+    python manage.py bench_views --stocks 1000 10000 100000
+
+It prints queries, p50 / p95 latency and response size of every view and
+exits with an error when a view needs more queries than its budget,
+does not return 200 or is slower than --max-p95-ms.
+"""
+from django.conf import settings
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.test import Client, override_settings
+from rest_framework.authtoken.models import Token
+
+from core.models import Stock
+from pages.benchmarks import VIEW_CASES, THROTTLE_SCOPES, seed_stocks, measure
+
+BENCH_USERNAME = 'bench-views@example.com'
+
+
+class Command(BaseCommand):
+    """
+    Print a budget report per number of stocks.
+    """
+    help = 'Check query-count and latency budgets of all views on seeded stocks'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--stocks', type=int, nargs='+', default=[1000, 10000, 100000],
+                            help='Numbers of seeded stocks, in increasing order')
+        parser.add_argument('--repeat', type=int, default=20,
+                            help='Timed requests per view')
+        parser.add_argument('--max-p95-ms', type=float, default=500,
+                            help='Latency budget of every view')
+
+    def handle(self, *args, **options):
+        failures = []
+        with transaction.atomic():
+            user = User.objects.create_user(username=BENCH_USERNAME)
+            token = Token.objects.create(user=user)
+            client = Client()
+            client.force_login(user)
+
+            seeded = 0
+            # Without a rate the bench user is not throttled, see pages.throttling
+            rates = {BENCH_USERNAME: {scope: None for scope in THROTTLE_SCOPES}}
+            # The test client sends Host: testserver
+            hosts = [*settings.ALLOWED_HOSTS, 'testserver']
+            with override_settings(API_THROTTLE_USER_RATES=rates, ALLOWED_HOSTS=hosts):
+                for count in sorted(options['stocks']):
+                    seed_stocks(count - seeded, start=seeded)
+                    seeded = count
+                    failures += self._report(client, token, count, options)
+
+            # Leave the database as it was
+            transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError('Budgets exceeded:\n' + '\n'.join(failures))
+        self.stdout.write(self.style.SUCCESS('All views within budget'))
+
+    def _report(self, client, token, count, options):
+        stock = Stock.objects.order_by('pk').first()
+        self.stdout.write(f'\n{count:,} stocks')
+        self.stdout.write(f'{"view":<18} {"status":>6} {"queries":>9} {"p50 ms":>9} {"p95 ms":>9} {"bytes":>11}')
+
+        failures = []
+        for case in VIEW_CASES:
+            result = measure(client, case, stock, token, repeat=options['repeat'])
+            self.stdout.write(f'{case.name:<18} {result["status"]:>6} '
+                              f'{result["queries"]:>4} / {case.max_queries:<2} '
+                              f'{result["p50"]:>9.1f} {result["p95"]:>9.1f} {result["size"]:>11,}')
+
+            label = f'{count:,} stocks, {case.name}:'
+            if result['status'] != 200:
+                failures.append(f'{label} status {result["status"]}')
+            if result['queries'] > case.max_queries:
+                failures.append(f'{label} {result["queries"]} queries, budget {case.max_queries}')
+            if result['p95'] > options['max_p95_ms']:
+                failures.append(f'{label} p95 {result["p95"]:.1f} ms, budget {options["max_p95_ms"]:g} ms')
+        return failures
@@ -0,0 +1,84 @@
+"""
+Django command to load test read endpoints of running servers.
+
+Sends the same requests to every given base URL with a number of
+concurrent clients and prints requests per second and latencies.
+Typical use, the WSGI and ASGI deployments side by side:
+    gunicorn app.wsgi --workers 2 --bind :8000
+    uvicorn app.asgi:application --workers 2 --port 8001
+    python manage.py loadtest http://localhost:8000 http://localhost:8001 \
+        --token <api token> --path /async/stock/1/ --concurrency 50
+"""
+import statistics
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.error import HTTPError, URLError
+from urllib.request import Request, urlopen
+
+from django.core.management.base import BaseCommand
+
+DEFAULT_PATHS = [
+    '/async/stock/1/',
+    '/async/dashboard-api/?fa_score=30&rsi=40&avg_gain_loss=10&five_year_avg_dividend_yield=1',
+]
+
+
+def _fetch(url, token, timeout):
+    """
+    Return (status, seconds) of one GET request, status 0 on connection errors
+    """
+    request = Request(url, headers={'Authorization': f'Token {token}'} if token else {})
+    start = time.perf_counter()
+    try:
+        with urlopen(request, timeout=timeout) as response:
+            response.read()
+            status = response.status
+    except HTTPError as exc:
+        status = exc.code
+    except (URLError, OSError):
+        status = 0
+    return status, time.perf_counter() - start
+
+
+def _percentile(values, percent):
+    values = sorted(values)
+    return values[min(int(len(values) * percent / 100), len(values) - 1)]
+
+
+class Command(BaseCommand):
+    """
+    Print throughput and latency per base URL and path.
+    """
+    help = 'Load test stock read endpoints of running servers'
+
+    def add_arguments(self, parser):
+        parser.add_argument('base_urls', nargs='+', help='e.g. http://localhost:8000')
+        parser.add_argument('--path', action='append', dest='paths',
+                            help='Path to request, can be repeated')
+        parser.add_argument('--token', default='', help='API token of a user')
+        parser.add_argument('--concurrency', type=int, default=20, help='Concurrent clients')
+        parser.add_argument('--requests', type=int, default=500, help='Requests per path')
+        parser.add_argument('--timeout', type=float, default=30, help='Request timeout in seconds')
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or DEFAULT_PATHS
+        for base_url in options['base_urls']:
+            for path in paths:
+                url = base_url.rstrip('/') + path
+                urls = [url] * options['requests']
+
+                start = time.perf_counter()
+                with ThreadPoolExecutor(max_workers=options['concurrency']) as executor:
+                    results = list(executor.map(
+                        lambda target: _fetch(target, options['token'], options['timeout']), urls))
+                elapsed = time.perf_counter() - start
+
+                latencies = [seconds * 1000 for _, seconds in results]
+                errors = sum(1 for status, _ in results if status != 200)
+                self.stdout.write(
+                    f'{url}\n'
+                    f'  {len(results) / elapsed:,.1f} req/s  '
+                    f'p50 {statistics.median(latencies):.1f} ms  '
+                    f'p95 {_percentile(latencies, 95):.1f} ms  '
+                    f'errors {errors}/{len(results)}'
+                )
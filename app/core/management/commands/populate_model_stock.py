@@ -1,5 +1,7 @@
 import os
+from django.conf import settings
 from django.core.management.base import BaseCommand
+from django.db.models import Q
 
 # core.config will not be uploaded to GitHub for security purposes
 # This should not affect the tests
@@ -10,7 +12,15 @@ except:
 
 from yahoofinancials import YahooFinancials
 from ...models import Stock
+from ...snapshot import refresh_screener_snapshot
+from ...ranking import update_ranks
+from ...pubsub import publish_stock_update, prune_messages
+from ...history import record_indicator_snapshots
+from ...charts import store_price_bars
+from ...db import run_in_threads
+from ...universe import universe_name, get_source_version, needs_reload, sync_universe, get_member_stocks
 from datetime import datetime, timedelta, date
+from decimal import Decimal, ROUND_HALF_UP
 from django.utils import timezone
 import pandas as pd
 import requests
@@ -23,34 +33,111 @@ class Command(BaseCommand):
     and financialmodelingprep.
     Whenever we call our Command class it will call handle method.
     """
+    # Stocks selected in the admin panel, passed by StockAdmin
+    stealth_options = ('queryset',)
+
+    def add_arguments(self, parser):
+        parser.add_argument('--workers', type=int, default=None,
+                            help='Threads updating the selected stocks, default settings.REFRESH_WORKERS')
 
     def handle(self, *args, **options):
         """
         Update selected stocks from admin panel.
-        Add new stocks from txt file if any.
+        Load the universe txt file if it changed and get company info of new stocks.
+        Recalculate percentile ranks, append today's indicators to the history
+        and rebuild the screener snapshot when done.
         """
 
         # Get the queryset from the options dictionary
         queryset = options.get('queryset')
-        # Loop over the selected objects
+        # Update the selected objects, with REFRESH_WORKERS > 1 on
+        # that many threads, each of them reusing one database connection
         if queryset:
-            for stock in queryset:
-                # Get the stock code from the object
-                stock_code = stock.stock_code
-                pus = PopulateUpdateStock(stock_code=stock_code)
-                pus.populate_company_info(update=False)
-                pus.populate_fundamental_analysis_score(update=True)
-                pus.populate_rsi(update=True)
-                pus.populate_avg_gain_loss(update=True)
-                pus.populate_five_year_avg_dividend_yield(update=True)
-
-        gsc = GetStockCodes(txt_file='all_stock_codes.txt')
-        gsc.get_stock_codes_from_txt()
-        for stock_code in gsc.list_codes:
-            # Check if the stock code already exists in the database
-            if not Stock.objects.filter(stock_code=stock_code).exists():
-                pus = PopulateUpdateStock(stock_code=stock_code)
-                pus.populate_company_info(update=False)
+            workers = options.get('workers') or getattr(settings, 'REFRESH_WORKERS', 1)
+            stock_codes = [stock.stock_code for stock in queryset]
+            for stock_code, exc in run_in_threads(update_stock, stock_codes, workers):
+                print(f'update_stock {stock_code} Exception: {exc}')
+
+        load_universe_txt(UNIVERSE_TXT_FILE)
+        populate_missing_company_info()
+
+        # Rank all stocks against each other, then publish the new data
+        # to page dashboard and dashboard-api at once
+        update_ranks()
+        record_indicator_snapshots()
+        refresh_screener_snapshot()
+        prune_messages()
+
+
+def update_stock(stock_code):
+    """
+    Get all indicators of one stock
+    """
+    pus = PopulateUpdateStock(stock_code=stock_code)
+    pus.populate_company_info(update=False)
+    pus.populate_fundamental_analysis_score(update=True)
+    pus.populate_rsi(update=True)
+    pus.populate_avg_gain_loss(update=True)
+    pus.populate_five_year_avg_dividend_yield(update=True)
+
+
+# Stock fields filled by FundTechAnalysis.get_company_info()
+COMPANY_INFO_FIELDS = ('sector', 'industry', 'country', 'description',
+                       'exchange_short_name', 'company_name', 'ipo_years')
+# Tickers per request of FundTechAnalysis.get_company_infos()
+PROFILE_BATCH_SIZE = 100
+# Stocks without a profile are requested again after
+COMPANY_INFO_RETRY = timedelta(days=7)
+# Universe list read by every run, relative to the working directory
+UNIVERSE_TXT_FILE = 'all_stock_codes.txt'
+
+
+def load_universe_txt(txt_file):
+    """
+    Load the universe of txt_file into the registry, see core.universe.
+    The file is parsed only when it changed since the last run.
+    """
+    name = universe_name(txt_file)
+    path = os.path.join(os.getcwd(), txt_file)
+    if not needs_reload(name, path):
+        return
+
+    gsc = GetStockCodes(txt_file=txt_file)
+    gsc.get_stock_codes_from_txt()
+    sync_universe(name, gsc.list_codes, source=txt_file, source_version=get_source_version(path))
+
+
+def populate_missing_company_info(batch_size=PROFILE_BATCH_SIZE):
+    """
+    Fetch company info, in batches, for universe members that have none yet,
+    e.g. tickers added by the last upload. Returns the updated stocks.
+    Members the API had no profile for are skipped for COMPANY_INFO_RETRY.
+    """
+    now = timezone.now()
+    stocks = list(get_member_stocks()
+                  .filter(company_name__isnull=True)
+                  .filter(Q(company_info_checked_at__isnull=True)
+                          | Q(company_info_checked_at__lt=now - COMPANY_INFO_RETRY))
+                  .order_by('stock_code'))
+    if not stocks:
+        return []
+
+    checked = set()
+    infos = FundTechAnalysis.get_company_infos([stock.stock_code for stock in stocks], batch_size, checked)
+    updated = []
+    for stock in stocks:
+        # Codes of failed requests are asked again on the next run
+        if stock.stock_code not in checked:
+            continue
+        stock.company_info_checked_at = now
+        stock.updated_at = now
+        if stock.stock_code in infos:
+            fta = infos[stock.stock_code]
+            for field in COMPANY_INFO_FIELDS:
+                setattr(stock, field, getattr(fta, field))
+        updated.append(stock)
+    Stock.objects.bulk_update(updated, COMPANY_INFO_FIELDS + ('company_info_checked_at', 'updated_at'))
+    return [stock for stock in updated if stock.stock_code in infos]
 
 
 class GetStockCodes:
@@ -106,6 +193,8 @@ class FundTechAnalysis:
 
         self.five_year_avg_dividend_yield = None
         self.avg_gain_loss = None
+        # Daily prices downloaded by calc_avg_gain_loss()
+        self.price_bars = []
 
     def get_company_info(self):
         """
@@ -129,23 +218,29 @@ class FundTechAnalysis:
         if "Error Message" in response:
             raise ValueError(f"Error Message in API response: {response}")
 
+        return self.set_company_info(response[0])
+
+    def set_company_info(self, profile):
+        """
+        Read company data from one profile of the financialmodelingprep API
+        """
         # Check if the required parameters are present in the response
         required_params = ["sector", "industry", "country", "description", "exchangeShortName",
                            "companyName",
                            "ipoDate"]
-        if not all(param in response[0] for param in required_params):
+        if not all(param in profile for param in required_params):
             raise KeyError("Missing parameter in API response")
 
         # Extract the information from the response
-        self.sector = response[0]["sector"]
-        self.industry = response[0]["industry"]
-        self.country = response[0]["country"]
-        self.description = response[0]["description"]
-        self.exchange_short_name = response[0]["exchangeShortName"]
-        self.company_name = response[0]["companyName"]
+        self.sector = profile["sector"]
+        self.industry = profile["industry"]
+        self.country = profile["country"]
+        self.description = profile["description"]
+        self.exchange_short_name = profile["exchangeShortName"]
+        self.company_name = profile["companyName"]
 
         # Convert the IPO date to a datetime object
-        ipo_date = datetime.strptime(response[0]["ipoDate"], "%Y-%m-%d")
+        ipo_date = datetime.strptime(profile["ipoDate"], "%Y-%m-%d")
 
         # Get the current date as a datetime object
         current_date = datetime.now()
@@ -155,6 +250,41 @@ class FundTechAnalysis:
 
         return self
 
+    @classmethod
+    def get_company_infos(cls, stock_codes, batch_size=PROFILE_BATCH_SIZE, checked=None):
+        """
+        Company info of many stocks, the profile API accepts a comma separated
+        list of tickers, so there is one request per batch_size codes.
+        Returns {stock_code: FundTechAnalysis}, codes without a usable
+        profile are left out. The codes of batches the API answered
+        are added to set checked.
+        """
+        infos = {}
+        for start in range(0, len(stock_codes), batch_size):
+            batch = stock_codes[start:start + batch_size]
+            try:
+                url = f"https://financialmodelingprep.com/api/v3/profile/{','.join(batch)}?" \
+                      f"apikey={FUNDAMENTAL_ANALYSIS_API_KEY}"
+                response = requests.get(url).json()
+                if not isinstance(response, list):
+                    raise ValueError(f"Unexpected API response: {response}")
+            except Exception as exc:
+                print(f'get_company_infos Exception: {exc}')
+                continue
+            if checked is not None:
+                checked.update(batch)
+
+            for profile in response:
+                if not isinstance(profile, dict):
+                    print(f'get_company_infos Unexpected profile: {profile}')
+                    continue
+                stock_code = Stock.normalize_code(profile.get("symbol"))
+                try:
+                    infos[stock_code] = cls(stock_code=stock_code).set_company_info(profile)
+                except (KeyError, ValueError) as exc:
+                    print(f'get_company_infos {stock_code} Exception: {exc}')
+        return infos
+
     def get_fundamental_analysis_score(self):
         """
         Using financialmodelingprep get Fundamental analysis rating
@@ -260,6 +390,9 @@ class FundTechAnalysis:
         except Exception as exc:
             raise ValueError(f'Empty response from Yahoo Financials {exc}')
 
+        # Keep the daily prices, they are saved for the price chart
+        self.price_bars = price_data[self.stock_code]["prices"]
+
         df["formatted_date"] = pd.to_datetime(df["formatted_date"])
         df.set_index("formatted_date", inplace=True)
 
@@ -321,14 +454,9 @@ class PopulateUpdateStock:
         If exists assign it to self.stock
         else create new object and assign it to self.stock
         """
-        all_stocks_model = Stock.objects.all()
-        stock = all_stocks_model.filter(stock_code=self.stock_code).first()
-        # stock = all_stocks_model.get(stock_code=self.stock_code)
-        # Company does not exist in model Stock create new object.
-        if not stock:
-            stock = Stock.objects.create(
-                stock_code=self.stock_code
-            )
+        # stock_code is unique and indexed, company that does not
+        # exist in model Stock is created.
+        stock, _ = Stock.objects.get_or_create(stock_code=Stock.normalize_code(self.stock_code))
         return stock
 
     def populate_company_info(self, update=False):
@@ -385,9 +513,13 @@ class PopulateUpdateStock:
             try:
                 fta.get_fundamental_analysis_score()
                 if fta.fundamental_analysis_score is not None:
+                    changed = stock.fa_score != fta.fundamental_analysis_score
                     stock.fa_score = fta.fundamental_analysis_score
                     stock.fa_score_date = timezone.now()
                     stock.save()
+                    # Let subscribers of stock-stream know about the new value
+                    if changed:
+                        publish_stock_update(stock, fa_score=stock.fa_score)
             except Exception as exc:
                 print(f'populate_fundamental_analysis_score Exception: {exc}')
 
@@ -404,9 +536,12 @@ class PopulateUpdateStock:
             try:
                 fta.calc_rsi()
                 if fta.rsi is not None:
+                    changed = stock.rsi != fta.rsi
                     stock.rsi = fta.rsi
                     stock.rsi_date = timezone.now()
                     stock.save()
+                    if changed:
+                        publish_stock_update(stock, rsi=stock.rsi)
             except Exception as exc:
                 print(f'populate_rsi Exception: {exc}')
 
@@ -422,9 +557,13 @@ class PopulateUpdateStock:
         if not stock.avg_gain_loss or update is True:
             try:
                 fta.calc_avg_gain_loss()
+                store_price_bars(stock, fta.price_bars)
                 if fta.avg_gain_loss is not None:
+                    changed = stock.avg_gain_loss != fta.avg_gain_loss
                     stock.avg_gain_loss = fta.avg_gain_loss
                     stock.save()
+                    if changed:
+                        publish_stock_update(stock, avg_gain_loss=stock.avg_gain_loss)
             except Exception as exc:
                 print(f'populate_avg_gain_loss Exception: {exc}')
 
@@ -441,8 +580,14 @@ class PopulateUpdateStock:
             try:
                 fta.get_five_year_avg_dividend_yield()
                 if fta.five_year_avg_dividend_yield is not None:
-                    stock.five_year_avg_dividend_yield = fta.five_year_avg_dividend_yield
+                    # Yahoo returns a float, the model stores 2 decimal places
+                    dividend_yield = Decimal(str(fta.five_year_avg_dividend_yield)).quantize(
+                        Decimal('0.01'), rounding=ROUND_HALF_UP)
+                    changed = stock.five_year_avg_dividend_yield != dividend_yield
+                    stock.five_year_avg_dividend_yield = dividend_yield
                     stock.save()
+                    if changed:
+                        publish_stock_update(stock, five_year_avg_dividend_yield=stock.five_year_avg_dividend_yield)
             except Exception as exc:
                 print(f'populate_five_year_avg_dividend_yield Exception: {exc}')
 
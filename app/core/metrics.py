@@ -0,0 +1,34 @@
+"""
+Event counters kept in the default cache.
+
+With a shared cache (memcached) the counters are shared by all workers,
+with the local memory cache every process has its own counters.
+"""
+from django.core.cache import cache
+
+METRICS_PREFIX = 'metrics:'
+# Counters expire when they are not updated for this many seconds
+METRICS_TIMEOUT = 7 * 24 * 60 * 60
+
+
+def increment(name, delta=1):
+    """
+    Add delta to counter name and return the new value
+    """
+    key = METRICS_PREFIX + name
+    if cache.add(key, delta, METRICS_TIMEOUT):
+        return delta
+    try:
+        return cache.incr(key, delta)
+    except ValueError:
+        # The counter expired between add() and incr()
+        cache.set(key, delta, METRICS_TIMEOUT)
+        return delta
+
+
+def get_counts(names):
+    """
+    Return {name: value} for the given counters, missing counters are 0
+    """
+    values = cache.get_many([METRICS_PREFIX + name for name in names])
+    return {name: values.get(METRICS_PREFIX + name, 0) for name in names}
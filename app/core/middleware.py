@@ -0,0 +1,138 @@
+"""
+Negotiated response compression.
+
+CompressionMiddleware extends Django's GZipMiddleware with Brotli, a
+configurable size threshold and a list of compressible content types.
+Brotli needs the brotli package (requirements.txt), without it only gzip is used.
+Streaming responses (e.g. dashboard-export) are compressed piece by piece.
+"""
+import re
+
+from django.conf import settings
+from django.middleware.gzip import GZipMiddleware
+from django.utils.cache import patch_vary_headers
+from django.utils.text import compress_sequence, compress_string
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Responses smaller than this are not compressed
+DEFAULT_MIN_SIZE = 1024
+# Content types worth compressing, Parquet and images are compressed already
+DEFAULT_CONTENT_TYPES = (
+    'text/',
+    'application/json',
+    'application/javascript',
+)
+# Streams that must reach the client without buffering
+EXCLUDED_CONTENT_TYPES = ('text/event-stream',)
+BROTLI_QUALITY = 5
+
+re_accept_encoding = re.compile(r'\s*([\w*-]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?\s*')
+
+
+def compress_brotli(data):
+    return brotli.compress(data, quality=BROTLI_QUALITY)
+
+
+def compress_brotli_sequence(sequence):
+    compressor = brotli.Compressor(quality=BROTLI_QUALITY)
+    for item in sequence:
+        # Flush, so every piece is sent to the client as soon as it is ready
+        data = compressor.process(item) + compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+# Supported encodings in order of preference:
+# encoding -> (compress whole content, compress sequence of pieces)
+ENCODINGS = {
+    'gzip': (compress_string, compress_sequence),
+}
+if brotli is not None:
+    ENCODINGS = {'br': (compress_brotli, compress_brotli_sequence), **ENCODINGS}
+
+
+def parse_accept_encoding(header):
+    """
+    Return {encoding: quality} from an Accept-Encoding header
+    """
+    accepted = {}
+    for part in header.split(','):
+        match = re_accept_encoding.fullmatch(part)
+        if not match:
+            continue
+        try:
+            quality = float(match.group(2)) if match.group(2) else 1.0
+        except ValueError:
+            continue
+        accepted[match.group(1).lower()] = quality
+    return accepted
+
+
+def choose_encoding(header, encodings=None):
+    """
+    Return the preferred encoding accepted by the client or None
+    """
+    accepted = parse_accept_encoding(header)
+    best, best_quality = None, 0
+    for encoding in encodings or ENCODINGS:
+        quality = accepted.get(encoding, accepted.get('*', 0))
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+class CompressionMiddleware(GZipMiddleware):
+    """
+    Compress responses with Brotli or gzip, as accepted by the client.
+    Settings:
+    COMPRESSION_MIN_SIZE - smallest response to compress in bytes
+    COMPRESSION_CONTENT_TYPES - prefixes of compressible content types
+    """
+
+    def __init__(self, get_response=None):
+        super().__init__(get_response)
+        self.min_size = getattr(settings, 'COMPRESSION_MIN_SIZE', DEFAULT_MIN_SIZE)
+        self.content_types = tuple(getattr(settings, 'COMPRESSION_CONTENT_TYPES', DEFAULT_CONTENT_TYPES))
+
+    def is_compressible(self, response):
+        if response.has_header('Content-Encoding'):
+            return False
+        content_type = response.get('Content-Type', '').split(';')[0].strip().lower()
+        if not content_type.startswith(self.content_types) or content_type in EXCLUDED_CONTENT_TYPES:
+            return False
+        return response.streaming or len(response.content) >= self.min_size
+
+    def process_response(self, request, response):
+        if not self.is_compressible(response):
+            return response
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+
+        encoding = choose_encoding(request.META.get('HTTP_ACCEPT_ENCODING', ''))
+        if encoding is None:
+            return response
+        compress, compress_pieces = ENCODINGS[encoding]
+
+        if response.streaming:
+            # The compressed size is not known before the end of the stream
+            response.streaming_content = compress_pieces(response.streaming_content)
+            del response['Content-Length']
+        else:
+            # Return the compressed content only if it is actually shorter
+            compressed_content = compress(response.content)
+            if len(compressed_content) >= len(response.content):
+                return response
+            response.content = compressed_content
+            response['Content-Length'] = str(len(response.content))
+
+        # A compressed response is not byte for byte equal, make a strong ETag weak
+        etag = response.get('ETag')
+        if etag and etag.startswith('"'):
+            response['ETag'] = 'W/' + etag
+        response['Content-Encoding'] = encoding
+        return response
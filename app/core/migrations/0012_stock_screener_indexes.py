@@ -0,0 +1,46 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0011_file'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='file',
+            options={'permissions': [('view_model_file', 'Permission to view data from model File'), ('write_model_file', 'Permission to write data to model File'), ('delete_model_file', 'Permission to delete data from model File')]},
+        ),
+        migrations.AlterField(
+            model_name='file',
+            name='file',
+            field=models.FileField(upload_to='txt-files/'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['fa_score'], name='stock_fa_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['rsi'], name='stock_rsi_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['avg_gain_loss'], name='stock_avg_gain_loss_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['five_year_avg_dividend_yield'], name='stock_dividend_yield_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['sector'], name='stock_sector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='stock',
+            index=models.Index(fields=['country'], name='stock_country_idx'),
+        ),
+    ]
@@ -0,0 +1,66 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:06
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0012_stock_screener_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScreenerRefresh',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('refreshed_at', models.DateTimeField(db_index=True, default=django.utils.timezone.now)),
+                ('stock_count', models.IntegerField(default=0)),
+            ],
+            options={
+                'get_latest_by': 'refreshed_at',
+            },
+        ),
+        migrations.CreateModel(
+            name='ScreenerSnapshot',
+            fields=[
+                ('stock', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='snapshot', serialize=False, to='core.stock')),
+                ('stock_code', models.CharField(default='', max_length=8)),
+                ('sector', models.CharField(blank=True, max_length=255, null=True)),
+                ('industry', models.CharField(blank=True, max_length=255, null=True)),
+                ('country', models.CharField(blank=True, max_length=255, null=True)),
+                ('exchange_short_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('company_name', models.CharField(blank=True, max_length=255, null=True)),
+                ('rsi', models.IntegerField(blank=True, null=True)),
+                ('fa_score', models.IntegerField(blank=True, null=True)),
+                ('avg_gain_loss', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('five_year_avg_dividend_yield', models.DecimalField(decimal_places=2, default=-1, max_digits=4)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='screenersnapshot',
+            index=models.Index(fields=['fa_score'], name='snapshot_fa_score_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screenersnapshot',
+            index=models.Index(fields=['rsi'], name='snapshot_rsi_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screenersnapshot',
+            index=models.Index(fields=['avg_gain_loss'], name='snapshot_avg_gain_loss_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screenersnapshot',
+            index=models.Index(fields=['five_year_avg_dividend_yield'], name='snapshot_dividend_yield_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screenersnapshot',
+            index=models.Index(fields=['sector'], name='snapshot_sector_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='screenersnapshot',
+            index=models.Index(fields=['country'], name='snapshot_country_idx'),
+        ),
+    ]
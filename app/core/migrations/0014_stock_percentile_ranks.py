@@ -0,0 +1,63 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0013_screener_snapshot'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='composite_score',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='avg_gain_loss_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='avg_gain_loss_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='composite_score',
+            field=models.FloatField(blank=True, db_index=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='dividend_yield_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='dividend_yield_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='fa_score_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='fa_score_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='rsi_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='stock',
+            name='rsi_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+    ]
@@ -0,0 +1,52 @@
+from django.db import migrations
+
+# Fields copied from a duplicate to the kept stock when the kept one has no value
+MERGED_FIELDS = (
+    'sector', 'industry', 'country', 'description', 'exchange_short_name', 'company_name',
+    'ipo_years', 'rsi', 'rsi_date', 'fa_score', 'fa_score_date', 'avg_gain_loss',
+)
+
+
+def normalize_stock_codes(apps, schema_editor):
+    """
+    Store every stock_code stripped and upper case and merge stocks
+    that have the same code after that. The stock with the lowest id is kept,
+    empty fields are filled in from the duplicates, then the duplicates are deleted.
+    """
+    Stock = apps.get_model('core', 'Stock')
+
+    kept = {}
+    duplicates = []
+    for stock in Stock.objects.order_by('pk'):
+        code = (stock.stock_code or '').strip().upper()
+        if code not in kept:
+            kept[code] = stock
+            if stock.stock_code != code:
+                stock.stock_code = code
+                stock.save(update_fields=['stock_code'])
+            continue
+
+        keeper = kept[code]
+        changed = [field for field in MERGED_FIELDS
+                   if getattr(keeper, field) is None and getattr(stock, field) is not None]
+        for field in changed:
+            setattr(keeper, field, getattr(stock, field))
+        if keeper.five_year_avg_dividend_yield == -1 and stock.five_year_avg_dividend_yield != -1:
+            keeper.five_year_avg_dividend_yield = stock.five_year_avg_dividend_yield
+            changed.append('five_year_avg_dividend_yield')
+        if changed:
+            keeper.save(update_fields=changed)
+        duplicates.append(stock.pk)
+
+    Stock.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0014_stock_percentile_ranks'),
+    ]
+
+    operations = [
+        migrations.RunPython(normalize_stock_codes, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:12
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0015_normalize_stock_codes'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='stock',
+            name='stock_code',
+            field=models.CharField(default='', max_length=8, unique=True),
+        ),
+    ]
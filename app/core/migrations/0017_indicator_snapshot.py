@@ -0,0 +1,51 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+BRIN_INDEX = 'indicator_snapshot_date_brin'
+
+
+def create_brin_index(apps, schema_editor):
+    """
+    BRIN index on date, PostgreSQL only.
+    Other databases use the unique (stock, date) index.
+    """
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    table = apps.get_model('core', 'IndicatorSnapshot')._meta.db_table
+    schema_editor.execute(f'CREATE INDEX {BRIN_INDEX} ON {table} USING brin (date)')
+
+
+def drop_brin_index(apps, schema_editor):
+    if schema_editor.connection.vendor != 'postgresql':
+        return
+    schema_editor.execute(f'DROP INDEX IF EXISTS {BRIN_INDEX}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0016_stock_code_unique'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='IndicatorSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('rsi', models.IntegerField(blank=True, null=True)),
+                ('fa_score', models.IntegerField(blank=True, null=True)),
+                ('avg_gain_loss', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('five_year_avg_dividend_yield', models.DecimalField(blank=True, decimal_places=2, max_digits=4, null=True)),
+                ('composite_score', models.FloatField(blank=True, null=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='indicator_history', to='core.stock')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='indicatorsnapshot',
+            constraint=models.UniqueConstraint(fields=('stock', 'date'), name='indicator_snapshot_stock_date_uniq'),
+        ),
+        migrations.RunPython(create_brin_index, drop_brin_index),
+    ]
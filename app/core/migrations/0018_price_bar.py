@@ -0,0 +1,31 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:26
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0017_indicator_snapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='PriceBar',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('date', models.DateField()),
+                ('open', models.FloatField(blank=True, null=True)),
+                ('high', models.FloatField(blank=True, null=True)),
+                ('low', models.FloatField(blank=True, null=True)),
+                ('close', models.FloatField(blank=True, null=True)),
+                ('volume', models.BigIntegerField(blank=True, null=True)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='price_bars', to='core.stock')),
+            ],
+        ),
+        migrations.AddConstraint(
+            model_name='pricebar',
+            constraint=models.UniqueConstraint(fields=('stock', 'date'), name='price_bar_stock_date_uniq'),
+        ),
+    ]
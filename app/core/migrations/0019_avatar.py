@@ -0,0 +1,47 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:33
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+import re
+
+
+def link_avatars(apps, schema_editor):
+    """
+    Create the Avatar rows of profiles that use content-hashed renditions already
+    """
+    Avatar = apps.get_model('core', 'Avatar')
+    UserProfile = apps.get_model('core', 'UserProfile')
+    re_name = re.compile(r'^avatars/([0-9a-f]{32})/\d+\.\w+$')
+    for profile in UserProfile.objects.exclude(image='').only('pk', 'image'):
+        match = re_name.match(profile.image.name or '')
+        if not match:
+            continue
+        avatar, _ = Avatar.objects.get_or_create(digest=match.group(1))
+        avatar.ref_count += 1
+        avatar.save(update_fields=['ref_count'])
+        UserProfile.objects.filter(pk=profile.pk).update(avatar=avatar)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0018_price_bar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Avatar',
+            fields=[
+                ('digest', models.CharField(max_length=32, primary_key=True, serialize=False)),
+                ('ref_count', models.PositiveIntegerField(default=0)),
+                ('created_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='userprofile',
+            name='avatar',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='profiles', to='core.avatar'),
+        ),
+        migrations.RunPython(link_avatars, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,43 @@
+# Generated by Django 3.2.25 on 2026-10-19 16:39
+
+from django.db import migrations, models
+import django.db.models.deletion
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0019_avatar'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Universe',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('name', models.CharField(max_length=100, unique=True)),
+                ('source', models.CharField(blank=True, default='', max_length=255)),
+                ('source_version', models.CharField(blank=True, default='', max_length=100)),
+                ('updated_at', models.DateTimeField(default=django.utils.timezone.now)),
+            ],
+        ),
+        migrations.CreateModel(
+            name='UniverseMembership',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('added_at', models.DateTimeField(default=django.utils.timezone.now)),
+                ('stock', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='universe_memberships', to='core.stock')),
+                ('universe', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='memberships', to='core.universe')),
+            ],
+        ),
+        migrations.AddField(
+            model_name='universe',
+            name='stocks',
+            field=models.ManyToManyField(related_name='universes', through='core.UniverseMembership', to='core.Stock'),
+        ),
+        migrations.AddConstraint(
+            model_name='universemembership',
+            constraint=models.UniqueConstraint(fields=('universe', 'stock'), name='universe_membership_uniq'),
+        ),
+    ]
@@ -0,0 +1,26 @@
+# Generated by Django 3.2.25 on 2026-10-19 17:13
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0020_universe'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BrokerMessage',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('channel', models.CharField(max_length=64)),
+                ('message', models.JSONField()),
+                ('created_at', models.DateTimeField(auto_now_add=True, db_index=True)),
+            ],
+        ),
+        migrations.AddIndex(
+            model_name='brokermessage',
+            index=models.Index(fields=['channel', 'id'], name='broker_message_channel_idx'),
+        ),
+    ]
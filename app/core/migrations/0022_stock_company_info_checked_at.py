@@ -0,0 +1,18 @@
+# Generated by Django 3.2.25 on 2026-10-19 17:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0021_broker_message'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='company_info_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
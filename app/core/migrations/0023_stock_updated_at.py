@@ -0,0 +1,20 @@
+# Generated by Django 3.2.25 on 2026-10-19 18:05
+
+from django.db import migrations, models
+import django.utils.timezone
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0022_stock_company_info_checked_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='stock',
+            name='updated_at',
+            field=models.DateTimeField(auto_now=True, default=django.utils.timezone.now),
+            preserve_default=False,
+        ),
+    ]
@@ -0,0 +1,102 @@
+# Generated by Django 3.2.25 on 2026-10-19 17:38
+
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+NEW_FIELDS = (
+    'description', 'ipo_years', 'company_info_checked_at', 'rsi_date', 'fa_score_date',
+    'fa_score_pct', 'fa_score_sector_pct', 'rsi_pct', 'rsi_sector_pct',
+    'avg_gain_loss_pct', 'avg_gain_loss_sector_pct', 'dividend_yield_pct', 'dividend_yield_sector_pct',
+    'updated_at',
+)
+
+
+def copy_new_fields(apps, schema_editor):
+    """
+    Fill the new columns of the current snapshot, the next refresh copies all of them again
+    """
+    Stock = apps.get_model('core', 'Stock')
+    ScreenerSnapshot = apps.get_model('core', 'ScreenerSnapshot')
+    stock = Stock.objects.filter(pk=OuterRef('stock_id'))
+    ScreenerSnapshot.objects.update(**{field: Subquery(stock.values(field)[:1]) for field in NEW_FIELDS})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0023_stock_updated_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='avg_gain_loss_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='avg_gain_loss_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='company_info_checked_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='description',
+            field=models.TextField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='dividend_yield_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='dividend_yield_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='fa_score_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='fa_score_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='fa_score_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='ipo_years',
+            field=models.IntegerField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='rsi_date',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='rsi_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='rsi_sector_pct',
+            field=models.FloatField(blank=True, null=True),
+        ),
+        migrations.AddField(
+            model_name='screenersnapshot',
+            name='updated_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(copy_new_fields, migrations.RunPython.noop),
+    ]
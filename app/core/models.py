@@ -1,6 +1,6 @@
 from django.contrib.auth.models import User
 from django.db import models
-from django.db.models.signals import post_save
+from django.db.models.signals import post_save, post_delete
 from django.dispatch import receiver
 from django.core.exceptions import ValidationError
 from django.utils import timezone
@@ -10,8 +10,9 @@ import os
 class Stock(models.Model):
     """
     Model to collect data about given entity(stock)
+    stock_code is unique and always saved stripped and upper case.
     """
-    stock_code = models.CharField(max_length=8, default='')
+    stock_code = models.CharField(max_length=8, default='', unique=True)
     sector = models.CharField(max_length=255, null=True, blank=True)
     industry = models.CharField(max_length=255, null=True, blank=True)
     country = models.CharField(max_length=255, null=True, blank=True)
@@ -19,6 +20,9 @@ class Stock(models.Model):
     exchange_short_name = models.CharField(max_length=255, null=True, blank=True)
     company_name = models.CharField(max_length=255, null=True, blank=True)
     ipo_years = models.IntegerField(null=True, blank=True)
+    # Last request for the company info, stocks without a profile are retried after
+    # COMPANY_INFO_RETRY of populate_model_stock
+    company_info_checked_at = models.DateTimeField(null=True, blank=True)
     rsi = models.IntegerField(null=True, blank=True)
     rsi_date = models.DateTimeField(null=True, blank=True)
     fa_score = models.IntegerField(null=True, blank=True)
@@ -26,10 +30,227 @@ class Stock(models.Model):
     avg_gain_loss = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
     five_year_avg_dividend_yield = models.DecimalField(max_digits=4, decimal_places=2, default=-1)
 
+    # Percentile ranks (0-100, higher is better) among all stocks and within the sector.
+    # Calculated once per populate_model_stock run, see core.ranking
+    fa_score_pct = models.FloatField(null=True, blank=True)
+    fa_score_sector_pct = models.FloatField(null=True, blank=True)
+    rsi_pct = models.FloatField(null=True, blank=True)
+    rsi_sector_pct = models.FloatField(null=True, blank=True)
+    avg_gain_loss_pct = models.FloatField(null=True, blank=True)
+    avg_gain_loss_sector_pct = models.FloatField(null=True, blank=True)
+    dividend_yield_pct = models.FloatField(null=True, blank=True)
+    dividend_yield_sector_pct = models.FloatField(null=True, blank=True)
+    # Weighted average of the percentile ranks above
+    composite_score = models.FloatField(null=True, blank=True, db_index=True)
+    # Last save, e.g. an admin edit or new company info, see pages.conditional.
+    # bulk_update and update() do not set it, set it along with the changed fields.
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        # Indexes for the screener filters used by page dashboard and dashboard-api
+        indexes = [
+            models.Index(fields=['fa_score'], name='stock_fa_score_idx'),
+            models.Index(fields=['rsi'], name='stock_rsi_idx'),
+            models.Index(fields=['avg_gain_loss'], name='stock_avg_gain_loss_idx'),
+            models.Index(fields=['five_year_avg_dividend_yield'], name='stock_dividend_yield_idx'),
+            models.Index(fields=['sector'], name='stock_sector_idx'),
+            models.Index(fields=['country'], name='stock_country_idx'),
+        ]
+
+    def __str__(self):
+        return self.stock_code
+
+    @staticmethod
+    def normalize_code(stock_code):
+        """
+        Tickers are stored stripped and upper case, 'aapl ' -> 'AAPL'
+        """
+        return (stock_code or '').strip().upper()
+
+    def save(self, *args, **kwargs):
+        self.stock_code = self.normalize_code(self.stock_code)
+        super().save(*args, **kwargs)
+
+
+class ScreenerSnapshot(models.Model):
+    """
+    Copy of all columns of model Stock, see core.snapshot.SNAPSHOT_FIELDS.
+    It is rebuilt in one transaction at the end of every populate_model_stock run,
+    so page dashboard and dashboard-api never read half updated data and
+    do not compete for row locks with the running update.
+    """
+    stock = models.OneToOneField(Stock, primary_key=True, related_name='snapshot',
+                                 on_delete=models.CASCADE)
+    stock_code = models.CharField(max_length=8, default='')
+    sector = models.CharField(max_length=255, null=True, blank=True)
+    industry = models.CharField(max_length=255, null=True, blank=True)
+    country = models.CharField(max_length=255, null=True, blank=True)
+    exchange_short_name = models.CharField(max_length=255, null=True, blank=True)
+    company_name = models.CharField(max_length=255, null=True, blank=True)
+    rsi = models.IntegerField(null=True, blank=True)
+    fa_score = models.IntegerField(null=True, blank=True)
+    avg_gain_loss = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    five_year_avg_dividend_yield = models.DecimalField(max_digits=4, decimal_places=2, default=-1)
+    composite_score = models.FloatField(null=True, blank=True, db_index=True)
+    # Columns that only the stock APIs return, copied so that a response
+    # never mixes the snapshot with a running update
+    description = models.TextField(null=True, blank=True)
+    ipo_years = models.IntegerField(null=True, blank=True)
+    company_info_checked_at = models.DateTimeField(null=True, blank=True)
+    rsi_date = models.DateTimeField(null=True, blank=True)
+    fa_score_date = models.DateTimeField(null=True, blank=True)
+    fa_score_pct = models.FloatField(null=True, blank=True)
+    fa_score_sector_pct = models.FloatField(null=True, blank=True)
+    rsi_pct = models.FloatField(null=True, blank=True)
+    rsi_sector_pct = models.FloatField(null=True, blank=True)
+    avg_gain_loss_pct = models.FloatField(null=True, blank=True)
+    avg_gain_loss_sector_pct = models.FloatField(null=True, blank=True)
+    dividend_yield_pct = models.FloatField(null=True, blank=True)
+    dividend_yield_sector_pct = models.FloatField(null=True, blank=True)
+    updated_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['fa_score'], name='snapshot_fa_score_idx'),
+            models.Index(fields=['rsi'], name='snapshot_rsi_idx'),
+            models.Index(fields=['avg_gain_loss'], name='snapshot_avg_gain_loss_idx'),
+            models.Index(fields=['five_year_avg_dividend_yield'], name='snapshot_dividend_yield_idx'),
+            models.Index(fields=['sector'], name='snapshot_sector_idx'),
+            models.Index(fields=['country'], name='snapshot_country_idx'),
+        ]
+
     def __str__(self):
         return self.stock_code
 
 
+class ScreenerRefresh(models.Model):
+    """
+    One record for every rebuild of ScreenerSnapshot.
+    The latest record tells when the screener data last changed.
+    """
+    refreshed_at = models.DateTimeField(default=timezone.now, db_index=True)
+    stock_count = models.IntegerField(default=0)
+
+    class Meta:
+        get_latest_by = 'refreshed_at'
+
+    def __str__(self):
+        return f'{self.refreshed_at:%Y-%m-%d %H:%M} ({self.stock_count} stocks)'
+
+
+class IndicatorSnapshot(models.Model):
+    """
+    Indicator values of a stock on one day, appended at the end of every
+    populate_model_stock run, see core.history.
+    Model Stock keeps only the latest values, this table keeps the history.
+    On PostgreSQL the date column also has a BRIN index (migration 0017),
+    which stays small on an append-only table ordered by date.
+    """
+    stock = models.ForeignKey(Stock, related_name='indicator_history', on_delete=models.CASCADE)
+    date = models.DateField()
+    rsi = models.IntegerField(null=True, blank=True)
+    fa_score = models.IntegerField(null=True, blank=True)
+    avg_gain_loss = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    five_year_avg_dividend_yield = models.DecimalField(max_digits=4, decimal_places=2, null=True, blank=True)
+    composite_score = models.FloatField(null=True, blank=True)
+
+    class Meta:
+        # One record per stock and day, its index serves the history of one stock
+        constraints = [
+            models.UniqueConstraint(fields=['stock', 'date'], name='indicator_snapshot_stock_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.stock_id} {self.date}'
+
+
+class PriceBar(models.Model):
+    """
+    Daily prices of a stock, saved from the price history that
+    populate_model_stock downloads for avg_gain_loss, see core.charts
+    """
+    stock = models.ForeignKey(Stock, related_name='price_bars', on_delete=models.CASCADE)
+    date = models.DateField()
+    open = models.FloatField(null=True, blank=True)
+    high = models.FloatField(null=True, blank=True)
+    low = models.FloatField(null=True, blank=True)
+    close = models.FloatField(null=True, blank=True)
+    volume = models.BigIntegerField(null=True, blank=True)
+
+    class Meta:
+        # One bar per stock and day, its index serves the chart of one stock
+        constraints = [
+            models.UniqueConstraint(fields=['stock', 'date'], name='price_bar_stock_date_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.stock_id} {self.date}'
+
+
+class BrokerMessage(models.Model):
+    """
+    Message published through DatabaseBroker, see core.pubsub.
+    Subscribers in any process read the messages with a larger id than
+    the last one they have seen. Old messages are deleted by prune().
+    """
+    channel = models.CharField(max_length=64)
+    message = models.JSONField()
+    created_at = models.DateTimeField(auto_now_add=True, db_index=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['channel', 'id'], name='broker_message_channel_idx'),
+        ]
+
+    def __str__(self):
+        return f'{self.channel} {self.pk}'
+
+
+class Universe(models.Model):
+    """
+    A named list of tickers, see core.universe.
+    Fed by uploaded File records and by all_stock_codes.txt,
+    populate_model_stock reads the members instead of parsing the files.
+    source_version tells whether source changed since the last load.
+    """
+    name = models.CharField(max_length=100, unique=True)
+    source = models.CharField(max_length=255, blank=True, default='')
+    source_version = models.CharField(max_length=100, blank=True, default='')
+    updated_at = models.DateTimeField(default=timezone.now)
+    stocks = models.ManyToManyField(Stock, through='UniverseMembership', related_name='universes')
+
+    def __str__(self):
+        return self.name
+
+
+class UniverseMembership(models.Model):
+    universe = models.ForeignKey(Universe, related_name='memberships', on_delete=models.CASCADE)
+    stock = models.ForeignKey(Stock, related_name='universe_memberships', on_delete=models.CASCADE)
+    added_at = models.DateTimeField(default=timezone.now)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=['universe', 'stock'], name='universe_membership_uniq'),
+        ]
+
+    def __str__(self):
+        return f'{self.universe_id} {self.stock_id}'
+
+
+class Avatar(models.Model):
+    """
+    Avatar renditions stored once per content hash, see core.images.
+    ref_count is the number of profiles that use it, the files are
+    deleted when it drops to 0.
+    """
+    digest = models.CharField(max_length=32, primary_key=True)
+    ref_count = models.PositiveIntegerField(default=0)
+    created_at = models.DateTimeField(default=timezone.now)
+
+    def __str__(self):
+        return f'{self.digest} ({self.ref_count})'
+
+
 class UserProfile(models.Model):
     """
     UserProfile is an extension of User model that is connected to User OneByOne
@@ -45,10 +266,39 @@ class UserProfile(models.Model):
     birth_date = models.DateField(null=True, blank=True)
     location = models.CharField(max_length=100, blank=True, null=True)
     image = models.ImageField(upload_to='uploads/user_images', blank=True)
+    # Set for images uploaded as content-hashed renditions
+    avatar = models.ForeignKey(Avatar, null=True, blank=True, related_name='profiles',
+                               on_delete=models.SET_NULL)
 
     def __str__(self):
         return self.user.username
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        # Values as loaded, see has_changed()
+        instance._loaded_values = dict(zip(field_names, values))
+        return instance
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        self._loaded_values = self._current_values()
+
+    def _current_values(self):
+        deferred = self.get_deferred_fields()
+        return {field.attname: field.get_prep_value(field.value_from_object(self))
+                for field in self._meta.concrete_fields if field.attname not in deferred}
+
+    def has_changed(self):
+        """
+        True when a field differs from the database, or the profile was not loaded from it
+        """
+        loaded = getattr(self, '_loaded_values', None)
+        if loaded is None:
+            return True
+        current = self._current_values()
+        return any(current[name] != value for name, value in loaded.items() if name in current)
+
     @receiver(post_save, sender=User)
     def create_user_profile(sender, instance, created, **kwargs):
         """
@@ -59,10 +309,36 @@ class UserProfile(models.Model):
             UserProfile.objects.get_or_create(user=instance)
 
     @receiver(post_save, sender=User)
-    def save_user_profile(sender, instance, **kwargs):
+    def save_user_profile(sender, instance, update_fields=None, **kwargs):
         # sender is the User model
-        # instance is the actual User object that was just created
-        instance.profile.save()
+        # instance is the actual User object that was just saved.
+        # Its profile is saved only when it was loaded and changed,
+        # e.g. not for the last_login update of every login.
+        if update_fields is not None:
+            return
+        profile = instance._state.fields_cache.get('profile')
+        if profile is not None and profile.has_changed():
+            profile.save()
+
+    @receiver(post_save, sender='core.UserProfile')
+    def apply_profile_avatar(sender, instance, **kwargs):
+        """
+        A new image of the profile is counted and stored when the save is committed
+        """
+        if getattr(instance, '_avatar_change', None) is not None:
+            # core.images imports this module
+            from .images import apply_avatar_change
+            apply_avatar_change(instance)
+
+    @receiver(post_delete, sender='core.UserProfile')
+    def release_profile_avatar(sender, instance, **kwargs):
+        """
+        The avatar of a deleted profile has one user less
+        """
+        if instance.avatar_id:
+            # core.images imports this module
+            from .images import release_avatar
+            release_avatar(instance.avatar_id)
 
 
 def is_staff_check(user):
@@ -77,24 +353,24 @@ class File(models.Model):
     file = models.FileField(upload_to='txt-files/')
 
     def save(self, *args, **kwargs):
-        if self.file.name.endswith('.txt'):
-            timestamp = timezone.now().strftime('%Y_%m_%d')
-            original_name, extension = os.path.splitext(self.file.name)
-            new_filename = f"{original_name}_{timestamp}.txt"
-            self.file.name = new_filename
-            super().save(*args, **kwargs)
-
-            with self.file.open('r') as f:
-                lines = f.readlines()
-                for line in lines:
-                    stock_code = line.strip()
-                    if 2 < len(stock_code) < 5 and not Stock.objects.filter(stock_code=stock_code).exists():
-                        Stock.objects.create(stock_code=stock_code)
-        else:
+        if not self.file.name.endswith('.txt'):
             raise ValidationError("Only .txt files are allowed.")
 
+        # A new upload, not a save of an existing record
+        is_upload = not self.file._committed
+        if is_upload:
+            timestamp = timezone.now().strftime('%Y_%m_%d')
+            original_name, extension = os.path.splitext(self.file.name)
+            self.file.name = f"{original_name}_{timestamp}.txt"
         super().save(*args, **kwargs)
 
+        if is_upload:
+            # core.importers imports this module
+            from .importers import import_stock_file
+            from .universe import universe_name
+            # The list replaces the universe of the same file name
+            self.import_summary = import_stock_file(self.file, universe=universe_name(self.file.name))
+
     class Meta:
         permissions = [
             ("view_model_file", "Permission to view data from model File"),
@@ -0,0 +1,278 @@
+"""
+Publish / subscribe of stock indicator updates.
+
+populate_model_stock publishes a delta every time it writes a new indicator
+value to model Stock and the stock-stream endpoint sends them to clients.
+populate_model_stock runs in its own process (cron), so the broker has to
+reach the web workers. PUBSUB_BROKER selects it:
+database - default, messages are stored in model BrokerMessage and every
+           subscriber polls for new ones, works wherever the database does
+redis - Redis PUBLISH / SUBSCRIBE at PUBSUB_REDIS_URL (needs the redis package)
+local - in process memory, only for tests and a single process that
+        publishes and serves the streams itself
+"""
+import collections
+import datetime
+import json
+import queue
+import threading
+import time
+
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BrokerMessage
+
+try:
+    import redis
+except ImportError:
+    redis = None
+
+# Channel of per ticker indicator deltas
+INDICATORS_CHANNEL = 'indicators'
+# Messages kept for a slow subscriber before new ones are dropped
+SUBSCRIBER_QUEUE_SIZE = 1000
+# Seconds between two reads of DatabaseSubscription. Every open stream runs
+# one query per poll and holds its worker thread while it waits, for up to
+# STREAM_MAX_SECONDS of pages.views: 100 open streams are 100 queries per second.
+DATABASE_POLL_SECONDS = 1
+# Messages read by DatabaseSubscription at once
+DATABASE_READ_SIZE = 500
+# Skipped ids below the last read one are read again this long, a message
+# whose transaction got its id first may commit after a higher id
+DATABASE_GAP_SECONDS = 60
+# Age after which DatabaseBroker.prune() deletes messages
+DATABASE_RETENTION = datetime.timedelta(hours=1)
+
+
+class LocalSubscription:
+    """
+    Messages of one channel for one subscriber
+    """
+
+    def __init__(self, broker, channel):
+        self.broker = broker
+        self.channel = channel
+        self.queue = queue.Queue(maxsize=SUBSCRIBER_QUEUE_SIZE)
+
+    def get(self, timeout=None):
+        """
+        Return the next message, or None when there is none within timeout seconds
+        """
+        try:
+            return self.queue.get(timeout=timeout)
+        except queue.Empty:
+            return None
+
+    def close(self):
+        self.broker.unsubscribe(self)
+
+
+class LocalBroker:
+    """
+    In process broker, used in tests and with a single server process
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._subscriptions = {}
+
+    def publish(self, channel, message):
+        with self._lock:
+            subscriptions = list(self._subscriptions.get(channel, ()))
+        for subscription in subscriptions:
+            try:
+                subscription.queue.put_nowait(message)
+            except queue.Full:
+                # Do not block the publisher because of a slow client
+                pass
+        return len(subscriptions)
+
+    def subscribe(self, channel):
+        subscription = LocalSubscription(self, channel)
+        with self._lock:
+            self._subscriptions.setdefault(channel, set()).add(subscription)
+        return subscription
+
+    def unsubscribe(self, subscription):
+        with self._lock:
+            self._subscriptions.get(subscription.channel, set()).discard(subscription)
+
+
+class DatabaseSubscription:
+    """
+    Messages of one channel stored in model BrokerMessage, read by polling.
+    Messages are read in id order. Publishers commit concurrently, so an id
+    can become visible after a higher one: the ids skipped by a read are
+    kept as gaps and asked for again for DATABASE_GAP_SECONDS.
+    """
+
+    def __init__(self, channel, poll_seconds=DATABASE_POLL_SECONDS):
+        self.messages = BrokerMessage.objects.filter(channel=channel)
+        self.channel = channel
+        self.poll_seconds = poll_seconds
+        self.pending = collections.deque()
+        # Skipped id -> time.monotonic() when it was skipped
+        self.gaps = {}
+        # Only messages published after subscribing
+        latest = self.messages.order_by('-id').values_list('id', flat=True).first()
+        self.last_id = latest or 0
+
+    def get(self, timeout=None):
+        """
+        Return the next message, or None when there is none within timeout seconds
+        """
+        deadline = time.monotonic() + (timeout or 0)
+        while not self.pending:
+            if self._read():
+                break
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            time.sleep(min(self.poll_seconds, remaining))
+        return self.pending.popleft()
+
+    def _read(self):
+        now = time.monotonic()
+        self.gaps = {gap: since for gap, since in self.gaps.items() if now - since < DATABASE_GAP_SECONDS}
+        condition = Q(id__gt=self.last_id)
+        if self.gaps:
+            condition |= Q(id__in=list(self.gaps))
+        rows = list(self.messages.filter(condition).order_by('id')
+                    .values_list('id', 'message')[:DATABASE_READ_SIZE])
+        for message_id, message in rows:
+            if message_id > self.last_id:
+                # Ids of other channels are gaps as well, they expire
+                skipped = range(self.last_id + 1, message_id)
+                if len(self.gaps) + len(skipped) <= DATABASE_READ_SIZE:
+                    self.gaps.update(dict.fromkeys(skipped, now))
+                self.last_id = message_id
+            else:
+                del self.gaps[message_id]
+            self.pending.append(message)
+        return bool(rows)
+
+    def close(self):
+        self.pending.clear()
+
+
+class DatabaseBroker:
+    """
+    Broker shared by all processes through model BrokerMessage
+    """
+
+    def publish(self, channel, message):
+        """
+        Store the message for all subscribers, returns 1
+        """
+        BrokerMessage.objects.create(channel=channel, message=message)
+        return 1
+
+    def subscribe(self, channel):
+        return DatabaseSubscription(channel)
+
+    def prune(self, max_age=DATABASE_RETENTION):
+        """
+        Delete messages older than max_age, returns their number
+        """
+        deleted, _ = BrokerMessage.objects.filter(created_at__lt=timezone.now() - max_age).delete()
+        return deleted
+
+
+class RedisSubscription:
+    """
+    Messages of one Redis channel for one subscriber
+    """
+
+    def __init__(self, pubsub, channel):
+        self.pubsub = pubsub
+        self.channel = channel
+
+    def get(self, timeout=None):
+        message = self.pubsub.get_message(ignore_subscribe_messages=True, timeout=timeout or 0)
+        if message is None:
+            return None
+        return json.loads(message['data'])
+
+    def close(self):
+        self.pubsub.close()
+
+
+class RedisBroker:
+    """
+    Broker shared by all processes through Redis PUBLISH / SUBSCRIBE
+    """
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def publish(self, channel, message):
+        return self.client.publish(channel, json.dumps(message))
+
+    def subscribe(self, channel):
+        pubsub = self.client.pubsub()
+        pubsub.subscribe(channel)
+        return RedisSubscription(pubsub, channel)
+
+
+_broker = None
+_broker_lock = threading.Lock()
+
+
+def get_broker():
+    """
+    Return the broker of this process selected by PUBSUB_BROKER
+    """
+    global _broker
+    with _broker_lock:
+        if _broker is None:
+            _broker = _create_broker(getattr(settings, 'PUBSUB_BROKER', 'database'))
+        return _broker
+
+
+def _create_broker(name):
+    if name == 'database':
+        return DatabaseBroker()
+    if name == 'local':
+        return LocalBroker()
+    if name == 'redis':
+        url = getattr(settings, 'PUBSUB_REDIS_URL', '')
+        if not url:
+            raise ImproperlyConfigured('PUBSUB_BROKER is redis, but PUBSUB_REDIS_URL is not set.')
+        if redis is None:
+            raise ImproperlyConfigured('PUBSUB_BROKER is redis, but the redis package is not installed.')
+        return RedisBroker(url)
+    raise ImproperlyConfigured(f'Unknown PUBSUB_BROKER: {name}')
+
+
+def prune_messages():
+    """
+    Delete old messages of DatabaseBroker, other brokers keep none
+    """
+    broker = get_broker()
+    return broker.prune() if isinstance(broker, DatabaseBroker) else 0
+
+
+def publish_stock_update(stock, **changes):
+    """
+    Publish the changed indicator values of a stock.
+    Nothing is published when there are no changes.
+    """
+    if not changes:
+        return 0
+    message = {
+        'id': stock.pk,
+        'stock_code': stock.stock_code,
+        'updated_at': timezone.now().isoformat(),
+        'changes': {field: _to_json(value) for field, value in changes.items()},
+    }
+    return get_broker().publish(INDICATORS_CHANNEL, message)
+
+
+def _to_json(value):
+    if value is None or isinstance(value, (int, float, str)):
+        return value
+    # Decimal
+    return str(value)
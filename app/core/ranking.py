@@ -0,0 +1,86 @@
+"""
+Cross-sectional percentile ranks and composite score for model Stock.
+Calculated once per populate_model_stock run over the whole universe with pandas.
+"""
+from django.conf import settings
+import pandas as pd
+
+from .models import Stock
+
+# Ranked indicators: name -> (model field, higher value is better)
+# Low RSI is better, the same as the "maximum RSI" filter of page dashboard.
+RANKED_INDICATORS = {
+    'fa_score': ('fa_score', True),
+    'rsi': ('rsi', False),
+    'avg_gain_loss': ('avg_gain_loss', True),
+    'dividend_yield': ('five_year_avg_dividend_yield', True),
+}
+
+# Weights of the global percentile ranks in the composite score.
+# Can be overridden with settings.SCREENER_COMPOSITE_WEIGHTS
+DEFAULT_COMPOSITE_WEIGHTS = {
+    'fa_score': 0.4,
+    'rsi': 0.2,
+    'avg_gain_loss': 0.2,
+    'dividend_yield': 0.2,
+}
+
+RANK_FIELDS = tuple(
+    f'{name}{suffix}' for name in RANKED_INDICATORS for suffix in ('_pct', '_sector_pct')
+) + ('composite_score',)
+
+
+def calculate_ranks(frame, weights=None):
+    """
+    Add percentile rank columns and composite_score to a DataFrame
+    with the indicator columns and 'sector'.
+    Missing indicators are left out of the ranks and the composite score
+    is the weighted average of the indicators that are present.
+    """
+    weights = weights or getattr(settings, 'SCREENER_COMPOSITE_WEIGHTS', DEFAULT_COMPOSITE_WEIGHTS)
+    frame = frame.copy()
+    weighted_sum = pd.Series(0.0, index=frame.index)
+    weight_total = pd.Series(0.0, index=frame.index)
+
+    for name, (field, higher_is_better) in RANKED_INDICATORS.items():
+        values = pd.to_numeric(frame[field], errors='coerce').astype(float)
+        if field == 'five_year_avg_dividend_yield':
+            # -1 is the default for "no dividend data"
+            values = values.where(values >= 0)
+
+        frame[f'{name}_pct'] = values.rank(pct=True, ascending=higher_is_better) * 100
+        frame[f'{name}_sector_pct'] = values.groupby(frame['sector'].fillna('')).rank(
+            pct=True, ascending=higher_is_better) * 100
+
+        weight = weights.get(name, 0)
+        present = frame[f'{name}_pct'].notna()
+        weighted_sum += frame[f'{name}_pct'].fillna(0) * weight
+        weight_total += present * weight
+
+    frame['composite_score'] = (weighted_sum / weight_total.where(weight_total > 0)).round(2)
+    return frame
+
+
+def update_ranks(batch_size=1000):
+    """
+    Recalculate percentile ranks and composite score of every stock
+    and save them with bulk_update. Returns the number of stocks.
+    """
+    fields = ['id', 'sector'] + [field for field, _ in RANKED_INDICATORS.values()]
+    frame = pd.DataFrame.from_records(Stock.objects.values_list(*fields), columns=fields)
+    if frame.empty:
+        return 0
+
+    frame = calculate_ranks(frame)
+    # NaN can not be saved, use None for stocks without data
+    frame = frame.astype(object).where(frame.notna(), None)
+
+    stocks = []
+    for row in frame[['id', *RANK_FIELDS]].itertuples(index=False):
+        stock = Stock(pk=row[0])
+        for field, value in zip(RANK_FIELDS, row[1:]):
+            setattr(stock, field, value)
+        stocks.append(stock)
+
+    Stock.objects.bulk_update(stocks, RANK_FIELDS, batch_size=batch_size)
+    return len(stocks)
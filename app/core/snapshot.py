@@ -0,0 +1,51 @@
+"""
+Screener snapshot: a copy of model Stock that is rebuilt once at the end
+of every populate_model_stock run.
+"""
+from django.db import connection, transaction
+
+from .models import Stock, ScreenerSnapshot, ScreenerRefresh
+
+# Columns copied from model Stock to ScreenerSnapshot, all of them:
+# the stock APIs read whole rows from the snapshot
+SNAPSHOT_FIELDS = tuple(field.name for field in Stock._meta.concrete_fields if not field.primary_key)
+
+
+def refresh_screener_snapshot():
+    """
+    Rebuild ScreenerSnapshot from model Stock.
+    Delete and copy run in one transaction, readers keep seeing the previous
+    snapshot until it is committed. The copy is a single INSERT ... SELECT,
+    rows are not loaded into Python.
+    """
+    quote = connection.ops.quote_name
+    columns = ', '.join(quote(Stock._meta.get_field(field).column) for field in SNAPSHOT_FIELDS)
+    sql = f"INSERT INTO {quote(ScreenerSnapshot._meta.db_table)} " \
+          f"({quote(ScreenerSnapshot._meta.get_field('stock').column)}, {columns}) " \
+          f"SELECT {quote(Stock._meta.pk.column)}, {columns} FROM {quote(Stock._meta.db_table)}"
+
+    with transaction.atomic():
+        ScreenerSnapshot.objects.all().delete()
+        with connection.cursor() as cursor:
+            cursor.execute(sql)
+            stock_count = cursor.rowcount
+        refresh = ScreenerRefresh.objects.create(stock_count=stock_count)
+
+    return refresh
+
+
+def get_latest_refresh():
+    """
+    Return the latest ScreenerRefresh or None if the snapshot was never built
+    """
+    return ScreenerRefresh.objects.order_by('-refreshed_at').first()
+
+
+def screener_queryset():
+    """
+    Queryset that page dashboard and dashboard-api search in.
+    Until the first refresh the live model Stock is used.
+    """
+    if not ScreenerRefresh.objects.exists():
+        return Stock.objects.all()
+    return ScreenerSnapshot.objects.all()
@@ -0,0 +1,70 @@
+"""
+Template tags for avatar renditions, see core.images.
+
+{% load avatars %}
+{% avatar user_profile 45 css_class="rounded-circle" alt="Profile image" %}
+renders a <picture> with WebP and JPEG sources for 1x and 2x screens,
+using the smallest rendition that is at least as large as needed.
+"""
+from django import template
+from django.utils.html import format_html
+from django.utils.safestring import mark_safe
+
+from core.images import AVATAR_SIZES, AVATAR_FORMATS, get_digest, rendition_name
+
+register = template.Library()
+
+
+def pick_size(size):
+    """
+    Smallest rendition size of at least size pixels
+    """
+    for available in AVATAR_SIZES:
+        if available >= size:
+            return available
+    return AVATAR_SIZES[-1]
+
+
+def _url(image, digest, size, extension):
+    return image.storage.url(rendition_name(digest, pick_size(size), extension))
+
+
+def _srcset(image, digest, size, extension):
+    return f'{_url(image, digest, size, extension)} 1x, {_url(image, digest, size * 2, extension)} 2x'
+
+
+@register.simple_tag
+def avatar_url(profile, size):
+    """
+    URL of the JPEG rendition for size pixels
+    """
+    image = profile.image
+    if not image:
+        return ''
+    digest = get_digest(image.name)
+    return _url(image, digest, size, 'jpg') if digest else image.url
+
+
+@register.simple_tag
+def avatar(profile, size, css_class='', alt=''):
+    """
+    <picture> of the avatar displayed at size x size pixels
+    """
+    image = profile.image
+    if not image:
+        return ''
+
+    digest = get_digest(image.name)
+    if digest is None:
+        # Uploaded before renditions existed
+        return format_html('<img src="{}" alt="{}" class="{}" width="{}" height="{}">',
+                           image.url, alt, css_class, size, size)
+
+    sources = [
+        format_html('<source type="image/{}" srcset="{}">', extension, _srcset(image, digest, size, extension))
+        for extension in AVATAR_FORMATS if extension != 'jpg'
+    ]
+    img = format_html('<img src="{}" srcset="{}" alt="{}" class="{}" width="{}" height="{}">',
+                      _url(image, digest, size, 'jpg'), _srcset(image, digest, size, 'jpg'),
+                      alt, css_class, size, size)
+    return format_html('<picture>{}{}</picture>', mark_safe(''.join(sources)), img)
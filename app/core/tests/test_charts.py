@@ -0,0 +1,91 @@
+from django.test import TestCase, SimpleTestCase
+from django.core.cache import cache
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+from core.models import Stock, PriceBar
+from core.charts import lttb, store_price_bars, get_chart
+from datetime import timedelta
+
+
+class LttbTests(SimpleTestCase):
+    """
+    Test Largest-Triangle-Three-Buckets downsampling
+    """
+
+    def test_short_series_unchanged(self):
+        points = [(0, 1), (1, 2)]
+        self.assertEqual(lttb(points, 10), points)
+
+    def test_keeps_ends_and_peaks(self):
+        points = [(x, 0) for x in range(100)]
+        points[50] = (50, 100)
+
+        result = lttb(points, 10)
+
+        self.assertEqual(len(result), 10)
+        self.assertEqual((result[0], result[-1]), (points[0], points[-1]))
+        self.assertIn((50, 100), result)
+
+
+class PriceChartTests(TestCase):
+    """
+    Test saving price bars and the chart endpoint
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.stock = Stock.objects.create(stock_code='ABC')
+        today = timezone.now().date()
+        self.prices = [
+            {'formatted_date': (today - timedelta(days=day)).isoformat(),
+             'open': 10, 'high': 12, 'low': 9, 'close': 10 + day % 7, 'volume': 1000}
+            for day in range(400)
+        ]
+
+    def test_store_price_bars(self):
+        """
+        Days that are already stored are saved once
+        """
+        store_price_bars(self.stock, self.prices[:10])
+        store_price_bars(self.stock, self.prices)
+        store_price_bars(self.stock, [{'formatted_date': '2020-01-01', 'close': None}])
+
+        self.assertEqual(PriceBar.objects.filter(stock=self.stock).count(), 400)
+
+    def test_revised_prices_replace_stored_bars(self):
+        """
+        Adjusted closes (splits, dividends) overwrite the stored bars of their days
+        """
+        store_price_bars(self.stock, self.prices)
+        revised = [{**price, 'close': price['close'] / 2} for price in self.prices[:5]]
+        store_price_bars(self.stock, revised)
+
+        bar = PriceBar.objects.get(stock=self.stock, date=self.prices[0]['formatted_date'])
+        self.assertEqual(bar.close, self.prices[0]['close'] / 2)
+        self.assertEqual(PriceBar.objects.filter(stock=self.stock).count(), 400)
+
+    def test_chart_cached_until_new_bars(self):
+        store_price_bars(self.stock, self.prices[1:])
+        first = get_chart(self.stock, '1m', 20)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_chart(self.stock, '1m', 20), first)
+
+        store_price_bars(self.stock, self.prices[:1])
+        self.assertNotEqual(get_chart(self.stock, '1m', 20)[-1], first[-1])
+
+    def test_chart_endpoint(self):
+        store_price_bars(self.stock, self.prices)
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='chart@example.com'))
+
+        response = client.get(reverse('stock-chart', args=[self.stock.pk]), {'range': '1y', 'width': 50})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['points']), 50)
+        self.assertEqual(response.data['points'][-1]['date'], self.prices[0]['formatted_date'])
+
+        response = client.get(reverse('stock-chart', args=[self.stock.pk]), {'range': '2w'})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,74 @@
+from django.test import TestCase, SimpleTestCase, TransactionTestCase, override_settings
+from django.core.management import call_command
+from django.db import connection
+from core.db import check_connections, run_in_threads
+from core.models import Stock
+from unittest import mock
+from io import StringIO
+import threading
+
+
+class CheckConnectionsTests(SimpleTestCase):
+    """
+    Test the health check of persistent connections
+    """
+
+    def test_broken_connection_closed(self):
+        fake = mock.Mock(connection=object(), in_atomic_block=False)
+        fake.is_usable.return_value = False
+
+        with mock.patch('core.db.connections') as connections, override_settings(DB_CONN_HEALTH_CHECKS=True):
+            connections.all.return_value = [fake]
+            check_connections()
+
+        fake.close.assert_called_once()
+
+    def test_disabled(self):
+        fake = mock.Mock(connection=object(), in_atomic_block=False)
+
+        with mock.patch('core.db.connections') as connections, override_settings(DB_CONN_HEALTH_CHECKS=False):
+            connections.all.return_value = [fake]
+            check_connections()
+
+        fake.is_usable.assert_not_called()
+
+
+class RunInThreadsTests(SimpleTestCase):
+
+    def test_all_items_on_workers(self):
+        seen = []
+        names = set()
+
+        def work(item):
+            if item == 3:
+                raise ValueError('bad item')
+            seen.append(item)
+            names.add(threading.current_thread().name)
+
+        with mock.patch('core.db.connections') as connections:
+            errors = run_in_threads(work, range(10), workers=3)
+
+        self.assertEqual(sorted(seen), [0, 1, 2, 4, 5, 6, 7, 8, 9])
+        self.assertEqual([item for item, _ in errors], [3])
+        self.assertTrue(names <= {'db-worker-0', 'db-worker-1', 'db-worker-2'})
+        # Every worker closes its connection when done
+        self.assertEqual(connections.close_all.call_count, 3)
+
+
+class BenchDbConnectionsTests(TestCase):
+
+    def test_command_runs(self):
+        out = StringIO()
+        call_command('bench_db_connections', requests=2, stdout=out)
+
+        self.assertIn('CONN_MAX_AGE=0', out.getvalue())
+        self.assertIn('CONN_MAX_AGE=60', out.getvalue())
+
+    @mock.patch('core.management.commands.bench_db_connections.close_old_connections')
+    def test_connections_closed_like_a_server(self, mock_close):
+        """
+        The test client does not close connections, the command does it around every request
+        """
+        call_command('bench_db_connections', requests=3, conn_max_age=[0], stdout=StringIO())
+
+        self.assertEqual(mock_close.call_count, 6)
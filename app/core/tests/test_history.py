@@ -0,0 +1,66 @@
+from django.test import TestCase, SimpleTestCase
+from core.models import Stock, IndicatorSnapshot
+from core.history import record_indicator_snapshots, downsample, get_history
+from datetime import date, timedelta
+from decimal import Decimal
+
+
+class DownsampleTests(SimpleTestCase):
+    """
+    Test bucket averages of a series
+    """
+
+    def test_short_series_unchanged(self):
+        points = [(date(2023, 1, 1), {'rsi': 30})]
+        self.assertEqual(downsample(points, 10), points)
+
+    def test_bucket_average(self):
+        points = [(date(2023, 1, day), {'rsi': day, 'fa_score': None}) for day in range(1, 7)]
+
+        result = downsample(points, 3)
+
+        self.assertEqual([day for day, _ in result], [date(2023, 1, 2), date(2023, 1, 4), date(2023, 1, 6)])
+        self.assertEqual(result[0][1], {'rsi': 1.5, 'fa_score': None})
+
+
+class RecordIndicatorSnapshotsTests(TestCase):
+    """
+    Test writing the indicator history
+    """
+
+    def setUp(self):
+        self.stock = Stock.objects.create(stock_code='ABC', rsi=30, fa_score=31,
+                                          avg_gain_loss=Decimal('10.5'))
+        Stock.objects.create(stock_code='NEW')
+
+    def test_record(self):
+        """
+        Stocks without indicators are skipped and -1 dividend is stored as NULL
+        """
+        self.assertEqual(record_indicator_snapshots(date(2023, 1, 2)), 1)
+
+        snapshot = IndicatorSnapshot.objects.get()
+        self.assertEqual((snapshot.stock, snapshot.date, snapshot.rsi), (self.stock, date(2023, 1, 2), 30))
+        self.assertEqual(snapshot.avg_gain_loss, Decimal('10.50'))
+        self.assertIsNone(snapshot.five_year_avg_dividend_yield)
+
+    def test_same_day_replaced(self):
+        record_indicator_snapshots(date(2023, 1, 2))
+        Stock.objects.filter(pk=self.stock.pk).update(rsi=45)
+        record_indicator_snapshots(date(2023, 1, 2))
+        record_indicator_snapshots(date(2023, 1, 3))
+
+        self.assertEqual(list(IndicatorSnapshot.objects.order_by('date').values_list('rsi', flat=True)), [45, 45])
+
+    def test_get_history(self):
+        start = date(2023, 1, 1)
+        IndicatorSnapshot.objects.bulk_create([
+            IndicatorSnapshot(stock=self.stock, date=start + timedelta(days=day), rsi=day, fa_score=30)
+            for day in range(10)
+        ])
+
+        result = get_history(self.stock, ('rsi',), start=date(2023, 1, 3), max_points=4)
+
+        self.assertEqual(len(result), 4)
+        self.assertEqual(result[0], {'date': date(2023, 1, 4), 'rsi': 2.5})
+        self.assertEqual(result[-1]['date'], date(2023, 1, 10))
@@ -0,0 +1,226 @@
+from django.test import TestCase, SimpleTestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.template import Template, Context
+from core.images import make_avatar, set_profile_image, ImageTooSmall, ImageTooLarge, ImageError
+from core import images
+from core.images import AVATAR_SIZES, AVATAR_FORMATS, get_digest, rendition_name
+from core.models import UserProfile, Avatar
+from unittest import mock
+from PIL import Image
+from io import BytesIO
+import os
+import struct
+import zlib
+
+
+def image_bytes(width, height, image_format='JPEG', mode='RGB'):
+    buffer = BytesIO()
+    Image.new(mode, (width, height), color=(155, 0, 0) if mode == 'RGB' else (155, 0, 0, 255)).save(
+        buffer, image_format)
+    return buffer.getvalue()
+
+
+def png_header(width, height):
+    """
+    PNG that declares width x height pixels in its header, without the pixels
+    """
+    data = bytearray(image_bytes(1, 1, 'PNG'))
+    # IHDR data follows the signature, the chunk length and the chunk type
+    data[16:24] = struct.pack('>II', width, height)
+    data[29:33] = struct.pack('>I', zlib.crc32(bytes(data[12:29])))
+    return bytes(data)
+
+
+class MakeAvatarTests(SimpleTestCase):
+    """
+    Test validation, crop and resize of avatars
+    """
+
+    def test_square_avatar(self):
+        for width, height in ((1200, 300 * 4), (4000, 300), (300, 900)):
+            avatar = Image.open(BytesIO(make_avatar(BytesIO(image_bytes(width, height)))))
+            self.assertEqual((avatar.format, avatar.size), ('JPEG', (200, 200)))
+
+    def test_png_with_alpha(self):
+        avatar = Image.open(BytesIO(make_avatar(BytesIO(image_bytes(400, 300, 'PNG', 'RGBA')))))
+        self.assertEqual((avatar.mode, avatar.size), ('RGB', (200, 200)))
+
+    def test_too_small(self):
+        with self.assertRaisesMessage(ImageTooSmall, 'Image should be at least 200x200 px.'):
+            make_avatar(BytesIO(image_bytes(400, 100)))
+
+    @override_settings(AVATAR_MAX_PIXELS=1000 * 1000)
+    def test_too_large(self):
+        with self.assertRaises(ImageTooLarge):
+            make_avatar(BytesIO(image_bytes(1001, 1000)))
+
+    def test_decompression_bomb(self):
+        """
+        Pillow refuses to open the header before the size check runs
+        """
+        with self.assertRaises(ImageTooLarge):
+            make_avatar(BytesIO(png_header(20000, 20000)))
+
+    def test_not_an_image(self):
+        with self.assertRaises(ImageError):
+            make_avatar(BytesIO(b'not an image'))
+
+
+class SetProfileImageTests(TestCase):
+    """
+    Test replacing the image of a profile
+    """
+
+    def setUp(self):
+        self.profile = UserProfile.objects.get(user=User.objects.create_user(username='avatar@example.com'))
+
+    def tearDown(self):
+        if self.profile.image:
+            self.profile.image.delete(save=False)
+
+    def upload(self, name='photo.png'):
+        return SimpleUploadedFile(name, image_bytes(600, 400, 'PNG'), content_type='image/png')
+
+    def set_and_save(self, profile, upload):
+        with self.captureOnCommitCallbacks(execute=True):
+            set_profile_image(profile, upload)
+            profile.save()
+
+    def test_renditions(self):
+        """
+        All sizes and formats are stored under the content hash of the upload
+        """
+        self.set_and_save(self.profile, self.upload())
+        digest = get_digest(self.profile.image.name)
+
+        self.assertEqual(self.profile.image.name, rendition_name(digest))
+        for size in AVATAR_SIZES:
+            for extension in AVATAR_FORMATS:
+                path = self.profile.image.storage.path(rendition_name(digest, size, extension))
+                self.assertEqual(Image.open(path).size, (size, size))
+
+    def test_previous_image_deleted(self):
+        self.set_and_save(self.profile, self.upload())
+        first_path = self.profile.image.path
+        self.set_and_save(self.profile, SimpleUploadedFile('other.png', image_bytes(300, 300, 'PNG')))
+
+        self.assertFalse(os.path.exists(first_path))
+        self.assertTrue(os.path.exists(self.profile.image.path))
+        self.assertEqual(Avatar.objects.get().digest, self.profile.avatar_id)
+
+    def test_identical_uploads_stored_once(self):
+        """
+        Two profiles with the same picture share one Avatar, the second upload is not processed
+        """
+        other = UserProfile.objects.get(user=User.objects.create_user(username='same@example.com'))
+        self.set_and_save(self.profile, self.upload())
+
+        with mock.patch.object(images, 'make_renditions') as make_renditions:
+            self.set_and_save(other, self.upload('copy.png'))
+
+        make_renditions.assert_not_called()
+        self.assertEqual(other.image.name, self.profile.image.name)
+        self.assertEqual(Avatar.objects.get().ref_count, 2)
+
+        # The files stay while another profile uses them
+        other.delete()
+        self.assertEqual(Avatar.objects.get().ref_count, 1)
+        self.assertTrue(os.path.exists(self.profile.image.path))
+
+    def test_reupload_is_noop(self):
+        self.set_and_save(self.profile, self.upload())
+
+        with mock.patch.object(images, '_store_avatar') as store:
+            self.set_and_save(self.profile, self.upload())
+
+        store.assert_not_called()
+        self.assertEqual(Avatar.objects.get().ref_count, 1)
+
+    def test_last_user_deletes_files(self):
+        self.set_and_save(self.profile, self.upload())
+        path = self.profile.image.path
+
+        self.profile.delete()
+
+        self.assertFalse(Avatar.objects.exists())
+        self.assertFalse(os.path.exists(path))
+
+    def test_nothing_counted_before_commit(self):
+        """
+        Until the save is committed the avatar has no user and no files
+        """
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            set_profile_image(self.profile, self.upload())
+            self.profile.save()
+
+        self.assertEqual(len(callbacks), 1)
+        self.assertEqual(Avatar.objects.get().ref_count, 0)
+        self.assertFalse(os.path.exists(self.profile.image.path))
+
+    def test_failed_renditions_restore_previous_image(self):
+        """
+        When the renditions can not be stored the error is logged
+        and the profile keeps its previous image
+        """
+        self.set_and_save(self.profile, self.upload())
+        first_digest, first_name = self.profile.avatar_id, self.profile.image.name
+
+        with mock.patch.object(images, 'make_renditions', side_effect=OSError('disk full')), \
+                self.assertLogs('core.images', 'ERROR'):
+            self.set_and_save(self.profile, SimpleUploadedFile('other.png', image_bytes(300, 300, 'PNG')))
+
+        self.assertEqual((self.profile.avatar_id, self.profile.image.name), (first_digest, first_name))
+        stored = UserProfile.objects.get(pk=self.profile.pk)
+        self.assertEqual((stored.avatar_id, stored.image.name), (first_digest, first_name))
+        self.assertEqual(list(Avatar.objects.values_list('digest', 'ref_count')), [(first_digest, 1)])
+        self.assertTrue(os.path.exists(self.profile.image.path))
+
+    @override_settings(AVATAR_PROCESS_IN_BACKGROUND=True)
+    def test_background(self):
+        """
+        The name is set at once, the files are written by the worker
+        """
+        self.set_and_save(self.profile, self.upload())
+        self.assertTrue(self.profile.image.name.startswith('avatars/'))
+
+        self.assertEqual(self.profile.avatar_job.result(timeout=10), self.profile.image.name)
+        self.assertTrue(os.path.exists(self.profile.image.path))
+
+
+class AvatarTemplateTagTests(TestCase):
+    """
+    Test that templates get the right rendition and that it can be cached forever
+    """
+
+    def setUp(self):
+        self.profile = UserProfile.objects.get(user=User.objects.create_user(username='tag@example.com'))
+        with self.captureOnCommitCallbacks(execute=True):
+            set_profile_image(self.profile, SimpleUploadedFile('photo.png', image_bytes(300, 300, 'PNG')))
+            self.profile.save()
+        self.digest = get_digest(self.profile.image.name)
+
+    def tearDown(self):
+        self.profile.image.delete(save=False)
+
+    def render(self, size):
+        return Template('{% load avatars %}{% avatar profile ' + str(size) + ' css_class="round" %}').render(
+            Context({'profile': self.profile}))
+
+    def test_picks_rendition(self):
+        html = self.render(45)
+
+        self.assertIn(f'{self.digest}/64.jpg 1x, /static/media/avatars/{self.digest}/200.jpg 2x', html)
+        self.assertIn('width="45"', html)
+        if 'webp' in AVATAR_FORMATS:
+            self.assertIn(f'<source type="image/webp" srcset="/static/media/avatars/{self.digest}/64.webp 1x', html)
+
+    def test_legacy_image(self):
+        self.profile.image.name = 'uploads/user_images/old.jpg'
+        self.assertIn('src="/static/media/uploads/user_images/old.jpg"', self.render(200))
+
+    def test_served_with_immutable_cache(self):
+        response = self.client.get(f'/static/media/avatars/{self.digest}/32.jpg')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('immutable', response['Cache-Control'])
@@ -0,0 +1,82 @@
+from django.test import TestCase
+from django.core.files.uploadedfile import SimpleUploadedFile
+from core.importers import import_stock_codes, iter_codes, ImportSummary
+from core.models import Stock, File
+from core.universe import get_member_stocks
+import os
+
+# Transaction, universe and members, up to 4 per chunk, removal and universe update
+QUERIES_PER_UNIVERSE_IMPORT = 11
+
+
+class ImportStockCodesTests(TestCase):
+    """
+    Test bulk import of stock codes
+    """
+
+    def test_normalize_and_dedupe(self):
+        summary = ImportSummary()
+        codes = list(iter_codes([b'\xef\xbb\xbfaapl\n', ' msft \n', 'AAPL\n', '\n', 'TOOLONG\n', 'AB\n'], summary))
+
+        self.assertEqual(codes, ['AAPL', 'MSFT'])
+        self.assertEqual(summary.lines, 6)
+        self.assertEqual(summary.duplicates, 1)
+        self.assertEqual(summary.invalid, 2)
+
+    def test_existing_codes_skipped(self):
+        Stock.objects.create(stock_code='MSFT')
+
+        summary = import_stock_codes(['AAPL\n', 'MSFT\n', 'ADBE\n'])
+
+        self.assertEqual(summary.created, 2)
+        self.assertEqual(summary.existing, 1)
+        self.assertEqual(sorted(Stock.objects.values_list('stock_code', flat=True)), ['AAPL', 'ADBE', 'MSFT'])
+
+    def test_queries_per_chunk(self):
+        """
+        One lookup and one insert per chunk, not per line
+        """
+        lines = [f'A{i:03d}\n' for i in range(10)]
+
+        with self.assertNumQueries(4):
+            summary = import_stock_codes(lines, chunk_size=5)
+
+        self.assertEqual(summary.created, 10)
+        self.assertEqual(Stock.objects.count(), 10)
+
+    def test_universe_members_per_chunk(self):
+        """
+        The members are recorded in the import chunks, a second import replaces them
+        """
+        import_stock_codes([f'A{i:03d}\n' for i in range(10)], chunk_size=5, universe='codes')
+
+        lines = [f'A{i:03d}\n' for i in range(5, 15)]
+        with self.assertNumQueries(QUERIES_PER_UNIVERSE_IMPORT):
+            summary = import_stock_codes(lines, chunk_size=5, universe='codes')
+
+        self.assertEqual((summary.created, summary.existing, summary.added, summary.removed), (5, 5, 5, 5))
+        self.assertEqual(sorted(get_member_stocks(['codes']).values_list('stock_code', flat=True)),
+                         [f'A{i:03d}' for i in range(5, 15)])
+
+    def test_file_upload(self):
+        """
+        Uploading a File imports its codes and keeps the summary
+        """
+        file_obj = File(file=SimpleUploadedFile('codes.txt', b'aapl\nMSFT\nmsft\n'))
+        file_obj.save()
+        self.addCleanup(os.remove, file_obj.file.path)
+
+        self.assertEqual(file_obj.import_summary.as_dict(),
+                         {'lines': 3, 'created': 2, 'existing': 0, 'duplicates': 1, 'invalid': 0,
+                          'added': 2, 'removed': 0})
+        self.assertTrue(file_obj.file.name.startswith('txt-files/codes_'))
+        # The codes are the members of universe 'codes'
+        self.assertEqual(sorted(get_member_stocks(['codes']).values_list('stock_code', flat=True)),
+                         ['AAPL', 'MSFT'])
+
+        # Saving the record again does not rename or import the file
+        name = file_obj.file.name
+        Stock.objects.all().delete()
+        file_obj.save()
+        self.assertEqual(file_obj.file.name, name)
+        self.assertFalse(Stock.objects.exists())
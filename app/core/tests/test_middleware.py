@@ -0,0 +1,76 @@
+from django.test import TestCase, SimpleTestCase, RequestFactory, override_settings
+from django.http import HttpResponse, StreamingHttpResponse
+from django.core.management import call_command
+from core.models import Stock
+from core.middleware import CompressionMiddleware, choose_encoding
+from io import StringIO
+import gzip
+
+
+def get_response(request):
+    return HttpResponse(b'{"stock_code": "ABC"}' * 100, content_type='application/json')
+
+
+@override_settings(COMPRESSION_MIN_SIZE=1024)
+class CompressionMiddlewareTests(SimpleTestCase):
+    """
+    Test negotiated compression of responses
+    """
+
+    def setUp(self):
+        self.factory = RequestFactory()
+        self.middleware = CompressionMiddleware(get_response)
+
+    def test_choose_encoding(self):
+        self.assertEqual(choose_encoding('gzip, deflate'), 'gzip')
+        self.assertEqual(choose_encoding('gzip;q=0, deflate'), None)
+        self.assertEqual(choose_encoding('*'), choose_encoding('br, gzip'))
+        self.assertEqual(choose_encoding('identity'), None)
+
+    def test_gzip(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = self.middleware.process_response(request, get_response(request))
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(response.content), b'{"stock_code": "ABC"}' * 100)
+
+    def test_small_and_binary_responses(self):
+        """
+        Responses under COMPRESSION_MIN_SIZE and not compressible types are unchanged
+        """
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        small = self.middleware.process_response(request, HttpResponse(b'{}', content_type='application/json'))
+        binary = self.middleware.process_response(
+            request, HttpResponse(b'x' * 2000, content_type='image/png'))
+
+        self.assertFalse(small.has_header('Content-Encoding'))
+        self.assertFalse(binary.has_header('Content-Encoding'))
+
+    def test_streaming(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = StreamingHttpResponse((row for row in [b'a,b\n', b'1,2\n']), content_type='text/csv')
+        response = self.middleware.process_response(request, response)
+
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)), b'a,b\n1,2\n')
+
+    def test_strong_etag_made_weak(self):
+        request = self.factory.get('/', HTTP_ACCEPT_ENCODING='gzip')
+        response = get_response(request)
+        response['ETag'] = '"abc"'
+        response = self.middleware.process_response(request, response)
+
+        self.assertEqual(response['ETag'], 'W/"abc"')
+
+
+class BenchCompressionTests(TestCase):
+    """
+    Test the compression measurement command
+    """
+
+    def test_bench_command(self):
+        Stock.objects.create(stock_code='ABC', rsi=30, fa_score=31)
+        out = StringIO()
+        call_command('bench_compression', stdout=out)
+        self.assertIn('gzip', out.getvalue())
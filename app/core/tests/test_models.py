@@ -7,6 +7,9 @@ from PIL import Image
 from django.core.files.base import ContentFile
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.urls import reverse
+from django.db import IntegrityError
+from django.apps import apps
+import importlib
 import os
 
 
@@ -57,6 +60,39 @@ class StockModelTest(TestCase):
         self.assertEqual(stock.five_year_avg_dividend_yield, 0.25)
 
 
+class StockCodeTests(TestCase):
+    """
+    Test that stock_code is unique and normalized
+    """
+
+    def test_stock_code_normalized_on_save(self):
+        stock = Stock.objects.create(stock_code=' aapl ')
+        self.assertEqual(stock.stock_code, 'AAPL')
+
+    def test_stock_code_unique(self):
+        Stock.objects.create(stock_code='AAPL')
+        with self.assertRaises(IntegrityError):
+            Stock.objects.create(stock_code='aapl')
+
+    def test_duplicates_merged_by_migration(self):
+        """
+        Data migration keeps the first stock, fills its empty fields
+        from the duplicates and deletes the duplicates
+        """
+        migration = importlib.import_module('core.migrations.0015_normalize_stock_codes')
+        first = Stock.objects.create(stock_code='MSFT', rsi=40)
+        second = Stock.objects.create(stock_code='TEMP', fa_score=30, sector='Technology')
+        Stock.objects.filter(pk=second.pk).update(stock_code='msft ')
+        third = Stock.objects.create(stock_code='TEMP')
+        Stock.objects.filter(pk=third.pk).update(stock_code='goog')
+
+        migration.normalize_stock_codes(apps, None)
+
+        self.assertEqual(sorted(Stock.objects.values_list('stock_code', flat=True)), ['GOOG', 'MSFT'])
+        first.refresh_from_db()
+        self.assertEqual((first.rsi, first.fa_score, first.sector), (40, 30, 'Technology'))
+
+
 class UserProfileModelTest(TestCase):
     """
     Test that UserProfile model behaves as expected.
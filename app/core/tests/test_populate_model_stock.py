@@ -5,7 +5,9 @@ from unittest.mock import patch, Mock, MagicMock
 from datetime import datetime, timedelta, date
 from core.tests.data_for_testing_populate_model_stock import *
 from core.models import Stock
+from core.universe import sync_universe, get_member_stocks
 from django.contrib.auth.models import User
+from django.core.management import call_command
 from io import StringIO
 import sys
 
@@ -728,3 +730,102 @@ class TestAdminUpdateStocks(TestCase):
             self.assertEqual(stock.ipo_years, None)
             self.assertEqual(stock.avg_gain_loss, None)
             self.assertEqual(stock.five_year_avg_dividend_yield, -1)
+
+    @patch('core.management.commands.populate_model_stock.populate_missing_company_info')
+    @patch('core.management.commands.populate_model_stock.load_universe_txt')
+    @patch('core.management.commands.populate_model_stock.run_in_threads', return_value=[])
+    def test_workers_option(self, mock_run, mock_load, mock_missing):
+        """
+        call_command accepts --workers next to the queryset of the admin action
+        """
+        queryset = Stock.objects.filter(stock_code__in=['AAPL', 'GOOG'])
+
+        call_command('populate_model_stock', queryset=queryset, workers=2)
+
+        mock_run.assert_called_once_with(update_stock, ['AAPL', 'GOOG'], 2)
+
+
+@patch('core.management.commands.populate_model_stock.FUNDAMENTAL_ANALYSIS_API_KEY', 'key', create=True)
+class TestNewStocks(TestCase):
+    """
+    Test that only universe members without company info are fetched, in batches
+    """
+
+    def profile(self, symbol):
+        return {"symbol": symbol, "sector": "Technology", "industry": "Software", "country": "US",
+                "description": "A company", "exchangeShortName": "NASDAQ",
+                "companyName": f"{symbol} Inc.", "ipoDate": "2010-01-01"}
+
+    @patch('requests.get')
+    def test_populate_missing_company_info_in_batches(self, mock_get):
+        Stock.objects.create(stock_code='AAPL', company_name='Apple Inc.')
+        sync_universe('all_stock_codes', ['AAPL', 'MSFT', 'ADBE', 'TXG'])
+        mock_get.return_value.json.side_effect = [
+            [self.profile('ADBE'), self.profile('MSFT')],
+            # No profile for TXG
+            [],
+        ]
+
+        updated = populate_missing_company_info(batch_size=2)
+
+        self.assertEqual(mock_get.call_count, 2)
+        self.assertIn('/profile/ADBE,MSFT?', mock_get.call_args_list[0][0][0])
+        self.assertEqual([stock.stock_code for stock in updated], ['ADBE', 'MSFT'])
+        self.assertEqual(Stock.objects.get(stock_code='ADBE').company_name, 'ADBE Inc.')
+        self.assertEqual(Stock.objects.get(stock_code='MSFT').ipo_years, datetime.now().year - 2010)
+        self.assertIsNone(Stock.objects.get(stock_code='TXG').company_name)
+        self.assertIsNotNone(Stock.objects.get(stock_code='TXG').company_info_checked_at)
+
+        # TXG is not requested again until COMPANY_INFO_RETRY passed
+        self.assertEqual(populate_missing_company_info(batch_size=2), [])
+        self.assertEqual(mock_get.call_count, 2)
+
+        Stock.objects.filter(stock_code='TXG').update(
+            company_info_checked_at=timezone.now() - COMPANY_INFO_RETRY - timedelta(minutes=1))
+        mock_get.return_value.json.side_effect = [[self.profile('TXG')]]
+        updated = populate_missing_company_info(batch_size=2)
+
+        self.assertIn('/profile/TXG?', mock_get.call_args[0][0])
+        self.assertEqual([stock.stock_code for stock in updated], ['TXG'])
+
+    @patch('requests.get')
+    def test_failed_request_retried(self, mock_get):
+        """
+        Codes of a failed request are not marked as checked
+        """
+        sync_universe('all_stock_codes', ['MSFT'])
+        mock_get.side_effect = requests.ConnectionError('timeout')
+
+        with patch('sys.stdout', new_callable=StringIO):
+            self.assertEqual(populate_missing_company_info(), [])
+
+        self.assertIsNone(Stock.objects.get(stock_code='MSFT').company_info_checked_at)
+
+    @patch('requests.get')
+    def test_get_company_infos_unexpected_response(self, mock_get):
+        """
+        A dict without "Error Message", e.g. a rate limit notice, skips its batch only
+        """
+        mock_get.return_value.json.side_effect = [
+            {"message": "Limit Reach"},
+            [self.profile('MSFT'), 'AAPL'],
+        ]
+        checked = set()
+
+        with patch('sys.stdout', new_callable=StringIO) as mock_stdout:
+            infos = FundTechAnalysis.get_company_infos(['ADBE', 'MSFT'], batch_size=1, checked=checked)
+
+        self.assertEqual(list(infos), ['MSFT'])
+        self.assertEqual(checked, {'MSFT'})
+        self.assertIn('Unexpected API response', mock_stdout.getvalue())
+        self.assertIn('Unexpected profile', mock_stdout.getvalue())
+
+    @patch('core.management.commands.populate_model_stock.GetStockCodes')
+    def test_txt_file_parsed_when_changed(self, mock_gsc):
+        mock_gsc.return_value.list_codes = ['AAPL', 'MSFT']
+
+        load_universe_txt(UNIVERSE_TXT_FILE)
+        load_universe_txt(UNIVERSE_TXT_FILE)
+
+        self.assertEqual(mock_gsc.call_count, 1)
+        self.assertEqual(sorted(get_member_stocks().values_list('stock_code', flat=True)), ['AAPL', 'MSFT'])
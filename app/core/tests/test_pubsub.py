@@ -0,0 +1,155 @@
+from django.test import TestCase, SimpleTestCase
+from unittest.mock import patch
+from core.management.commands.populate_model_stock import PopulateUpdateStock
+from core.models import Stock, BrokerMessage
+from core.pubsub import LocalBroker, DatabaseBroker, get_broker, publish_stock_update, INDICATORS_CHANNEL
+from core.pubsub import DATABASE_GAP_SECONDS
+from django.utils import timezone
+import datetime
+import time
+from decimal import Decimal
+
+
+class LocalBrokerTests(SimpleTestCase):
+    """
+    Test the in process broker
+    """
+
+    def test_publish_subscribe(self):
+        broker = LocalBroker()
+        first = broker.subscribe('prices')
+        second = broker.subscribe('prices')
+
+        self.assertEqual(broker.publish('prices', {'value': 1}), 2)
+        self.assertEqual(first.get(timeout=0), {'value': 1})
+        self.assertEqual(second.get(timeout=0), {'value': 1})
+        self.assertIsNone(first.get(timeout=0))
+
+    def test_closed_subscription(self):
+        broker = LocalBroker()
+        subscription = broker.subscribe('prices')
+        subscription.close()
+
+        self.assertEqual(broker.publish('prices', {'value': 1}), 0)
+
+
+class DatabaseBrokerTests(TestCase):
+    """
+    Test the broker shared by all processes through the database
+    """
+
+    def test_publish_subscribe(self):
+        broker = DatabaseBroker()
+        broker.publish('prices', {'value': 0})
+        first = broker.subscribe('prices')
+        second = broker.subscribe('prices')
+
+        broker.publish('prices', {'value': 1})
+        broker.publish('other', {'value': 2})
+
+        # Messages published before subscribing are not received
+        self.assertEqual(first.get(timeout=0), {'value': 1})
+        self.assertEqual(second.get(timeout=0), {'value': 1})
+        self.assertIsNone(first.get(timeout=0))
+
+    def test_late_commit_not_skipped(self):
+        """
+        A message that becomes visible after a higher id is still received, once
+        """
+        broker = DatabaseBroker()
+        broker.publish('prices', {'value': 0})
+        subscription = broker.subscribe('prices')
+        last_id = subscription.last_id
+
+        BrokerMessage.objects.create(id=last_id + 2, channel='prices', message={'value': 2})
+        self.assertEqual(subscription.get(timeout=0), {'value': 2})
+        BrokerMessage.objects.create(id=last_id + 1, channel='prices', message={'value': 1})
+
+        self.assertEqual(subscription.get(timeout=0), {'value': 1})
+        self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(subscription.gaps, {})
+
+    def test_gaps_expire(self):
+        broker = DatabaseBroker()
+        subscription = broker.subscribe('prices')
+        BrokerMessage.objects.create(id=subscription.last_id + 2, channel='prices', message={'value': 2})
+        subscription.get(timeout=0)
+
+        with patch('core.pubsub.time.monotonic', return_value=time.monotonic() + DATABASE_GAP_SECONDS):
+            self.assertIsNone(subscription.get(timeout=0))
+        self.assertEqual(subscription.gaps, {})
+
+    def test_get_waits_for_timeout(self):
+        subscription = DatabaseBroker().subscribe('prices')
+        subscription.poll_seconds = 0.01
+        self.assertIsNone(subscription.get(timeout=0.03))
+
+    def test_prune(self):
+        broker = DatabaseBroker()
+        broker.publish('prices', {'value': 1})
+        broker.publish('prices', {'value': 2})
+        BrokerMessage.objects.filter(message={'value': 1}).update(
+            created_at=timezone.now() - datetime.timedelta(days=1))
+
+        self.assertEqual(broker.prune(), 1)
+        self.assertEqual(BrokerMessage.objects.count(), 1)
+
+    def test_default_broker(self):
+        """
+        populate_model_stock runs in its own process, so the default broker is shared
+        """
+        self.assertIsInstance(get_broker(), DatabaseBroker)
+
+
+class PublishStockUpdateTests(TestCase):
+    """
+    Test that populate_model_stock publishes new indicator values
+    """
+
+    def setUp(self):
+        self.subscription = get_broker().subscribe(INDICATORS_CHANNEL)
+
+    def tearDown(self):
+        self.subscription.close()
+
+    def test_no_changes(self):
+        stock = Stock.objects.create(stock_code='ABC')
+        self.assertEqual(publish_stock_update(stock), 0)
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+    @patch('core.management.commands.populate_model_stock.FundTechAnalysis')
+    def test_populate_rsi_publishes_delta(self, mock_fta):
+        Stock.objects.create(stock_code='MSFT', rsi=40)
+        mock_fta.return_value.rsi = 35
+
+        PopulateUpdateStock('MSFT').populate_rsi(update=True)
+        message = self.subscription.get(timeout=0)
+
+        self.assertEqual(message['stock_code'], 'MSFT')
+        self.assertEqual(message['changes'], {'rsi': 35})
+
+    @patch('core.management.commands.populate_model_stock.FundTechAnalysis')
+    def test_unchanged_value_not_published(self, mock_fta):
+        Stock.objects.create(stock_code='MSFT', rsi=40)
+        mock_fta.return_value.rsi = 40
+
+        PopulateUpdateStock('MSFT').populate_rsi(update=True)
+
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+    @patch('core.management.commands.populate_model_stock.FundTechAnalysis')
+    def test_float_dividend_yield_compared_as_stored(self, mock_fta):
+        """
+        The float from Yahoo is rounded to the 2 stored decimal places before comparing
+        """
+        Stock.objects.create(stock_code='MSFT', five_year_avg_dividend_yield=Decimal('2.31'))
+        mock_fta.return_value.five_year_avg_dividend_yield = 2.31
+
+        PopulateUpdateStock('MSFT').populate_five_year_avg_dividend_yield(update=True)
+        self.assertIsNone(self.subscription.get(timeout=0))
+
+        mock_fta.return_value.five_year_avg_dividend_yield = 2.4567
+        PopulateUpdateStock('MSFT').populate_five_year_avg_dividend_yield(update=True)
+
+        self.assertEqual(self.subscription.get(timeout=0)['changes'], {'five_year_avg_dividend_yield': '2.46'})
+        self.assertEqual(Stock.objects.get(stock_code='MSFT').five_year_avg_dividend_yield, Decimal('2.46'))
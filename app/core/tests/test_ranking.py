@@ -0,0 +1,107 @@
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import Stock
+from core.ranking import calculate_ranks, update_ranks
+from core.snapshot import refresh_screener_snapshot
+from decimal import Decimal
+import pandas as pd
+
+
+class CalculateRanksTests(SimpleTestCase):
+    """
+    Test percentile ranks on a DataFrame without the database
+    """
+
+    def setUp(self):
+        self.frame = pd.DataFrame({
+            'sector': ['Tech', 'Tech', 'Finance', 'Finance'],
+            'fa_score': [10, 20, 30, 40],
+            'rsi': [80, 60, 40, 20],
+            'avg_gain_loss': [Decimal('1'), Decimal('2'), Decimal('3'), None],
+            'five_year_avg_dividend_yield': [Decimal('-1'), Decimal('1'), Decimal('2'), Decimal('3')],
+        })
+
+    def test_global_ranks(self):
+        """
+        Higher fa_score and lower rsi get higher percentile ranks
+        """
+        ranks = calculate_ranks(self.frame)
+
+        self.assertEqual(list(ranks['fa_score_pct']), [25.0, 50.0, 75.0, 100.0])
+        self.assertEqual(list(ranks['rsi_pct']), [25.0, 50.0, 75.0, 100.0])
+
+    def test_sector_ranks(self):
+        """
+        Sector ranks compare stocks of the same sector only
+        """
+        ranks = calculate_ranks(self.frame)
+
+        self.assertEqual(list(ranks['fa_score_sector_pct']), [50.0, 100.0, 50.0, 100.0])
+
+    def test_missing_values(self):
+        """
+        Missing values and the -1 dividend placeholder are not ranked
+        and the composite score uses the remaining indicators
+        """
+        weights = {'fa_score': 1, 'rsi': 1, 'avg_gain_loss': 1, 'dividend_yield': 1}
+        ranks = calculate_ranks(self.frame, weights=weights)
+
+        self.assertTrue(pd.isna(ranks['dividend_yield_pct'][0]))
+        self.assertTrue(pd.isna(ranks['avg_gain_loss_pct'][3]))
+        self.assertEqual(ranks['composite_score'][3], round((100 + 100 + 100) / 3, 2))
+
+
+class UpdateRanksTests(TestCase):
+    """
+    Test that ranks are saved in model Stock and can be used by the screener
+    """
+
+    def setUp(self):
+        for code, fa_score in (('AAA', 10), ('BBB', 30), ('CCC', 20)):
+            Stock.objects.create(stock_code=code, sector='Tech', fa_score=fa_score, rsi=50,
+                                 avg_gain_loss=Decimal('5'), five_year_avg_dividend_yield=Decimal('1'))
+        Stock.objects.create(stock_code='NUL')
+
+    def test_update_ranks(self):
+        self.assertEqual(update_ranks(), 4)
+
+        best = Stock.objects.get(stock_code='BBB')
+        self.assertEqual(best.fa_score_pct, 100.0)
+        self.assertEqual(best.fa_score_sector_pct, 100.0)
+        self.assertIsNotNone(best.composite_score)
+        self.assertIsNone(Stock.objects.get(stock_code='NUL').composite_score)
+
+    def test_top_by_composite(self):
+        """
+        top=N returns the N best stocks by composite score
+        """
+        update_ranks()
+        refresh_screener_snapshot()
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='ranks@example.com'))
+        response = client.get(reverse('dashboard-api-list'), {
+            'fa_score': 0, 'rsi': 100, 'avg_gain_loss': 0, 'five_year_avg_dividend_yield': 0, 'top': 2,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([stock['stock_code'] for stock in response.data], ['BBB', 'CCC'])
+
+    def test_top_sorted_by_field(self):
+        """
+        top=N with a sort field keeps the N best stocks and sorts them by that field
+        """
+        update_ranks()
+        refresh_screener_snapshot()
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='ranks@example.com'))
+        response = client.get(reverse('dashboard-api-list'), {
+            'fa_score': 0, 'rsi': 100, 'avg_gain_loss': 0, 'five_year_avg_dividend_yield': 0, 'top': 2,
+            'sort': 'stock_code', 'direction': 'descending',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([stock['stock_code'] for stock in response.data], ['CCC', 'BBB'])
@@ -0,0 +1,36 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.management import call_command
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from io import StringIO
+
+
+class SessionWritesTests(TestCase):
+    """
+    Test that browsing does not write sessions
+    """
+
+    def test_sort_clicks_do_not_write_session(self):
+        user = User.objects.create_user(username='sessions@example.com')
+        self.client.force_login(user)
+
+        with CaptureQueriesContext(connection) as queries:
+            for direction in ('ascending', 'descending'):
+                response = self.client.get(reverse('dashboard'), {'sort': 'rsi', 'direction': direction})
+                self.assertEqual(response.status_code, 200)
+
+        writes = [query['sql'] for query in queries.captured_queries
+                  if 'django_session' in query['sql'] and not query['sql'].startswith('SELECT')]
+        self.assertEqual(writes, [])
+
+    def test_bench_sessions(self):
+        out = StringIO()
+        call_command('bench_sessions', users=1, backends=['db', 'signed_cookies'], stdout=out)
+
+        lines = out.getvalue().splitlines()
+        self.assertTrue(lines[0].startswith('db'))
+        # Signed cookies never touch the session table
+        self.assertIn('INSERT     0  UPDATE     0  DELETE     0', lines[1])
+        self.assertFalse(User.objects.filter(username='bench-sessions@example.com').exists())
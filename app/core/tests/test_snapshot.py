@@ -0,0 +1,126 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from rest_framework.test import APIClient
+from unittest.mock import patch
+from core.models import Stock, ScreenerSnapshot, ScreenerRefresh
+from core.snapshot import refresh_screener_snapshot, screener_queryset, get_latest_refresh
+from django.utils import timezone
+from pages.serializers import stock_queryset_rows, STOCK_FIELDS
+from decimal import Decimal
+
+
+class ScreenerSnapshotTests(TestCase):
+    """
+    Test rebuild of the screener snapshot and reads from it
+    """
+
+    def setUp(self):
+        self.stock = Stock.objects.create(stock_code='ABC', sector='Technology', industry='Software',
+                                          country='USA', exchange_short_name='NASDAQ',
+                                          company_name='ABC Inc.', description='Long text',
+                                          rsi=30, fa_score=31, avg_gain_loss=Decimal('10.5'),
+                                          five_year_avg_dividend_yield=Decimal('2.3'))
+        Stock.objects.create(stock_code='DEF', rsi=20, fa_score=20)
+
+    def test_refresh_copies_screener_columns(self):
+        """
+        Every stock is copied with the same primary key and screener values
+        """
+        refresh = refresh_screener_snapshot()
+
+        self.assertEqual(refresh.stock_count, 2)
+        self.assertEqual(ScreenerSnapshot.objects.count(), 2)
+        snapshot = ScreenerSnapshot.objects.get(pk=self.stock.pk)
+        self.assertEqual(snapshot.stock_code, 'ABC')
+        self.assertEqual(snapshot.sector, 'Technology')
+        self.assertEqual(snapshot.rsi, 30)
+        self.assertEqual(snapshot.avg_gain_loss, Decimal('10.5'))
+        self.assertEqual(snapshot.five_year_avg_dividend_yield, Decimal('2.3'))
+
+    def test_refresh_replaces_previous_snapshot(self):
+        """
+        Changes and deletions in model Stock are visible only after the next refresh
+        """
+        refresh_screener_snapshot()
+        Stock.objects.filter(stock_code='DEF').delete()
+        Stock.objects.filter(pk=self.stock.pk).update(rsi=70)
+
+        self.assertEqual(ScreenerSnapshot.objects.get(pk=self.stock.pk).rsi, 30)
+
+        refresh_screener_snapshot()
+
+        self.assertEqual(list(ScreenerSnapshot.objects.values_list('stock_code', 'rsi')), [('ABC', 70)])
+        self.assertEqual(ScreenerRefresh.objects.count(), 2)
+        self.assertEqual(get_latest_refresh().stock_count, 1)
+
+    def test_api_rows_read_from_snapshot_only(self):
+        """
+        Columns that only the stock APIs return do not change with a running update
+        """
+        refresh_screener_snapshot()
+        self.stock.description = 'New text'
+        self.stock.rsi_date = timezone.now()
+        self.stock.save()
+
+        rows = {row['stock_code']: row for row in stock_queryset_rows(screener_queryset())}
+        self.assertEqual(rows['ABC']['description'], 'Long text')
+        self.assertIsNone(rows['ABC']['rsi_date'])
+        self.assertEqual(set(rows['ABC']), set(STOCK_FIELDS))
+
+        refresh_screener_snapshot()
+        rows = {row['stock_code']: row for row in stock_queryset_rows(screener_queryset())}
+        self.assertEqual(rows['ABC']['description'], 'New text')
+
+    def test_screener_queryset_before_first_refresh(self):
+        """
+        Live model Stock is used until the snapshot is built once
+        """
+        self.assertEqual(screener_queryset().model, Stock)
+        refresh_screener_snapshot()
+        self.assertEqual(screener_queryset().model, ScreenerSnapshot)
+
+    def test_dashboard_api_reads_snapshot(self):
+        """
+        dashboard-api returns the snapshot values, not the live ones
+        """
+        refresh_screener_snapshot()
+        Stock.objects.filter(pk=self.stock.pk).update(fa_score=10)
+
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='snapshot@example.com'))
+        response = client.get(reverse('dashboard-api-list'), {
+            'fa_score': 30, 'rsi': 40, 'avg_gain_loss': 10, 'five_year_avg_dividend_yield': 1,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data), 1)
+        self.assertEqual(response.data[0]['id'], self.stock.pk)
+        self.assertEqual(response.data[0]['fa_score'], 31)
+        self.assertEqual(response.data[0]['avg_gain_loss'], '10.50')
+
+    def test_dashboard_reads_snapshot(self):
+        """
+        Page dashboard lists snapshot rows linked to the stock detail page
+        """
+        refresh_screener_snapshot()
+        User.objects.create_user(username='snapshot@example.com', password='password')
+        self.client.login(username='snapshot@example.com', password='password')
+
+        response = self.client.get(reverse('dashboard'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, reverse('detail-by-code', args=[self.stock.stock_code]))
+
+    @patch('core.management.commands.populate_model_stock.GetStockCodes')
+    def test_populate_model_stock_refreshes_snapshot(self, mock_gsc):
+        """
+        The snapshot is rebuilt once at the end of populate_model_stock
+        """
+        from core.management.commands.populate_model_stock import Command
+        mock_gsc.return_value.list_codes = []
+
+        Command().handle()
+
+        self.assertEqual(ScreenerRefresh.objects.count(), 1)
+        self.assertEqual(ScreenerSnapshot.objects.count(), 2)
@@ -0,0 +1,54 @@
+from django.test import TestCase, SimpleTestCase
+from core.models import Stock, Universe
+from core.universe import universe_name, sync_universe, get_member_stocks, needs_reload
+import os
+import tempfile
+
+
+class UniverseNameTests(SimpleTestCase):
+
+    def test_upload_suffix_removed(self):
+        self.assertEqual(universe_name('all_stock_codes.txt'), 'all_stock_codes')
+        self.assertEqual(universe_name('txt-files/all_stock_codes_2024_01_31.txt'), 'all_stock_codes')
+        self.assertEqual(universe_name('txt-files/sp500_2024_01_31_aB3dE9x.txt'), 'sp500')
+
+
+class SyncUniverseTests(TestCase):
+    """
+    Test loading ticker lists into the universe registry
+    """
+
+    def codes(self, name):
+        return sorted(get_member_stocks([name]).values_list('stock_code', flat=True))
+
+    def test_diff_membership(self):
+        sync_universe('sp500', ['aapl', 'MSFT', 'MSFT'])
+
+        universe, added, removed = sync_universe('sp500', ['MSFT', 'ADBE'])
+
+        self.assertEqual((added, removed), (1, 1))
+        self.assertEqual(self.codes('sp500'), ['ADBE', 'MSFT'])
+        # Leaving a universe does not delete the stock
+        self.assertTrue(Stock.objects.filter(stock_code='AAPL').exists())
+        self.assertEqual(universe.memberships.count(), 2)
+
+    def test_universes_are_independent(self):
+        sync_universe('sp500', ['AAPL'])
+        sync_universe('nasdaq', ['MSFT'])
+
+        self.assertEqual(self.codes('sp500'), ['AAPL'])
+        self.assertEqual(sorted(get_member_stocks().values_list('stock_code', flat=True)), ['AAPL', 'MSFT'])
+
+    def test_needs_reload(self):
+        with tempfile.NamedTemporaryFile('w', suffix='.txt', delete=False) as f:
+            f.write('AAPL\n')
+        self.addCleanup(os.remove, f.name)
+        name = universe_name(f.name)
+
+        self.assertTrue(needs_reload(name, f.name))
+        sync_universe(name, ['AAPL'], source=f.name)
+        # The file is older than the last load
+        self.assertFalse(needs_reload(name, f.name))
+
+        os.utime(f.name, (Universe.objects.get().updated_at.timestamp() + 60,) * 2)
+        self.assertTrue(needs_reload(name, f.name))
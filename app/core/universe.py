@@ -0,0 +1,144 @@
+"""
+Registry of ticker lists (model Universe with UniverseMembership rows).
+
+Admin uploads of model File feed it with UniverseSync in the import chunks,
+the all_stock_codes.txt file of populate_model_stock with sync_universe(),
+both match at most SYNC_CHUNK_SIZE codes per query. A universe is
+named after its file, so uploading a new all_stock_codes.txt replaces the
+list the command reads. The membership diff is computed once per load,
+populate_model_stock reads the indexed membership rows and parses the txt
+file only when it changed after the last load.
+"""
+import os
+import re
+from datetime import datetime, timezone as dt_timezone
+
+from django.db import transaction
+from django.utils import timezone
+
+from .models import Stock, Universe, UniverseMembership
+
+# File names get a date suffix when uploaded, see File.save,
+# and the storage adds 7 random characters when the name is taken
+re_upload_suffix = re.compile(r'_\d{4}_\d{2}_\d{2}(_[a-zA-Z0-9]{7})?$')
+# Codes matched and members changed per query
+SYNC_CHUNK_SIZE = 1000
+
+
+def universe_name(file_name):
+    """
+    Name of the universe of a ticker file: 'txt-files/all_stock_codes_2024_01_31.txt' -> 'all_stock_codes'
+    """
+    name = os.path.splitext(os.path.basename(file_name))[0]
+    return re_upload_suffix.sub('', name)
+
+
+def get_source_version(path):
+    """
+    Version of a file from its modification time and size, None when it does not exist
+    """
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    return f'{stat.st_mtime_ns}:{stat.st_size}'
+
+
+def needs_reload(name, path):
+    """
+    True when file path changed since universe name was last loaded.
+    A later upload of the same list wins until the file changes again.
+    """
+    universe = Universe.objects.filter(name=name).only('source_version', 'updated_at').first()
+    if universe is None:
+        return True
+    try:
+        modified_at = datetime.fromtimestamp(os.stat(path).st_mtime, tz=dt_timezone.utc)
+    except OSError:
+        return True
+    return universe.source_version != get_source_version(path) and modified_at > universe.updated_at
+
+
+class UniverseSync:
+    """
+    Replace the members of universe name chunk by chunk, so a list of any
+    length is matched with queries of at most one chunk of codes:
+        sync = UniverseSync(name)
+        sync.add(stock_ids)  # for every chunk
+        removed = sync.finish(source, source_version)
+    Run it in one transaction, readers see the old or the new members.
+    added is the number of added members.
+    """
+
+    def __init__(self, name):
+        self.universe, _ = Universe.objects.get_or_create(name=name)
+        self.current = set(self.universe.memberships.values_list('stock_id', flat=True))
+        self.seen = set()
+        self.added = 0
+
+    def add(self, stock_ids):
+        """
+        Add the stocks with stock_ids to the members
+        """
+        new_ids = [stock_id for stock_id in stock_ids if stock_id not in self.current and stock_id not in self.seen]
+        UniverseMembership.objects.bulk_create(
+            [UniverseMembership(universe=self.universe, stock_id=stock_id) for stock_id in new_ids],
+            ignore_conflicts=True,
+        )
+        self.seen.update(stock_ids)
+        self.added += len(new_ids)
+
+    def finish(self, source='', source_version='', chunk_size=SYNC_CHUNK_SIZE):
+        """
+        Remove the members that were not added, returns their number
+        """
+        removed = sorted(self.current - self.seen)
+        for start in range(0, len(removed), chunk_size):
+            self.universe.memberships.filter(stock_id__in=removed[start:start + chunk_size]).delete()
+
+        self.universe.source = source
+        self.universe.source_version = source_version or ''
+        self.universe.updated_at = timezone.now()
+        self.universe.save(update_fields=['source', 'source_version', 'updated_at'])
+        return len(removed)
+
+
+def get_or_create_stock_ids(stock_codes):
+    """
+    Return ({stock_code: pk}, number of created stocks) of normalized stock_codes,
+    missing Stock rows are created
+    """
+    stock_ids = dict(Stock.objects.filter(stock_code__in=stock_codes).values_list('stock_code', 'pk'))
+    missing = [code for code in stock_codes if code not in stock_ids]
+    if missing:
+        # A code added by a concurrent import is skipped by the unique constraint
+        Stock.objects.bulk_create([Stock(stock_code=code) for code in missing], ignore_conflicts=True)
+        stock_ids.update(Stock.objects.filter(stock_code__in=missing).values_list('stock_code', 'pk'))
+    return stock_ids, len(missing)
+
+
+def sync_universe(name, stock_codes, source='', source_version='', chunk_size=SYNC_CHUNK_SIZE):
+    """
+    Make stock_codes the members of universe name, creating missing Stock rows.
+    Returns (universe, number of added members, number of removed members).
+    """
+    codes = list(dict.fromkeys(filter(None, map(Stock.normalize_code, stock_codes))))
+
+    with transaction.atomic():
+        sync = UniverseSync(name)
+        for start in range(0, len(codes), chunk_size):
+            stock_ids, _ = get_or_create_stock_ids(codes[start:start + chunk_size])
+            sync.add(stock_ids.values())
+        removed = sync.finish(source, source_version, chunk_size)
+
+    return sync.universe, sync.added, removed
+
+
+def get_member_stocks(names=None):
+    """
+    Stocks that are members of the universes names, of any universe by default
+    """
+    memberships = UniverseMembership.objects.all()
+    if names is not None:
+        memberships = memberships.filter(universe__name__in=names)
+    return Stock.objects.filter(pk__in=memberships.values('stock_id'))
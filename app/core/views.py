@@ -0,0 +1,18 @@
+from django.conf import settings
+from django.views.static import serve
+
+from .images import AVATAR_DIRECTORY
+
+# Avatar names contain the hash of their content, so they never change
+AVATAR_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+
+
+def serve_avatar(request, path):
+    """
+    Serve an avatar rendition from MEDIA_ROOT with long cache headers.
+    In production the web server can serve MEDIA_URL/avatars/ the same way.
+    """
+    response = serve(request, f'{AVATAR_DIRECTORY}/{path}', document_root=settings.MEDIA_ROOT)
+    if response.status_code == 200:
+        response['Cache-Control'] = AVATAR_CACHE_CONTROL
+    return response
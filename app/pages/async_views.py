@@ -0,0 +1,136 @@
+"""
+Asynchronous variants of the stock read APIs, for ASGI servers (uvicorn).
+
+Django 3.2 runs async views natively but its ORM is synchronous, so the
+database work runs in a thread with sync_to_async. The default
+thread_sensitive=True would run the ORM work of all requests one at a time
+on a single shared thread (the ASGIHandler of Django 3.2 has no
+ThreadSensitiveContext), so the read-only helpers run with
+thread_sensitive=False on the threads of the default executor. Each helper
+closes its connection when it is done, an async request opens a new
+connection whatever CONN_MAX_AGE is, and at most one connection per
+executor thread is open at a time.
+Authentication, permission and rate limits are the same as in the DRF views.
+Under WSGI the views work as well, Django runs them in an event loop per request.
+"""
+import functools
+
+from asgiref.sync import sync_to_async
+from django.db import connections
+from django.http import HttpResponse
+from rest_framework import exceptions
+from rest_framework.permissions import IsAuthenticated
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from core.models import Stock
+from core.snapshot import screener_queryset
+from .renderers import FastJSONRenderer
+from .screener import ScreenerQuery, ScreenerError
+from .serializers import StockSerializer, stock_queryset_rows
+from .throttling import StockRateThrottle
+
+
+def _in_thread(func):
+    """
+    Run the read-only func in a thread of the default executor,
+    the connection of that thread is closed when func returns
+    """
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            connections.close_all()
+    return sync_to_async(wrapper, thread_sensitive=False)
+
+
+class _ThrottleView:
+    """
+    Stands in for the DRF view that StockRateThrottle expects
+    """
+
+    def __init__(self, throttle_scope):
+        self.throttle_scope = throttle_scope
+
+
+def _json_response(data, status=200, headers=None):
+    response = HttpResponse(FastJSONRenderer().render(data), status=status,
+                            content_type=FastJSONRenderer.media_type)
+    for header, value in (headers or {}).items():
+        response[header] = str(value)
+    return response
+
+
+@_in_thread
+def _check_access(request, throttle_scope):
+    """
+    Authenticate, check permission and rate limit like the DRF views.
+    Returns (DRF request, error response or None).
+    """
+    drf_request = Request(request, authenticators=[auth() for auth in api_settings.DEFAULT_AUTHENTICATION_CLASSES])
+    try:
+        if not IsAuthenticated().has_permission(drf_request, None):
+            raise exceptions.NotAuthenticated()
+    except exceptions.APIException as exc:
+        # Like APIView, 401 only when the first authenticator has a WWW-Authenticate header
+        headers = {}
+        status = exc.status_code
+        if isinstance(exc, exceptions.NotAuthenticated):
+            authenticate_header = drf_request.authenticators[0].authenticate_header(drf_request)
+            if authenticate_header:
+                headers['WWW-Authenticate'] = authenticate_header
+            else:
+                status = 403
+        return drf_request, _json_response({'detail': str(exc.detail)}, status=status, headers=headers)
+
+    throttle = StockRateThrottle()
+    if not throttle.allow_request(drf_request, _ThrottleView(throttle_scope)):
+        headers = dict(getattr(drf_request, 'rate_limit', {}))
+        wait = throttle.wait()
+        if wait is not None:
+            headers['Retry-After'] = int(wait)
+        return drf_request, _json_response({'detail': 'Request was throttled.'}, status=429, headers=headers)
+    return drf_request, None
+
+
+@_in_thread
+def _get_stock(pk):
+    stock = Stock.objects.filter(pk=pk).first()
+    return StockSerializer(stock).data if stock else None
+
+
+@_in_thread
+def _get_stock_rows(query):
+    return stock_queryset_rows(query.apply(screener_queryset()))
+
+
+async def stock_detail(request, pk):
+    """
+    Async variant of stock/<pk>/
+    """
+    drf_request, error = await _check_access(request, 'stock_detail')
+    if error:
+        return error
+
+    data = await _get_stock(pk)
+    if data is None:
+        return _json_response({'error': 'Stock not found.'}, status=404)
+    return _json_response(data, headers=getattr(drf_request, 'rate_limit', None))
+
+
+async def stock_list(request):
+    """
+    Async variant of dashboard-api/, takes the same parameters
+    """
+    drf_request, error = await _check_access(request, 'stock_list')
+    if error:
+        return error
+
+    try:
+        query = ScreenerQuery.from_params(request.GET, required=True)
+    except ScreenerError as exc:
+        return _json_response({'detail': str(exc)}, status=400)
+
+    rows = await _get_stock_rows(query)
+    return _json_response(rows, headers=getattr(drf_request, 'rate_limit', None))
@@ -0,0 +1,124 @@
+"""
+Query-count and latency budgets of the pages and APIs.
+
+VIEW_CASES lists every view with the most queries it may run. The count
+must not depend on the number of stocks, a view that starts loading a
+relation per row (N+1) breaks its budget as soon as there is more than
+one row. pages/tests/test_query_budgets.py checks the budgets on every
+test run, the bench_views command measures them together with latency
+and response size on 1k, 10k and 100k seeded stocks.
+"""
+import statistics
+import time
+from decimal import Decimal
+
+from django.db import connection, reset_queries
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from core.models import Stock
+from core.ranking import update_ranks
+from core.snapshot import refresh_screener_snapshot
+
+SECTORS = ('Technology', 'Healthcare', 'Finance', 'Energy', 'Utilities')
+COUNTRIES = ('USA', 'UK', 'Germany', 'Japan')
+
+# Required indicators of dashboard-api, loose enough to match many stocks
+SCREENER_PARAMS = {
+    'fa_score': 10,
+    'rsi': 60,
+    'avg_gain_loss': 0,
+    'five_year_avg_dividend_yield': 0,
+}
+# Throttle scopes of the measured APIs, the benchmark user is not throttled in them
+THROTTLE_SCOPES = ('stock_list', 'stock_detail', 'stock_bulk', 'stock_export', 'stock_stream')
+
+
+class ViewCase:
+    """
+    One request of the benchmark:
+    name - label in reports and test output
+    url - function(stock) returning the URL, stock is any seeded stock
+    max_queries - query budget of one request
+    token - authenticate with the API token instead of the session
+    """
+
+    def __init__(self, name, url, max_queries, method='get', data=None, token=False):
+        self.name = name
+        self.url = url
+        self.max_queries = max_queries
+        self.method = method
+        self.data = data or {}
+        self.token = token
+
+    def request(self, client, stock, token=None):
+        headers = {'HTTP_AUTHORIZATION': f'Token {token.key}'} if self.token and token else {}
+        return getattr(client, self.method)(self.url(stock), self.data, **headers)
+
+
+VIEW_CASES = (
+    ViewCase('home', lambda stock: reverse('home'), 3),
+    ViewCase('dashboard GET', lambda stock: reverse('dashboard'), 5),
+    ViewCase('dashboard POST', lambda stock: reverse('dashboard'), 5, method='post',
+             data={**SCREENER_PARAMS, 'sort': 'composite_score', 'direction': 'descending'}),
+    ViewCase('detail', lambda stock: reverse('detail-by-code', args=[stock.stock_code]), 4),
+    ViewCase('dashboard-api', lambda stock: reverse('dashboard-api-list'), 5, data=SCREENER_PARAMS),
+    ViewCase('stock/<pk>', lambda stock: reverse('stock-detail', args=[stock.pk]), 5),
+    ViewCase('me', lambda stock: reverse('me'), 1, token=True),
+    ViewCase('api-user-profile', lambda stock: reverse('api-user-profile'), 3),
+)
+
+
+def seed_stocks(count, start=0, batch_size=5000):
+    """
+    Create count stocks with varied indicators, numbered from start,
+    rank them and build the screener snapshot
+    """
+    stocks = [
+        Stock(stock_code=f'B{index:06d}', company_name=f'Bench Company {index}',
+              sector=SECTORS[index % len(SECTORS)], industry='Industry',
+              country=COUNTRIES[index % len(COUNTRIES)], exchange_short_name='NYSE',
+              rsi=index % 100, fa_score=index % 50,
+              avg_gain_loss=Decimal(index % 40) - 10,
+              five_year_avg_dividend_yield=Decimal(index % 8) / 2)
+        for index in range(start, start + count)
+    ]
+    Stock.objects.bulk_create(stocks, batch_size=batch_size)
+    update_ranks()
+    refresh_screener_snapshot()
+
+
+def percentile(values, percent):
+    """
+    Nearest-rank percentile of values
+    """
+    ordered = sorted(values)
+    index = max(int(round(percent / 100 * len(ordered))) - 1, 0)
+    return ordered[min(index, len(ordered) - 1)]
+
+
+def measure(client, case, stock, token=None, repeat=10):
+    """
+    Run case repeat times, returns a dict with status, queries (of the first
+    request), p50 and p95 latency in milliseconds and response size in bytes.
+    token is the API token of the user logged in with client.
+    """
+    # With DEBUG the query log is capped, a full log would capture nothing
+    reset_queries()
+    with CaptureQueriesContext(connection) as queries:
+        response = case.request(client, stock, token)
+    content = b''.join(response.streaming_content) if response.streaming else response.content
+
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        case.request(client, stock, token)
+        timings.append((time.perf_counter() - start) * 1000)
+
+    return {
+        'status': response.status_code,
+        'queries': len(queries),
+        'p50': statistics.median(timings) if timings else 0.0,
+        'p95': percentile(timings, 95) if timings else 0.0,
+        'size': len(content),
+    }
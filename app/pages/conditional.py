@@ -0,0 +1,96 @@
+"""
+HTTP conditional requests (ETag / Last-Modified) for the stock APIs.
+
+Stock data changes once per populate_model_stock run, so the validators are
+built from the latest ScreenerRefresh and, for a single stock, from its
+updated_at, which every save sets, e.g. admin edits and new company info
+between runs. They are read with small queries that do not
+load whole rows. When the client already has the current version a 304
+response is returned before anything is serialized.
+"""
+import hashlib
+from functools import wraps
+
+from django.utils.cache import get_conditional_response, quote_etag
+from django.utils.http import http_date
+
+from core.models import Stock
+from core.snapshot import get_latest_refresh
+from .screener import ScreenerQuery, ScreenerError
+
+
+def _make_etag(*parts):
+    return hashlib.sha1(':'.join(str(part) for part in parts).encode()).hexdigest()
+
+
+def stock_list_validators(request, *args, **kwargs):
+    """
+    Validators for dashboard-api: the search plus the global data version.
+    Before the first snapshot refresh there is no data version
+    and responses are not conditional.
+    """
+    refresh = get_latest_refresh()
+    if refresh is None:
+        return None, None
+
+    try:
+        query = ScreenerQuery.from_params(request.query_params, required=True)
+    except ScreenerError:
+        # Let the view return its 400 response
+        return None, None
+
+    etag = _make_etag(query.cache_key, refresh.pk, refresh.refreshed_at.isoformat())
+    return etag, refresh.refreshed_at
+
+
+def stock_detail_validators(request, pk=None, *args, **kwargs):
+    """
+    Validators for a single stock: its last save plus the global data version,
+    the ranks of all stocks change with every refresh.
+    """
+    updated_at = Stock.objects.filter(pk=pk).values_list('updated_at', flat=True).first()
+    if updated_at is None:
+        # Let the view return its 404 response
+        return None, None
+
+    refresh = get_latest_refresh()
+    version = (refresh.pk, refresh.refreshed_at.isoformat()) if refresh else ()
+    etag = _make_etag(pk, updated_at.isoformat(), *version)
+
+    last_modified = max(updated_at, refresh.refreshed_at) if refresh else updated_at
+    return etag, last_modified
+
+
+def conditional(get_validators):
+    """
+    Decorator for viewset methods.
+    get_validators(request, *args, **kwargs) returns (etag, last_modified),
+    either can be None. Returns 304 when the client version is current,
+    else calls the view and adds ETag and Last-Modified headers.
+    """
+
+    def decorator(method):
+        @wraps(method)
+        def wrapper(self, request, *args, **kwargs):
+            etag, last_modified = get_validators(request, *args, **kwargs)
+            if etag is None and last_modified is None:
+                return method(self, request, *args, **kwargs)
+
+            etag = quote_etag(etag) if etag else None
+            timestamp = int(last_modified.timestamp()) if last_modified else None
+
+            response = get_conditional_response(request, etag=etag, last_modified=timestamp)
+            if response is None:
+                response = method(self, request, *args, **kwargs)
+                if response.status_code != 200:
+                    return response
+
+            if etag:
+                response['ETag'] = etag
+            if timestamp is not None:
+                response['Last-Modified'] = http_date(timestamp)
+            return response
+
+        return wrapper
+
+    return decorator
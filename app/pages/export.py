@@ -0,0 +1,69 @@
+"""
+Streaming export of screener results as CSV.
+
+Rows are read with QuerySet.iterator(chunk_size=...), which uses a
+server-side cursor on PostgreSQL, and every chunk is written to the
+response before the next one is fetched. Memory use does not depend on
+the number of matching rows.
+"""
+import csv
+import io
+
+# Number of rows fetched from the database and written at once
+EXPORT_CHUNK_SIZE = 2000
+
+# Exported columns, 'id' is the primary key of model Stock
+EXPORT_FIELDS = (
+    'id',
+    'stock_code',
+    'sector',
+    'industry',
+    'country',
+    'exchange_short_name',
+    'company_name',
+    'rsi',
+    'fa_score',
+    'avg_gain_loss',
+    'five_year_avg_dividend_yield',
+    'composite_score',
+)
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv', 'csv'),
+}
+
+
+def _iter_chunks(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield lists of value tuples, chunk_size rows at a time
+    """
+    fields = ('pk',) + EXPORT_FIELDS[1:]
+    chunk = []
+    for row in queryset.values_list(*fields).iterator(chunk_size=chunk_size):
+        chunk.append(row)
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def stream_csv(queryset, chunk_size=EXPORT_CHUNK_SIZE):
+    """
+    Yield the CSV file in pieces of one chunk of rows
+    """
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_FIELDS)
+    for chunk in _iter_chunks(queryset, chunk_size):
+        writer.writerows(chunk)
+        yield buffer.getvalue()
+        buffer.seek(0)
+        buffer.truncate()
+    yield buffer.getvalue()
+
+
+STREAMS = {
+    'csv': stream_csv,
+}
+
@@ -0,0 +1,42 @@
+"""
+Fast JSON renderer for high volume stock APIs.
+Uses orjson (requirements.txt), the standard json module is the fallback
+when it is missing, e.g. in a local environment.
+Decimals are rendered as strings, the same as DRF DecimalField,
+dates and datetimes in ISO 8601.
+"""
+import datetime
+import decimal
+import json
+
+from rest_framework.renderers import JSONRenderer
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def _default(value):
+    """
+    Convert values that JSON does not support
+    """
+    if isinstance(value, decimal.Decimal):
+        return str(value)
+    if isinstance(value, (datetime.datetime, datetime.date, datetime.time)):
+        return value.isoformat()
+    raise TypeError(f'Object of type {type(value).__name__} is not JSON serializable')
+
+
+class FastJSONRenderer(JSONRenderer):
+    """
+    Drop in replacement of JSONRenderer without indentation support.
+    """
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        if orjson is not None:
+            return orjson.dumps(data, default=_default)
+        return json.dumps(data, default=_default, ensure_ascii=False,
+                          separators=(',', ':')).encode()
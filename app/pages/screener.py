@@ -0,0 +1,233 @@
+"""
+Screener query builder used by page dashboard and the stock APIs.
+
+Request parameters are validated and normalized once into a ScreenerQuery.
+The query can be applied to any queryset with the screener columns and
+produces a canonical cache key, so equal searches share one cache entry
+no matter how the parameters were written.
+"""
+import decimal
+import hashlib
+
+from django.db.models import Q
+
+
+class ScreenerError(ValueError):
+    """
+    Raised when screener parameters are missing or invalid.
+    """
+
+
+# Slider filters of page dashboard: parameter -> (model field, lookup, type)
+INDICATOR_FILTERS = {
+    'fa_score': ('fa_score', 'gt', int),
+    'rsi': ('rsi', 'lte', int),
+    'avg_gain_loss': ('avg_gain_loss', 'gt', decimal.Decimal),
+    'five_year_avg_dividend_yield': ('five_year_avg_dividend_yield', 'gt', decimal.Decimal),
+}
+
+# Every indicator can also be filtered by an inclusive range
+# with <field>_min and <field>_max parameters.
+RANGE_SUFFIXES = {
+    'min': 'gte',
+    'max': 'lte',
+}
+
+# Parameters that accept a comma separated list of values (IN filters)
+LIST_FILTERS = {
+    'stock_code': 'stock_code',
+    'sector': 'sector',
+    'industry': 'industry',
+    'country': 'country',
+    'exchange': 'exchange_short_name',
+}
+
+# Columns of the dashboard table that can be used for sorting, in display order
+SORT_FIELDS = (
+    ('stock_code', 'Stock Code'),
+    ('sector', 'Sector'),
+    ('industry', 'Industry'),
+    ('country', 'Country'),
+    ('exchange_short_name', 'Exchange'),
+    ('company_name', 'Company Name'),
+    ('rsi', 'RSI'),
+    ('fa_score', 'FA Score'),
+    ('avg_gain_loss', 'Avg Gain Loss'),
+    ('five_year_avg_dividend_yield', 'Five year avg dividend yield'),
+    ('composite_score', 'Score'),
+)
+SORT_DIRECTIONS = ('ascending', 'descending')
+
+# Largest N accepted by top=N (top N stocks by composite score)
+MAX_TOP = 500
+
+REQUIRED_INDICATORS_MESSAGE = ("All required indicators (fa_score, rsi, avg_gain_loss, "
+                               "five_year_avg_dividend_yield) must be provided.")
+
+
+def _convert(name, value, value_type):
+    """
+    Convert a single parameter to the type of its model field.
+    Decimals may have at most the 2 decimal places stored in model Stock,
+    they are written with exactly 2 so equal values give equal cache keys.
+    Rounding would change which stocks match, so more places are an error.
+    """
+    try:
+        if value_type is int:
+            return int(value)
+        number = decimal.Decimal(str(value))
+        if not number.is_finite():
+            raise ValueError(value)
+    except (ValueError, TypeError, decimal.InvalidOperation):
+        raise ScreenerError(f"Invalid value for {name}: {value}")
+
+    if number.normalize().as_tuple().exponent < -2:
+        raise ScreenerError(f"{name} can have at most 2 decimal places: {value}")
+    try:
+        return number.quantize(decimal.Decimal('0.01'))
+    except decimal.InvalidOperation:
+        raise ScreenerError(f"Invalid value for {name}: {value}")
+
+
+def get_list_param(params, name):
+    """
+    Read a list parameter given either as repeated keys or comma separated.
+    """
+    if hasattr(params, 'getlist'):
+        raw_values = params.getlist(name)
+    else:
+        raw_values = params.get(name)
+        if raw_values is None:
+            raw_values = []
+        elif isinstance(raw_values, str):
+            raw_values = [raw_values]
+
+    values = set()
+    for raw_value in raw_values:
+        for value in str(raw_value).split(','):
+            value = value.strip()
+            if value:
+                values.add(value)
+    return values
+
+
+class ScreenerQuery:
+    """
+    Validated and normalized screener search.
+    conditions is a sorted tuple of (lookup, value) pairs that
+    can be turned into a Q object or a cache key.
+    """
+
+    def __init__(self, conditions=(), sort_field=None, sort_direction='ascending', top=None):
+        self.conditions = tuple(sorted(conditions, key=lambda condition: condition[0]))
+        self.sort_field = sort_field
+        self.sort_direction = sort_direction
+        self.top = top
+
+    @classmethod
+    def from_params(cls, params, defaults=None, required=False):
+        """
+        Build the query from request parameters (QueryDict or dict).
+        defaults are used for indicators that are missing or empty.
+        If required is True all indicators must be provided.
+        """
+        defaults = defaults or {}
+        conditions = []
+
+        for name, (field, lookup, value_type) in INDICATOR_FILTERS.items():
+            value = params.get(name) or defaults.get(name)
+            if required and not value:
+                raise ScreenerError(REQUIRED_INDICATORS_MESSAGE)
+            if value:
+                conditions.append((f'{field}__{lookup}', _convert(name, value, value_type)))
+
+            for suffix, range_lookup in RANGE_SUFFIXES.items():
+                range_name = f'{name}_{suffix}'
+                value = params.get(range_name)
+                if value not in (None, ''):
+                    conditions.append((f'{field}__{range_lookup}', _convert(range_name, value, value_type)))
+
+        for name, field in LIST_FILTERS.items():
+            values = get_list_param(params, name)
+            if field == 'stock_code':
+                values = {value.strip().upper() for value in values}
+            if values:
+                conditions.append((f'{field}__in', tuple(sorted(values))))
+
+        sort_field = params.get('sort')
+        sort_direction = params.get('direction')
+        if sort_field not in dict(SORT_FIELDS):
+            sort_field = None
+        if sort_direction not in SORT_DIRECTIONS:
+            sort_direction = 'ascending'
+
+        top = params.get('top')
+        if top not in (None, ''):
+            top = _convert('top', top, int)
+            if not 0 < top <= MAX_TOP:
+                raise ScreenerError(f"top should be between 1 and {MAX_TOP}")
+        else:
+            top = None
+
+        return cls(conditions, sort_field, sort_direction, top)
+
+    def get_q(self):
+        """
+        Return the filter conditions as one Q object
+        """
+        return Q(**dict(self.conditions))
+
+    def get_ordering(self):
+        """
+        Return order_by() arguments. Determine the prefix '-' for descending order.
+        pk is always the last field so equal values keep a stable order.
+        top=N without a sort field orders by composite score, best first.
+        """
+        if not self.sort_field:
+            return ('-composite_score', 'pk') if self.top else ('pk',)
+        sort_prefix = '-' if self.sort_direction == 'descending' else ''
+        return (f'{sort_prefix}{self.sort_field}', 'pk')
+
+    def apply(self, queryset):
+        """
+        Filter and sort the queryset.
+        top=N selects the N best stocks by composite score first,
+        then they are sorted by the requested field.
+        """
+        filtered = queryset.filter(self.get_q())
+        if not self.top:
+            return filtered.order_by(*self.get_ordering())
+
+        best = filtered.exclude(composite_score=None).order_by('-composite_score', 'pk')[:self.top]
+        if not self.sort_field:
+            return best
+        return queryset.filter(pk__in=best.values('pk')).order_by(*self.get_ordering())
+
+    @property
+    def canonical(self):
+        """
+        Stable text form of the query. Equal searches give equal text.
+        """
+        parts = [f'{lookup}={value}' for lookup, value in self.conditions]
+        parts.extend(f'order={field}' for field in self.get_ordering())
+        if self.top:
+            # The top N are always chosen by composite score
+            parts.append(f'top={self.top}')
+        return '&'.join(parts)
+
+    @property
+    def cache_key(self):
+        """
+        Cache key for results of this query
+        """
+        digest = hashlib.sha1(self.canonical.encode()).hexdigest()
+        return f'screener:{digest}'
+
+    def __eq__(self, other):
+        return isinstance(other, ScreenerQuery) and self.canonical == other.canonical
+
+    def __hash__(self):
+        return hash(self.canonical)
+
+    def __repr__(self):
+        return f'<ScreenerQuery {self.canonical}>'
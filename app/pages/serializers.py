@@ -1,3 +1,4 @@
+from django.db import models
 from rest_framework import serializers
 from core.models import Stock, UserProfile
 
@@ -20,6 +21,109 @@ class StockSerializer(serializers.ModelSerializer):
         fields = '__all__'
 
 
+class ScreenerSerializer(serializers.Serializer):
+    """
+    Read only serializer for screener results.
+    Works for both model Stock and ScreenerSnapshot because
+    they share the screener columns.
+    """
+    id = serializers.IntegerField(source='pk', read_only=True)
+    stock_code = serializers.CharField(read_only=True)
+    sector = serializers.CharField(read_only=True)
+    industry = serializers.CharField(read_only=True)
+    country = serializers.CharField(read_only=True)
+    exchange_short_name = serializers.CharField(read_only=True)
+    company_name = serializers.CharField(read_only=True)
+    rsi = serializers.IntegerField(read_only=True)
+    fa_score = serializers.IntegerField(read_only=True)
+    avg_gain_loss = serializers.DecimalField(max_digits=4, decimal_places=2, read_only=True)
+    five_year_avg_dividend_yield = serializers.DecimalField(max_digits=4, decimal_places=2, read_only=True)
+    composite_score = serializers.FloatField(read_only=True)
+
+
+# Columns of ScreenerSerializer without 'id'
+SCREENER_FIELDS = (
+    'stock_code',
+    'sector',
+    'industry',
+    'country',
+    'exchange_short_name',
+    'company_name',
+    'rsi',
+    'fa_score',
+    'avg_gain_loss',
+    'five_year_avg_dividend_yield',
+    'composite_score',
+)
+SCREENER_DECIMAL_FIELDS = ('avg_gain_loss', 'five_year_avg_dividend_yield')
+
+
+def screener_rows(rows):
+    """
+    Fast read path with the same output as ScreenerSerializer.
+    rows are tuples of (pk, *SCREENER_FIELDS), e.g. from
+    queryset.values_list('pk', *SCREENER_FIELDS). No field objects
+    are built per row, Decimals are formatted with 2 decimal places.
+    """
+    keys = ('id',) + SCREENER_FIELDS
+    decimal_indexes = [keys.index(field) for field in SCREENER_DECIMAL_FIELDS]
+    result = []
+    for row in rows:
+        row = list(row)
+        for index in decimal_indexes:
+            if row[index] is not None:
+                row[index] = f'{row[index]:.2f}'
+        result.append(dict(zip(keys, row)))
+    return result
+
+
+def screener_queryset_rows(queryset):
+    """
+    Run the queryset with values_list() and return screener_rows()
+    """
+    return screener_rows(queryset.values_list('pk', *SCREENER_FIELDS))
+
+
+# Fields of StockSerializer, in its output order
+STOCK_FIELDS = tuple(field.name for field in Stock._meta.concrete_fields)
+STOCK_DECIMAL_FIELDS = tuple(field.name for field in Stock._meta.concrete_fields
+                             if isinstance(field, models.DecimalField))
+STOCK_DATETIME_FIELDS = tuple(field.name for field in Stock._meta.concrete_fields
+                              if isinstance(field, models.DateTimeField))
+
+
+def stock_rows(rows):
+    """
+    Fast read path with the same output as StockSerializer.
+    rows are tuples of STOCK_FIELDS, e.g. from queryset.values_list(*STOCK_FIELDS).
+    """
+    decimal_indexes = [STOCK_FIELDS.index(field) for field in STOCK_DECIMAL_FIELDS]
+    datetime_indexes = [STOCK_FIELDS.index(field) for field in STOCK_DATETIME_FIELDS]
+    datetime_field = serializers.DateTimeField()
+    result = []
+    for row in rows:
+        row = list(row)
+        for index in decimal_indexes:
+            if row[index] is not None:
+                row[index] = f'{row[index]:.2f}'
+        for index in datetime_indexes:
+            if row[index] is not None:
+                row[index] = datetime_field.to_representation(row[index])
+        result.append(dict(zip(STOCK_FIELDS, row)))
+    return result
+
+
+def stock_queryset_rows(queryset):
+    """
+    Run a queryset of model Stock or ScreenerSnapshot with values_list()
+    and return stock_rows(). The snapshot has all columns of model Stock,
+    rows are read from one table.
+    """
+    if queryset.model is Stock:
+        return stock_rows(queryset.values_list(*STOCK_FIELDS))
+    return stock_rows(queryset.values_list(*['pk' if field == 'id' else field for field in STOCK_FIELDS]))
+
+
 # class UserProfileSerializer(serializers.ModelSerializer):
 #     """
 #     Get the data from model UserProfile by given user
@@ -0,0 +1,83 @@
+from django.test import SimpleTestCase, TransactionTestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from core.models import Stock
+from asgiref.sync import async_to_sync
+from pages.async_views import _in_thread
+from decimal import Decimal
+import asyncio
+import json
+import threading
+
+
+class AsyncStockViewsTests(TransactionTestCase):
+    """
+    Test async variants of stock detail and dashboard-api.
+    The views read the database on other threads, they see committed rows only.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='async@example.com', password='test_password')
+        self.stock = Stock.objects.create(stock_code='ABC', sector='Technology', rsi=30, fa_score=31,
+                                          avg_gain_loss=Decimal('10.5'),
+                                          five_year_avg_dividend_yield=Decimal('2.3'))
+        self.client.force_login(self.user)
+
+    def test_unauthorized(self):
+        self.client.logout()
+        response = self.client.get(reverse('async-stock-detail', args=[self.stock.pk]))
+        self.assertEqual(response.status_code, 403)
+
+    def test_stock_detail(self):
+        response = self.client.get(reverse('async-stock-detail', args=[self.stock.pk]))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()['stock_code'], 'ABC')
+        self.assertIn('X-RateLimit-Remaining', response)
+
+    def test_stock_detail_with_token(self):
+        self.client.logout()
+        token = Token.objects.create(user=self.user)
+
+        response = self.client.get(reverse('async-stock-detail', args=[self.stock.pk]),
+                                   HTTP_AUTHORIZATION='Token ' + token.key)
+
+        self.assertEqual(response.status_code, 200)
+
+    def test_stock_not_found(self):
+        response = self.client.get(reverse('async-stock-detail', args=[self.stock.pk + 1]))
+        self.assertEqual(response.status_code, 404)
+
+    def test_stock_list(self):
+        """
+        The async list returns the same rows as dashboard-api
+        """
+        params = {'fa_score': 30, 'rsi': 40, 'avg_gain_loss': 10, 'five_year_avg_dividend_yield': 1}
+
+        response = self.client.get(reverse('async-dashboard-api'), params)
+        expected = self.client.get(reverse('dashboard-api-list'), params)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(json.loads(response.content), json.loads(expected.content))
+
+    def test_stock_list_missing_indicators(self):
+        response = self.client.get(reverse('async-dashboard-api'), {'fa_score': 30})
+        self.assertEqual(response.status_code, 400)
+
+
+class AsyncHelpersTests(SimpleTestCase):
+
+    def test_helpers_run_concurrently(self):
+        """
+        Two helpers wait for each other, on one shared thread the barrier breaks
+        """
+        barrier = threading.Barrier(2, timeout=5)
+        wait = _in_thread(barrier.wait)
+
+        async def both():
+            return await asyncio.gather(wait(), wait())
+
+        self.assertEqual(sorted(async_to_sync(both)()), [0, 1])
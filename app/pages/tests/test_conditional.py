@@ -0,0 +1,110 @@
+from rest_framework.test import APIClient, APITestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.utils import timezone
+from django.utils.http import http_date
+from core.models import Stock
+from core.snapshot import refresh_screener_snapshot
+from decimal import Decimal
+
+
+class ConditionalRequestTests(APITestCase):
+    """
+    Test ETag and Last-Modified support of dashboard-api and stock API
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='conditional@example.com', password='test_password')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.stock = Stock.objects.create(stock_code='ABC', rsi=30, fa_score=31,
+                                          rsi_date=timezone.now(), fa_score_date=timezone.now(),
+                                          avg_gain_loss=Decimal('10.5'),
+                                          five_year_avg_dividend_yield=Decimal('22.3'))
+        self.list_url = reverse('dashboard-api-list')
+        self.list_params = {'fa_score': 30, 'rsi': 40, 'avg_gain_loss': 10, 'five_year_avg_dividend_yield': 1}
+        self.detail_url = reverse('stock-detail', kwargs={'pk': self.stock.pk})
+
+    def test_detail_etag(self):
+        """
+        Repeated request with the received ETag returns 304 without a body
+        """
+        response = self.client.get(self.detail_url)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b'')
+
+    def test_detail_etag_changes_with_data(self):
+        """
+        New indicator values give a new ETag
+        """
+        etag = self.client.get(self.detail_url)['ETag']
+        self.stock.rsi = 50
+        self.stock.rsi_date = timezone.now() + timezone.timedelta(days=1)
+        self.stock.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['rsi'], 50)
+
+    def test_detail_etag_changes_with_edit(self):
+        """
+        An admin edit between two runs, no indicator date changes, gives a new ETag
+        """
+        refresh_screener_snapshot()
+        response = self.client.get(self.detail_url)
+        self.stock.description = 'New description'
+        self.stock.save()
+
+        response = self.client.get(self.detail_url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['description'], 'New description')
+
+    def test_detail_if_modified_since(self):
+        response = self.client.get(self.detail_url)
+        response = self.client.get(self.detail_url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_detail_not_found_is_not_conditional(self):
+        response = self.client.get(reverse('stock-detail', kwargs={'pk': self.stock.pk + 1}),
+                                   HTTP_IF_NONE_MATCH='*')
+        self.assertEqual(response.status_code, 404)
+
+    def test_list_etag_follows_refresh(self):
+        """
+        dashboard-api returns 304 until the next snapshot refresh
+        """
+        refresh = refresh_screener_snapshot()
+        response = self.client.get(self.list_url, self.list_params)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Last-Modified'], http_date(int(refresh.refreshed_at.timestamp())))
+        etag = response['ETag']
+
+        response = self.client.get(self.list_url, self.list_params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        # Another search has another ETag
+        response = self.client.get(self.list_url, {**self.list_params, 'rsi': 35}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+        refresh_screener_snapshot()
+        response = self.client.get(self.list_url, self.list_params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+
+    def test_list_before_first_refresh(self):
+        """
+        Without a snapshot there is no data version and no ETag
+        """
+        response = self.client.get(self.list_url, self.list_params)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotIn('ETag', response)
+
+    def test_list_invalid_query(self):
+        refresh_screener_snapshot()
+        response = self.client.get(self.list_url, {'fa_score': 30})
+        self.assertEqual(response.status_code, 400)
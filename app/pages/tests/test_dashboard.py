@@ -253,7 +253,7 @@ class TestDashboardFilter(TestCase):
         soup = BeautifulSoup(response.content, "html.parser")
         links = soup.find_all("a", style="text-decoration:none;color:black;")
 
-        self.assertEqual(links[0]["href"], '/stock/' + str(self.stock.id))
+        self.assertEqual(links[0]["href"], '/stock/' + self.stock.stock_code)
 
 
 class TestDashboardSort(TestCase):
@@ -339,3 +339,83 @@ class TestDashboardSort(TestCase):
 
         self.assertEqual(response.status_code, 200)
         self.assertEqual(actual_order, ['DEF', 'ABC'])
+
+
+class TestDashboardSortState(TestCase):
+    """
+    Test that sort state is kept in the URL and not in the session
+    """
+
+    def setUp(self):
+        self.client = Client()
+        self.client.post(reverse('register'),
+                         {
+                             'first_name': '1',
+                             'last_name': '1',
+                             'email': '1@example.com',
+                             'password': '11111',
+                             'confirm_password': '11111'
+                         })
+
+        # Login registered user
+        self.client.login(username='1@example.com', password='1111')
+        Stock.objects.create(stock_code='ABC', rsi=30, fa_score=80, avg_gain_loss=Decimal('10.5'),
+                             five_year_avg_dividend_yield=Decimal('2.3'))
+        Stock.objects.create(stock_code='DEF', rsi=20, fa_score=70, avg_gain_loss=Decimal('11.2'),
+                             five_year_avg_dividend_yield=Decimal('1.8'))
+        self.query = {'fa_score': 30, 'rsi': 40, 'avg_gain_loss': 10, 'five_year_avg_dividend_yield': 1}
+
+    def test_sort_from_query_string(self):
+        """
+        GET request with sort and direction returns ordered rows
+        """
+        response = self.client.get(reverse('dashboard'),
+                                   {**self.query, 'sort': 'fa_score', 'direction': 'descending'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(TestDashboardSort.get_table_rows_order(response), ['ABC', 'DEF'])
+
+        response = self.client.get(reverse('dashboard'),
+                                   {**self.query, 'sort': 'fa_score', 'direction': 'ascending'})
+        self.assertEqual(TestDashboardSort.get_table_rows_order(response), ['DEF', 'ABC'])
+
+    def test_sort_does_not_write_session(self):
+        """
+        Sorting should not store anything in the session
+        """
+        session_keys = set(self.client.session.keys())
+        self.client.get(reverse('dashboard'), {**self.query, 'sort': 'rsi'})
+        self.client.post(reverse('dashboard'), {**self.query, 'sort': 'rsi'})
+
+        self.assertEqual(set(self.client.session.keys()), session_keys)
+
+    def test_header_link_reverses_direction(self):
+        """
+        Header of the sorted column links to the reversed direction,
+        other columns link to ascending order
+        """
+        response = self.client.get(reverse('dashboard'), {**self.query, 'sort': 'rsi'})
+        columns = {column['field']: column for column in response.context['columns']}
+
+        self.assertIn('sort=rsi&direction=descending', columns['rsi']['url'])
+        self.assertIn('fa_score=30', columns['rsi']['url'])
+        self.assertIn('sort=fa_score&direction=ascending', columns['fa_score']['url'])
+
+    def test_unknown_sort_field_is_ignored(self):
+        """
+        Sorting by a field that is not a table column is ignored
+        """
+        response = self.client.get(reverse('dashboard'), {**self.query, 'sort': 'description'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNone(response.context['sort_field'])
+
+    def test_dashboard_api_sort(self):
+        """
+        dashboard-api returns rows in the requested order
+        """
+        response = self.client.get(reverse('dashboard-api-list'),
+                                   {**self.query, 'sort': 'rsi', 'direction': 'descending'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([stock['stock_code'] for stock in response.json()], ['ABC', 'DEF'])
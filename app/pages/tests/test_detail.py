@@ -61,7 +61,7 @@ class TestPageDetail(TestCase):
             description="Company description",
             ipo_years=3,
         )
-        response = self.client.get(reverse('detail', args=[self.stock.id]))
+        response = self.client.get(reverse('detail', args=[self.stock.id]), follow=True)
         self.soup = BeautifulSoup(response.content, 'html.parser')
 
     def test_company_name(self):
@@ -174,3 +174,44 @@ class TestPageDetail(TestCase):
         five_year_avg_dividend_yield_in_html = self.soup.find(id="five_year_avg_dividend_yield").text
         self.assertEqual(five_year_avg_dividend_yield_in_html.strip(),
                          "5-Year Avg Dividend Yield: 3.00")
+
+    def test_detail_by_code(self):
+        """
+        Page detail can be opened by ticker in any case
+        """
+        response = self.client.get(reverse('detail-by-code', args=['abc']))
+        soup = BeautifulSoup(response.content, 'html.parser')
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(soup.find(id='company_name').text, self.stock.company_name)
+        self.assertEqual(self.client.get(reverse('detail-by-code', args=['XYZ'])).status_code, 404)
+
+    def test_detail_by_dotted_and_digit_code(self):
+        """
+        Tickers with dots and all-digit tickers open page detail as well
+        """
+        Stock.objects.create(stock_code='BT.L', company_name='BT Group')
+        Stock.objects.create(stock_code='0700', company_name='Tencent')
+
+        for code, company_name in (('bt.l', 'BT Group'), ('0700', 'Tencent')):
+            response = self.client.get(f'/stock/{code}')
+            soup = BeautifulSoup(response.content, 'html.parser')
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(soup.find(id='company_name').text, company_name)
+
+    def test_digit_ticker_before_stock_id(self):
+        """
+        Digits that are a ticker and the id of another stock open the ticker,
+        an id that is no ticker redirects to the ticker of its stock
+        """
+        digit_stock = Stock.objects.create(stock_code='7203', company_name='Toyota')
+        other = Stock.objects.create(pk=int(digit_stock.stock_code), stock_code='MSFT', company_name='Microsoft')
+        self.assertNotEqual(digit_stock.pk, other.pk)
+
+        response = self.client.get('/stock/7203')
+        soup = BeautifulSoup(response.content, 'html.parser')
+        self.assertEqual(soup.find(id='company_name').text, 'Toyota')
+
+        response = self.client.get(f'/stock/{self.stock.pk}')
+        self.assertRedirects(response, reverse('detail-by-code', args=[self.stock.stock_code]),
+                             status_code=301)
@@ -0,0 +1,71 @@
+from rest_framework.test import APIClient, APITestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from core.models import Stock
+from pages import export
+from decimal import Decimal
+import csv
+import io
+
+
+class StockExportTests(APITestCase):
+    """
+    Test streaming export of screener results
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='export@example.com', password='test_password')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        Stock.objects.create(stock_code='ABC', sector='Technology', country='USA', company_name='ABC, Inc.',
+                             rsi=30, fa_score=31, avg_gain_loss=Decimal('10.5'),
+                             five_year_avg_dividend_yield=Decimal('2.3'))
+        Stock.objects.create(stock_code='DEF', sector='Finance', country='UK',
+                             rsi=20, fa_score=20, avg_gain_loss=Decimal('11.2'),
+                             five_year_avg_dividend_yield=Decimal('1.8'))
+
+    def get_export(self, export_format, params=None):
+        response = self.client.get(reverse('dashboard-export', args=[export_format]), params or {})
+        content = b''.join(response.streaming_content) if response.streaming else response.content
+        return response, content
+
+    def test_unauthorized(self):
+        self.client.force_authenticate(user=None)
+        response, _ = self.get_export('csv')
+        self.assertEqual(response.status_code, 403)
+
+    def test_csv_export(self):
+        """
+        CSV contains a header and one row per filtered stock
+        """
+        response, content = self.get_export('csv', {'fa_score': 30})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response['Content-Type'], 'text/csv')
+        rows = list(csv.reader(io.StringIO(content.decode())))
+        self.assertEqual(rows[0], list(export.EXPORT_FIELDS))
+        self.assertEqual(len(rows), 2)
+        self.assertEqual(rows[1][1:3], ['ABC', 'Technology'])
+        self.assertEqual(rows[1][6], 'ABC, Inc.')
+        self.assertEqual(rows[1][9], '10.50')
+
+    def test_csv_is_streamed_in_chunks(self):
+        """
+        Every chunk of rows is a separate piece of the response
+        """
+        pieces = list(export.stream_csv(Stock.objects.order_by('pk'), chunk_size=1))
+
+        self.assertEqual(len(pieces), 3)
+        self.assertTrue(pieces[0].startswith('id,stock_code'))
+        self.assertIn('DEF', pieces[1])
+
+    def test_unknown_format(self):
+        for export_format in ('xlsx', 'parquet'):
+            response, _ = self.get_export(export_format)
+            self.assertEqual(response.status_code, 404)
+
+    def test_invalid_filter(self):
+        response, _ = self.get_export('csv', {'rsi': 'abc'})
+        self.assertEqual(response.status_code, 400)
@@ -289,7 +289,9 @@ class TestUpdateProfile(TestCase):
             'image': image_file
         }
 
-        response = self.client.post(reverse('profile-update'), data)
+        # The image is stored and the previous one deleted when the save is committed
+        with self.captureOnCommitCallbacks(execute=True):
+            response = self.client.post(reverse('profile-update'), data)
 
         # Confirm success
         self.assertEqual(response.status_code, 200)
@@ -304,8 +306,9 @@ class TestUpdateProfile(TestCase):
         self.assertContains(response, data['location'])
         self.assertContains(response, data['birth_date'])
 
-        # Confirm that update image is displayed
-        self.assertContains(response, 'updated_image')
+        # Confirm that update image is displayed, renditions are named by content hash
+        self.user_profile.refresh_from_db()
+        self.assertContains(response, self.user_profile.image.name)
 
         # Confirm that previous image no longer exists
         self.assertFalse(os.path.exists(profile_image_before_update))
@@ -0,0 +1,43 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from core.models import UserProfile
+
+
+class ProfileQueriesTests(TestCase):
+    """
+    Test that the profile is loaded once per request and saved only when changed
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='queries@example.com', password='test_password')
+
+    def test_login_does_not_save_profile(self):
+        """
+        authenticate, session insert and update, last_login update
+        """
+        with self.assertNumQueries(9):
+            response = self.client.post(reverse('login'), {'email': 'queries@example.com',
+                                                           'password': 'test_password'})
+        self.assertEqual(response.status_code, 302)
+
+    def test_pages_load_profile_once(self):
+        """
+        One query for the session, one for the user and one for its profile
+        """
+        self.client.login(username='queries@example.com', password='test_password')
+
+        for name in ('home', 'profile', 'profile-update'):
+            with self.subTest(name), self.assertNumQueries(3):
+                response = self.client.get(reverse(name))
+            self.assertEqual(response.context['user_profile'].pk, self.user.pk)
+
+    def test_profile_saved_only_when_changed(self):
+        user = User.objects.select_related('profile').get(pk=self.user.pk)
+
+        with self.assertNumQueries(1):
+            user.save()
+
+        user.profile.location = 'Sofia'
+        user.save()
+        self.assertEqual(UserProfile.objects.get(pk=user.pk).location, 'Sofia')
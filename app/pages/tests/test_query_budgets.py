@@ -0,0 +1,58 @@
+from django.test import TestCase, override_settings
+from django.core.management import call_command, CommandError
+from django.contrib.auth.models import User
+from rest_framework.authtoken.models import Token
+from core.models import Stock
+from pages.benchmarks import VIEW_CASES, THROTTLE_SCOPES, seed_stocks, measure
+from io import StringIO
+
+BUDGET_USERNAME = 'budgets@example.com'
+
+
+@override_settings(API_THROTTLE_USER_RATES={BUDGET_USERNAME: {scope: None for scope in THROTTLE_SCOPES}})
+class QueryBudgetTests(TestCase):
+    """
+    Every view stays within its query budget, whatever the number of stocks
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username=BUDGET_USERNAME, password='test_password')
+        self.client.force_login(self.user)
+        self.token = Token.objects.create(user=self.user)
+
+    def measure_all(self):
+        stock = Stock.objects.order_by('pk').first()
+        return {case.name: measure(self.client, case, stock, self.token, repeat=0) for case in VIEW_CASES}
+
+    def test_query_budgets(self):
+        seed_stocks(3)
+        few = self.measure_all()
+        seed_stocks(40, start=3)
+        many = self.measure_all()
+
+        for case in VIEW_CASES:
+            with self.subTest(case.name):
+                self.assertEqual(many[case.name]['status'], 200)
+                self.assertLessEqual(many[case.name]['queries'], case.max_queries)
+                # More rows must not mean more queries
+                self.assertEqual(many[case.name]['queries'], few[case.name]['queries'])
+
+
+class BenchViewsTests(TestCase):
+    """
+    Test the bench_views command
+    """
+
+    def test_report(self):
+        out = StringIO()
+        call_command('bench_views', stocks=[5, 20], repeat=2, max_p95_ms=10000, stdout=out)
+
+        self.assertIn('20 stocks', out.getvalue())
+        self.assertIn('All views within budget', out.getvalue())
+        # The seeded data is rolled back
+        self.assertFalse(Stock.objects.exists())
+        self.assertFalse(User.objects.exists())
+
+    def test_exceeded_budget_fails(self):
+        with self.assertRaisesMessage(CommandError, 'p95'):
+            call_command('bench_views', stocks=[5], repeat=2, max_p95_ms=0, stdout=StringIO())
@@ -0,0 +1,80 @@
+from django.test import TestCase, SimpleTestCase
+from django.contrib.auth.models import User
+from django.urls import reverse
+from django.core.management import call_command
+from rest_framework.test import APIClient
+from core.models import Stock, ScreenerSnapshot
+from pages.renderers import FastJSONRenderer
+from pages.serializers import StockSerializer, ScreenerSerializer, screener_queryset_rows, stock_queryset_rows
+from core.snapshot import refresh_screener_snapshot
+from django.utils import timezone
+from decimal import Decimal
+from io import StringIO
+import datetime
+import json
+
+
+class FastJSONRendererTests(SimpleTestCase):
+    """
+    Test rendering of values that JSON does not support
+    """
+
+    def test_decimal_and_dates(self):
+        content = FastJSONRenderer().render({
+            'value': Decimal('10.50'),
+            'date': datetime.date(2023, 1, 2),
+            'none': None,
+        })
+
+        self.assertEqual(json.loads(content), {'value': '10.50', 'date': '2023-01-02', 'none': None})
+
+    def test_none(self):
+        self.assertEqual(FastJSONRenderer().render(None), b'')
+
+
+class ScreenerRowsTests(TestCase):
+    """
+    Test that the fast read path gives the same output as ScreenerSerializer
+    """
+
+    def setUp(self):
+        Stock.objects.create(stock_code='ABC', sector='Technology', country='USA', company_name='ABC, Inc.',
+                             description='ABC makes software', rsi_date=timezone.now(),
+                             rsi=30, fa_score=31, avg_gain_loss=Decimal('10.5'),
+                             five_year_avg_dividend_yield=Decimal('2.3'), composite_score=75.5)
+        Stock.objects.create(stock_code='DEF')
+
+    def test_same_as_serializer(self):
+        queryset = Stock.objects.order_by('pk')
+        expected = json.loads(json.dumps(ScreenerSerializer(queryset, many=True).data))
+
+        self.assertEqual(screener_queryset_rows(queryset), expected)
+
+    def test_stock_rows_same_as_stock_serializer(self):
+        """
+        dashboard-api keeps every field of StockSerializer, also when
+        it searches in the screener snapshot
+        """
+        expected = json.loads(json.dumps(StockSerializer(Stock.objects.order_by('pk'), many=True).data))
+        self.assertEqual(stock_queryset_rows(Stock.objects.order_by('pk')), expected)
+
+        refresh_screener_snapshot()
+        snapshot = ScreenerSnapshot.objects.order_by('pk')
+        self.assertEqual(stock_queryset_rows(snapshot), expected)
+
+    def test_dashboard_api_content(self):
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='render@example.com'))
+        response = client.get(reverse('dashboard-api-list'), {
+            'fa_score': 0, 'rsi': 100, 'avg_gain_loss': 0, 'five_year_avg_dividend_yield': 0,
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertEqual(json.loads(response.content)[0]['avg_gain_loss'], '10.50')
+        self.assertEqual(json.loads(response.content)[0]['description'], 'ABC makes software')
+
+    def test_bench_command(self):
+        out = StringIO()
+        call_command('bench_serializers', rows=[10], repeat=1, stdout=out)
+        self.assertIn('rows/s', out.getvalue())
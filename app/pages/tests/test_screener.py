@@ -0,0 +1,156 @@
+from django.test import TestCase, SimpleTestCase
+from django.http import QueryDict
+from django.contrib.auth.models import User
+from rest_framework.test import APIClient
+from core.models import Stock
+from pages.screener import ScreenerQuery, ScreenerError
+from decimal import Decimal
+
+
+class TestScreenerQuery(SimpleTestCase):
+    """
+    Test validation and normalization of screener parameters
+    """
+
+    def test_equal_searches_share_cache_key(self):
+        """
+        Parameters written in a different way but meaning the same
+        search should give the same cache key
+        """
+        first = ScreenerQuery.from_params(QueryDict('fa_score=30&rsi=40&avg_gain_loss=10'
+                                                    '&sector=Finance,Technology'))
+        second = ScreenerQuery.from_params(QueryDict('sector=Technology&sector=Finance'
+                                                     '&avg_gain_loss=10.00&rsi=40&fa_score=30'))
+
+        self.assertEqual(first, second)
+        self.assertEqual(first.cache_key, second.cache_key)
+
+    def test_different_searches_differ(self):
+        """
+        Different filters or ordering give different cache keys
+        """
+        base = ScreenerQuery.from_params({'fa_score': '30'})
+        other = ScreenerQuery.from_params({'fa_score': '31'})
+        sorted_query = ScreenerQuery.from_params({'fa_score': '30', 'sort': 'rsi'})
+
+        self.assertNotEqual(base.cache_key, other.cache_key)
+        self.assertNotEqual(base.cache_key, sorted_query.cache_key)
+
+    def test_decimal_and_float_give_same_condition(self):
+        """
+        Decimal parameters are normalized to the 2 decimal places of the model
+        """
+        query = ScreenerQuery.from_params({'avg_gain_loss': '10.5'})
+        self.assertEqual(dict(query.conditions)['avg_gain_loss__gt'], Decimal('10.50'))
+
+    def test_decimal_with_more_places_is_not_rounded(self):
+        """
+        Rounding would change the filter, more than 2 decimal places raise ScreenerError
+        """
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'avg_gain_loss': '10.555'})
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'avg_gain_loss': 'NaN'})
+
+        query = ScreenerQuery.from_params({'avg_gain_loss': '10.5500'})
+        self.assertEqual(dict(query.conditions)['avg_gain_loss__gt'], Decimal('10.55'))
+
+    def test_defaults_and_required(self):
+        """
+        Defaults fill in missing indicators, required indicators raise ScreenerError
+        """
+        query = ScreenerQuery.from_params({}, defaults={'rsi': 40})
+        self.assertEqual(dict(query.conditions), {'rsi__lte': 40})
+
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'fa_score': '30'}, required=True)
+
+    def test_invalid_value(self):
+        """
+        Values that can not be converted raise ScreenerError
+        """
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'fa_score': 'abc'})
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'avg_gain_loss_max': 'abc'})
+
+    def test_top_ordering(self):
+        """
+        top=N orders by composite score unless a sort field is given
+        and is limited to MAX_TOP
+        """
+        query = ScreenerQuery.from_params({'top': '10'})
+        self.assertEqual(query.get_ordering(), ('-composite_score', 'pk'))
+        query = ScreenerQuery.from_params({'top': '10', 'sort': 'rsi', 'direction': 'descending'})
+        self.assertEqual(query.get_ordering(), ('-rsi', 'pk'))
+
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'top': '0'})
+        with self.assertRaises(ScreenerError):
+            ScreenerQuery.from_params({'top': '100000'})
+
+    def test_unknown_sort_field(self):
+        """
+        Sorting by fields that are not table columns is ignored
+        """
+        query = ScreenerQuery.from_params({'sort': 'description', 'direction': 'sideways'})
+        self.assertIsNone(query.sort_field)
+        self.assertEqual(query.sort_direction, 'ascending')
+
+
+class TestScreenerFilters(TestCase):
+    """
+    Test range and IN filters against model Stock
+    """
+
+    def setUp(self):
+        Stock.objects.create(stock_code='ABC', sector='Technology', country='USA',
+                             rsi=30, fa_score=31, avg_gain_loss=Decimal('10.5'),
+                             five_year_avg_dividend_yield=Decimal('2.3'))
+        Stock.objects.create(stock_code='DEF', sector='Finance', country='UK',
+                             rsi=20, fa_score=35, avg_gain_loss=Decimal('11.2'),
+                             five_year_avg_dividend_yield=Decimal('1.8'))
+        Stock.objects.create(stock_code='GHI', sector='Energy', country='USA',
+                             rsi=50, fa_score=25, avg_gain_loss=Decimal('3.0'),
+                             five_year_avg_dividend_yield=Decimal('4.1'))
+
+    def get_codes(self, params):
+        query = ScreenerQuery.from_params(params)
+        return sorted(query.apply(Stock.objects.all()).values_list('stock_code', flat=True))
+
+    def test_range_filter(self):
+        self.assertEqual(self.get_codes({'rsi_min': '25', 'rsi_max': '50'}), ['ABC', 'GHI'])
+        self.assertEqual(self.get_codes({'fa_score_min': '31', 'fa_score_max': '31'}), ['ABC'])
+
+    def test_in_filters(self):
+        self.assertEqual(self.get_codes({'sector': 'Finance,Energy'}), ['DEF', 'GHI'])
+        self.assertEqual(self.get_codes({'country': 'USA', 'sector': 'Energy'}), ['GHI'])
+        self.assertEqual(self.get_codes({'stock_code': 'abc,def'}), ['ABC', 'DEF'])
+
+    def test_dashboard_api_uses_new_filters(self):
+        """
+        dashboard-api accepts the additional filters on top of the required indicators
+        """
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='screener@example.com'))
+
+        response = client.get('/dashboard-api/', {
+            'fa_score': 0, 'rsi': 100, 'avg_gain_loss': 0, 'five_year_avg_dividend_yield': 0,
+            'country': 'USA',
+        })
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(stock['stock_code'] for stock in response.data), ['ABC', 'GHI'])
+
+    def test_dashboard_api_invalid_value(self):
+        """
+        Invalid values return 400 instead of a server error
+        """
+        client = APIClient()
+        client.force_authenticate(user=User.objects.create_user(username='screener@example.com'))
+
+        response = client.get('/dashboard-api/', {
+            'fa_score': 'abc', 'rsi': 100, 'avg_gain_loss': 0, 'five_year_avg_dividend_yield': 0,
+        })
+
+        self.assertEqual(response.status_code, 400)
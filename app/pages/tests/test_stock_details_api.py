@@ -1,9 +1,10 @@
 from rest_framework.test import APIClient, APITestCase
 from rest_framework import status
 from django.contrib.auth.models import User
-from core.models import Stock
+from core.models import Stock, IndicatorSnapshot
 from decimal import Decimal
 from django.urls import reverse
+from datetime import date
 
 
 class PrivateStockDetailsApiTests(APITestCase):
@@ -58,6 +59,28 @@ class PrivateStockDetailsApiTests(APITestCase):
         self.assertEqual(response.data['avg_gain_loss'], '10.50')
         self.assertEqual(response.data['five_year_avg_dividend_yield'], '22.30')
 
+    def test_stock_by_code(self):
+        """
+        Stock can be retrieved by its ticker in any case
+        """
+        response = self.client.get(reverse('stock-by-code', kwargs={'code': 'abc'}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.stock.id)
+
+        response = self.client.get(reverse('stock-by-code', kwargs={'code': 'XYZ'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_stock_by_dotted_code(self):
+        """
+        Tickers with a dot are not read as a format suffix
+        """
+        dotted = Stock.objects.create(stock_code='BRK.B')
+        response = self.client.get(reverse('stock-by-code', kwargs={'code': 'brk.b'}))
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], dotted.id)
+
     def test_stock_details_api_incorrect_query(self):
         """
         Test APi query that Does NOT contain correct pk.
@@ -71,3 +94,114 @@ class PrivateStockDetailsApiTests(APITestCase):
 
         # Confirm that ParseError message is raised
         self.assertEqual(response.data['error'], 'Stock not found.')
+
+
+class PrivateStockBulkApiTests(APITestCase):
+    """
+    Test retrieving many stocks with one request
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='bulk@example.com', password='test_password')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+
+        self.abc = Stock.objects.create(stock_code='ABC', rsi=30, fa_score=31, avg_gain_loss=Decimal('10.5'))
+        self.defg = Stock.objects.create(stock_code='DEFG', rsi=20, fa_score=20)
+        self.url = reverse('stock-bulk')
+
+    def test_bulk_by_ids_and_codes(self):
+        """
+        Ids and codes are combined into one result list without duplicates
+        """
+        response = self.client.get(self.url, {'ids': f'{self.abc.pk},{self.defg.pk}', 'codes': 'abc'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([stock['stock_code'] for stock in response.data['results']], ['ABC', 'DEFG'])
+        self.assertEqual(response.data['results'][0]['avg_gain_loss'], '10.50')
+        self.assertEqual(response.data['missing'], {'ids': [], 'codes': []})
+
+    def test_bulk_uses_one_query(self):
+        with self.assertNumQueries(1):
+            self.client.get(self.url, {'codes': 'ABC,DEFG'})
+
+    def test_bulk_partial_miss(self):
+        """
+        Ids and codes that do not exist are reported as missing
+        """
+        missing_id = self.defg.pk + 100
+        response = self.client.post(self.url, {'ids': [self.abc.pk, missing_id], 'codes': ['XYZ']},
+                                    format='json')
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(len(response.data['results']), 1)
+        self.assertEqual(response.data['missing'], {'ids': [missing_id], 'codes': ['XYZ']})
+
+    def test_bulk_limit(self):
+        codes = ','.join(f'C{number}' for number in range(101))
+        response = self.client.get(self.url, {'codes': codes})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_invalid_request(self):
+        self.assertEqual(self.client.get(self.url).status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(self.client.get(self.url, {'ids': 'abc'}).status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_bulk_body_not_a_list(self):
+        """
+        ids and codes in a JSON body must be lists
+        """
+        for body in ({'ids': 5}, {'ids': '5'}, {'codes': 'ABC'}, [self.abc.pk]):
+            response = self.client.post(self.url, body, format='json')
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class PrivateStockHistoryApiTests(APITestCase):
+    """
+    Test the indicator history of a stock
+    """
+
+    def setUp(self):
+        self.user = User.objects.create_user(username='history@example.com', password='test_password')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.stock = Stock.objects.create(stock_code='ABC', rsi=30, fa_score=31)
+        IndicatorSnapshot.objects.bulk_create([
+            IndicatorSnapshot(stock=self.stock, date=date(2023, 1, day), rsi=day, fa_score=30,
+                              avg_gain_loss=Decimal('1.5'))
+            for day in range(1, 11)
+        ])
+
+    def test_history(self):
+        url = reverse('stock-history', args=[self.stock.pk])
+        response = self.client.get(url, {'start': '2023-01-05', 'fields': 'rsi,avg_gain_loss', 'points': 3})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['stock_code'], 'ABC')
+        self.assertEqual(len(response.data['history']), 3)
+        self.assertEqual(set(response.data['history'][0]), {'date', 'rsi', 'avg_gain_loss'})
+        self.assertEqual(response.data['history'][0]['avg_gain_loss'], 1.5)
+
+    def test_history_invalid_parameters(self):
+        url = reverse('stock-history', args=[self.stock.pk])
+
+        for params in ({'start': '2023-13-01'}, {'fields': 'description'}, {'points': 1}, {'points': 'a'}):
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+    def test_history_not_found(self):
+        response = self.client.get(reverse('stock-history', args=[self.stock.pk + 1]))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_history_by_code(self):
+        """
+        History can be requested by ticker and date range
+        """
+        url = reverse('stock-history-by-code', kwargs={'code': 'abc'})
+        response = self.client.get(url, {'start': '2023-01-03', 'end': '2023-01-04', 'fields': 'rsi'})
+
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['id'], self.stock.pk)
+        self.assertEqual([point['rsi'] for point in response.data['history']], [3, 4])
+
+        response = self.client.get(reverse('stock-history-by-code', kwargs={'code': 'XYZ'}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
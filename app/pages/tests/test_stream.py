@@ -0,0 +1,77 @@
+from django.test import TestCase
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.test import APIClient
+from core.models import Stock
+from core.pubsub import LocalBroker, publish_stock_update
+from pages.views import event_stream, STREAM_MAX_PER_USER
+from unittest.mock import patch
+import json
+
+
+class StockStreamTests(TestCase):
+    """
+    Test Server-Sent Events of indicator updates
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.broker = LocalBroker()
+        patcher = patch('pages.views.get_broker', return_value=self.broker)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+        self.client = APIClient()
+        self.client.force_authenticate(user=User.objects.create_user(username='stream@example.com'))
+
+    def test_unauthorized(self):
+        self.client.force_authenticate(user=None)
+        response = self.client.get(reverse('stock-stream'))
+        self.assertEqual(response.status_code, 403)
+
+    def test_stream_events(self):
+        """
+        Updates of the requested stocks are sent as events, others are skipped
+        """
+        response = self.client.get(reverse('stock-stream'), {'stock_code': 'abc'},
+                                   HTTP_ACCEPT='text/event-stream')
+        self.assertEqual(response['Content-Type'], 'text/event-stream')
+
+        with patch('core.pubsub.get_broker', return_value=self.broker):
+            publish_stock_update(Stock(pk=2, stock_code='DEF'), rsi=20)
+            publish_stock_update(Stock(pk=1, stock_code='ABC'), rsi=35)
+
+        stream = iter(response.streaming_content)
+        self.assertTrue(next(stream).startswith(b'retry:'))
+        event = next(stream).decode()
+        response.close()
+
+        self.assertTrue(event.startswith('event: indicators\n'))
+        data = json.loads(event.split('data: ')[1])
+        self.assertEqual((data['stock_code'], data['changes']), ('ABC', {'rsi': 35}))
+
+    def test_keepalive_and_close(self):
+        subscription = self.broker.subscribe('indicators')
+        events = list(event_stream(subscription, keepalive=0.01, max_seconds=0.05))
+
+        self.assertIn(': keepalive\n\n', events)
+        self.assertEqual(self.broker.publish('indicators', {}), 0)
+
+    def test_open_streams_per_user(self):
+        """
+        A user can keep STREAM_MAX_PER_USER streams open, a closed stream frees its slot
+        """
+        responses = [self.client.get(reverse('stock-stream')) for _ in range(STREAM_MAX_PER_USER)]
+        for response in responses:
+            next(iter(response.streaming_content))
+
+        rejected = self.client.get(reverse('stock-stream'))
+        self.assertEqual(rejected.status_code, 429)
+
+        responses[0].close()
+        response = self.client.get(reverse('stock-stream'))
+        self.assertEqual(response.status_code, 200)
+        next(iter(response.streaming_content))
+        response.close()
+        for response in responses[1:]:
+            response.close()
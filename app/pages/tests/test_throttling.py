@@ -0,0 +1,67 @@
+from django.test import TestCase, override_settings
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.urls import reverse
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+from core import metrics
+from core.models import Stock
+
+
+@override_settings(API_THROTTLE_USER_RATES={'limited@example.com': {'stock_detail': '2/min'}})
+class StockRateThrottleTests(TestCase):
+    """
+    Test rate limits of the stock APIs
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = User.objects.create_user(username='limited@example.com', password='test_password')
+        self.stock = Stock.objects.create(stock_code='ABC')
+        self.client = APIClient()
+        self.client.force_authenticate(user=self.user)
+        self.url = reverse('stock-detail', args=[self.stock.pk])
+
+    def test_quota_headers(self):
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-RateLimit-Limit'], '2')
+        self.assertEqual(response['X-RateLimit-Remaining'], '1')
+        self.assertIn('X-RateLimit-Reset', response)
+
+    def test_throttled(self):
+        """
+        Requests over the quota get 429 and are counted in metrics
+        """
+        for _ in range(2):
+            self.client.get(self.url)
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 429)
+        self.assertEqual(response['X-RateLimit-Remaining'], '0')
+        self.assertIn('Retry-After', response)
+        self.assertEqual(metrics.get_counts(['throttled:stock_detail']), {'throttled:stock_detail': 1})
+
+    def test_other_users_not_affected(self):
+        for _ in range(3):
+            self.client.get(self.url)
+
+        self.client.force_authenticate(user=User.objects.create_user(username='other@example.com'))
+        response = self.client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response['X-RateLimit-Limit'], '600')
+
+    def test_counted_per_token(self):
+        """
+        Token authenticated requests are counted by token
+        """
+        token = Token.objects.create(user=self.user)
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION='Token ' + token.key)
+
+        response = client.get(self.url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIsNotNone(cache.get(f'throttle_stock_detail_token_{token.key}'))
@@ -0,0 +1,79 @@
+"""
+Rate limits of the stock APIs.
+
+Every endpoint has a scope with a rate in REST_FRAMEWORK['DEFAULT_THROTTLE_RATES'].
+Requests are counted per API token, or per user when the request is not
+token authenticated, in the default cache. Single users can get other
+rates with the API_THROTTLE_USER_RATES setting:
+    API_THROTTLE_USER_RATES = {'username': {'stock_list': '1000/min'}}
+Responses carry X-RateLimit-Limit, X-RateLimit-Remaining and
+X-RateLimit-Reset headers and throttled requests are counted in core.metrics.
+"""
+from django.conf import settings
+from rest_framework.authtoken.models import Token
+from rest_framework.settings import api_settings
+from rest_framework.throttling import ScopedRateThrottle
+
+from core import metrics
+
+
+class StockRateThrottle(ScopedRateThrottle):
+    """
+    ScopedRateThrottle keyed by token or user, with per user rates
+    """
+    cache_format = 'throttle_%(scope)s_%(ident)s'
+
+    def allow_request(self, request, view):
+        self.request = request
+        return super().allow_request(request, view)
+
+    def get_rate(self):
+        user = getattr(self, 'request', None) and self.request.user
+        user_rates = getattr(settings, 'API_THROTTLE_USER_RATES', {})
+        if user and user.is_authenticated and self.scope in user_rates.get(user.get_username(), {}):
+            return user_rates[user.get_username()][self.scope]
+        # Read the rates on every request, so they can be changed by settings
+        return api_settings.DEFAULT_THROTTLE_RATES.get(self.scope)
+
+    def get_cache_key(self, request, view):
+        if isinstance(request.auth, Token):
+            ident = 'token_' + request.auth.key
+        elif request.user and request.user.is_authenticated:
+            ident = 'user_%s' % request.user.pk
+        else:
+            ident = 'ip_' + self.get_ident(request)
+        return self.cache_format % {'scope': self.scope, 'ident': ident}
+
+    def throttle_success(self):
+        super().throttle_success()
+        self._set_headers()
+        return True
+
+    def throttle_failure(self):
+        metrics.increment('throttled:' + self.scope)
+        self._set_headers()
+        return False
+
+    def _set_headers(self):
+        """
+        Remember the quota on the request, RateLimitHeadersMixin adds it to the response
+        """
+        reset = self.history[-1] + self.duration if self.history else self.now + self.duration
+        self.request.rate_limit = {
+            'X-RateLimit-Limit': self.num_requests,
+            'X-RateLimit-Remaining': max(self.num_requests - len(self.history), 0),
+            'X-RateLimit-Reset': int(reset),
+        }
+
+
+class RateLimitHeadersMixin:
+    """
+    Add the quota headers of StockRateThrottle to API responses
+    """
+    throttle_classes = [StockRateThrottle]
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        response = super().finalize_response(request, response, *args, **kwargs)
+        for header, value in getattr(request, 'rate_limit', {}).items():
+            response[header] = str(value)
+        return response
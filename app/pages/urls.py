@@ -1,7 +1,24 @@
-from django.urls import path, include
-from . import views
+from django.urls import path, include, register_converter
+from . import views, async_views
 from rest_framework import routers
 
+
+class DigitsConverter:
+    """
+    Like the int converter, but the value stays a string as written,
+    so an all-digit ticker such as 0700 keeps its leading zero
+    """
+    regex = '[0-9]+'
+
+    def to_python(self, value):
+        return value
+
+    def to_url(self, value):
+        return str(value)
+
+
+register_converter(DigitsConverter, 'digits')
+
 router = routers.DefaultRouter()
 router.register(r'dashboard-api', views.StockListAPIView, basename='dashboard-api')
 router.register(r'stock', views.StockDetailViewSet, basename='stock')
@@ -10,7 +27,12 @@ router.register(r'stock', views.StockDetailViewSet, basename='stock')
 urlpatterns = [
     path('', views.home, name='home'),
     path('dashboard', views.dashboard, name='dashboard'),
-    path('stock/<int:id>', views.detail, name='detail'),
+    path('stock/<digits:id>', views.detail, name='detail'),
+    path('stock/<str:code>', views.detail_by_code, name='detail-by-code'),
+    path('dashboard-export/<str:export_format>', views.StockExportView.as_view(), name='dashboard-export'),
+    path('stock-stream/', views.StockStreamView.as_view(), name='stock-stream'),
+    path('async/dashboard-api/', async_views.stock_list, name='async-dashboard-api'),
+    path('async/stock/<int:pk>/', async_views.stock_detail, name='async-stock-detail'),
     path('', include(router.urls)),
     path('profile-update', views.profile_update, name='profile-update'),
     path('profile', views.profile, name='profile'),
@@ -1,155 +1,143 @@
 from django.shortcuts import render, get_object_or_404, redirect
 from django.contrib.auth.decorators import login_required
 from core.models import Stock, UserProfile
-from django.contrib.auth.models import User
-import decimal
-from rest_framework import viewsets, response, status, generics
-from .serializers import StockSerializer
-from rest_framework.exceptions import ParseError
+from rest_framework import viewsets, response, status, generics, views
+from rest_framework.negotiation import BaseContentNegotiation
+from core.snapshot import screener_queryset
+from core.images import set_profile_image, ImageError
+from core.auth import get_user_profile
+from core.pubsub import get_broker, INDICATORS_CHANNEL
+from core.history import get_history, HISTORY_FIELDS, DEFAULT_POINTS, MAX_POINTS
+from core import charts
+from .serializers import StockSerializer, screener_queryset_rows, stock_queryset_rows
+from .renderers import FastJSONRenderer
+from .screener import ScreenerQuery, ScreenerError, SORT_FIELDS, get_list_param
+from . import export
+from .conditional import conditional, stock_list_validators, stock_detail_validators
+from .throttling import RateLimitHeadersMixin
+from rest_framework.exceptions import ParseError, Throttled
+from rest_framework.decorators import action
 from rest_framework.permissions import IsAuthenticated
-import PIL.Image
-from django.core.files.uploadedfile import InMemoryUploadedFile
-from io import BytesIO
+from rest_framework.renderers import BrowsableAPIRenderer
 from django.contrib import messages
-import os.path
+from django.core.cache import cache
+from django.http import StreamingHttpResponse
+from django.db.models import Q
+from django.utils.dateparse import parse_date
+import json
+import time
 
 
 def home(request):
-    user = request.user
-    if user.is_authenticated:
-        user_profile = UserProfile.objects.get(user=user.id)
-        context = {
-            'user': user,
-            'user_profile': user_profile
-        }
-    else:
-        context = {
+    # user and user_profile come from the context processors
+    return render(request, 'pages/home.html')
 
-        }
-    return render(request, 'pages/home.html', context)
+
+# Result sets up to this size are re-sorted in the browser without a request
+CLIENT_SORT_LIMIT = 500
+
+# Choices of the "Top by Score" select on page dashboard
+TOP_OPTIONS = (10, 25, 50, 100)
+
+# Slider values of page dashboard when no search is given
+DASHBOARD_DEFAULTS = {
+    'fa_score': 30,
+    'rsi': 40,
+    'avg_gain_loss': 10,
+    'five_year_avg_dividend_yield': 1,
+}
+
+
+def sort_columns(params, filters, sort_field, sort_direction):
+    """
+    Build the table header of page dashboard.
+    Every column links to the same search sorted by that column.
+    Clicking the currently sorted column again reverses the direction,
+    so the whole state lives in the URL and nothing is written to the session.
+    """
+    base_query = params.copy()
+    for key in ('csrfmiddlewaretoken', 'sort', 'direction'):
+        base_query.pop(key, None)
+    for key, value in filters.items():
+        if value is not None:
+            base_query[key] = value
+
+    columns = []
+    for field, label in SORT_FIELDS:
+        direction = 'ascending'
+        if field == sort_field and sort_direction == 'ascending':
+            direction = 'descending'
+
+        query = base_query.copy()
+        query['sort'] = field
+        query['direction'] = direction
+
+        columns.append({
+            'field': field,
+            'label': label,
+            'url': f'?{query.urlencode()}',
+            'direction': sort_direction if field == sort_field else None,
+        })
+
+    return columns
 
 
 @login_required(login_url='/accounts/login')
 def dashboard(request):
     """
-    View that handles dashboard page
+    View that handles dashboard page.
+    Filter and sort state are read from the query string (GET)
+    or from the submitted form (POST), never from the session.
     """
     if request.method == 'POST':
-        fa_score = request.POST.get('fa_score')
-        rsi = request.POST.get('rsi')
-        avg_gain_loss = request.POST.get('avg_gain_loss')
-        five_year_avg_dividend_yield = request.POST.get('five_year_avg_dividend_yield')
-        sort_field = request.POST.get('sort')  # Get the sort field from the clicked button
-
-        all_stocks = Stock.objects.all()
-
-        # Filter
-        # fa_score greater than
-        if fa_score:
-            all_stocks = all_stocks.filter(fa_score__gt=int(fa_score))
-        # rsi less than
-        if rsi:
-            all_stocks = all_stocks.filter(rsi__lte=int(rsi))
-        # avg_gain_loss greater than
-        if avg_gain_loss:
-            all_stocks = all_stocks.filter(avg_gain_loss__gt=decimal.Decimal(avg_gain_loss))
-        # five_year_dividend_yield greater than
-        if five_year_avg_dividend_yield:
-            all_stocks = all_stocks.filter(
-                five_year_avg_dividend_yield__gt=decimal.Decimal(five_year_avg_dividend_yield))
-
-        # Retrieve the current sort direction from session or set it to ascending by default
-        sort_direction = request.session.get('sort_direction', 'ascending')
-
-        # Sort
-        if sort_field:
-            if sort_field == request.session.get('sort_field'):
-                # If the same field is clicked again, reverse the sort direction
-                sort_direction = 'ascending' if sort_direction == 'descending' else 'descending'
-            else:
-                # If a different field is clicked, set the sort direction to ascending
-                sort_direction = 'ascending'
-
-            request.session['sort_direction'] = sort_direction
-            request.session['sort_field'] = sort_field
-
-            # Determine the prefix '-' for descending order
-            sort_prefix = '-' if sort_direction == 'descending' else ''
-
-            # Sort the queryset based on the selected field and direction
-            sort_field_with_prefix = f'{sort_prefix}{sort_field}'
-            all_stocks = all_stocks.order_by(sort_field_with_prefix)
-
+        params = request.POST
+        defaults = {}
+    else:
+        params = request.GET
         # Set default values if none are provided
-        data = {
-            'fa_score': fa_score,
-            'rsi': rsi,
-            'avg_gain_loss': avg_gain_loss,
-            'five_year_avg_dividend_yield': five_year_avg_dividend_yield,
-            'all_stocks': all_stocks,
-        }
-
-        return render(request, 'pages/dashboard.html', data)
-
-    if request.method == 'GET':
-        fa_score = request.GET.get('fa_score')
-        rsi = request.GET.get('rsi')
-        avg_gain_loss = request.GET.get('avg_gain_loss')
-        five_year_avg_dividend_yield = request.GET.get('five_year_avg_dividend_yield')
-
-        if not fa_score:
-            fa_score = 30
-        if not rsi:
-            rsi = 40
-        if not avg_gain_loss:
-            avg_gain_loss = 10
-        if not five_year_avg_dividend_yield:
-            five_year_avg_dividend_yield = 1
-
-        all_stocks = Stock.objects.all()
-
-        # Filter
-        # fa_score greater than
-        if fa_score:
-            all_stocks = all_stocks.filter(fa_score__gt=int(fa_score))
-        # rsi less than
-        if rsi:
-            all_stocks = all_stocks.filter(rsi__lte=int(rsi))
-        # avg_gain_loss greater than
-        if avg_gain_loss:
-            all_stocks = all_stocks.filter(avg_gain_loss__gt=decimal.Decimal(avg_gain_loss))
-        # five_year_dividend_yield greater than
-        if five_year_avg_dividend_yield:
-            all_stocks = all_stocks.filter(
-                five_year_avg_dividend_yield__gt=decimal.Decimal(five_year_avg_dividend_yield))
-
-            # Set default values if none are provided
-        data = {
-            'fa_score': fa_score,
-            'rsi': rsi,
-            'avg_gain_loss': avg_gain_loss,
-            'five_year_avg_dividend_yield': five_year_avg_dividend_yield,
-            'all_stocks': all_stocks,
-        }
+        defaults = DASHBOARD_DEFAULTS
+
+    fa_score = params.get('fa_score') or defaults.get('fa_score')
+    rsi = params.get('rsi') or defaults.get('rsi')
+    avg_gain_loss = params.get('avg_gain_loss') or defaults.get('avg_gain_loss')
+    five_year_avg_dividend_yield = params.get('five_year_avg_dividend_yield') or \
+        defaults.get('five_year_avg_dividend_yield')
+
+    try:
+        query = ScreenerQuery.from_params(params, defaults=defaults)
+        all_stocks = query.apply(screener_queryset())
+    except ScreenerError as exc:
+        messages.error(request, str(exc))
+        query = ScreenerQuery()
+        all_stocks = Stock.objects.none()
+
+    sort_field, sort_direction = query.sort_field, query.sort_direction
+
+    filters = {
+        'fa_score': fa_score,
+        'rsi': rsi,
+        'avg_gain_loss': avg_gain_loss,
+        'five_year_avg_dividend_yield': five_year_avg_dividend_yield,
+    }
+    data = {
+        **filters,
+        'all_stocks': all_stocks,
+        'sort_field': sort_field,
+        'sort_direction': sort_direction,
+        'columns': sort_columns(params, filters, sort_field, sort_direction),
+        'client_sort_limit': CLIENT_SORT_LIMIT,
+        'top': query.top,
+        'top_options': TOP_OPTIONS,
+    }
 
-        return render(request, 'pages/dashboard.html', data)
+    return render(request, 'pages/dashboard.html', data)
 
 
 @login_required(login_url='/accounts/login')
 def profile(request):
     if request.method == 'GET':
-        user = request.user
-        if user.is_authenticated:
-            user_profile = UserProfile.objects.get(user=user.id)
-            context = {
-                'user': user,
-                'user_profile': user_profile
-            }
-        else:
-            context = {
-
-            }
-        return render(request, 'pages/profile.html', context)
+        # user and user_profile come from the context processors
+        return render(request, 'pages/profile.html')
 
 
 @login_required(login_url='/accounts/login')
@@ -158,23 +146,13 @@ def profile_update(request):
     View that will manage profile page.
     """
     if request.method == 'GET':
-        user = request.user
-        if user.is_authenticated:
-            user_profile = UserProfile.objects.get(user=user.id)
-            context = {
-                'user': user,
-                'user_profile': user_profile
-            }
-        else:
-            context = {
-
-            }
-        return render(request, 'pages/profile_update.html', context)
+        # user and user_profile come from the context processors
+        return render(request, 'pages/profile_update.html')
 
     if request.method == 'POST':
 
-        user = User.objects.get(id=request.user.id)
-        user_profile = UserProfile.objects.get(user=user.id)
+        user = request.user
+        user_profile = get_user_profile(request)
         user.first_name = request.POST.get('first_name')
         user.last_name = request.POST.get('last_name')
         bio = request.POST.get('bio')
@@ -190,72 +168,16 @@ def profile_update(request):
 
         request_image = request.FILES.get('image')
         if request_image:
-
-            image = PIL.Image.open(request_image)
-            if image.width < 200:
-                messages.error(request, 'Image should be at least 200x200 px.')
+            # Resize, crop and replace the previous image, see core.images
+            try:
+                set_profile_image(user_profile, request_image)
+            except ImageError as exc:
+                messages.error(request, str(exc))
                 return redirect('profile-update')
-            else:
-                if image.height > image.width:
-                    """
-                    Image is portrait
-                    """
-                    updated_width = 200
-                    updated_height = int((200 * image.height) / image.width)
-                    image = image.resize((updated_width, updated_height), PIL.Image.ANTIALIAS)
-
-                    crop_left = 0
-                    crop_top = int((updated_height - updated_width) / 2)
-                    crop_right = updated_width
-                    crop_bottom = updated_width + crop_top
-
-                    # left, top, right, bottom
-                    resized_image = image.crop((crop_left, crop_top, crop_right, crop_bottom))
-                else:
-                    """
-                    Image is landscape
-                    """
-                    updated_height = 200
-                    updated_width = int((updated_height * image.width) / image.height)
-                    image = image.resize((updated_width, updated_height), PIL.Image.ANTIALIAS)
-
-                    crop_left = int((updated_width - updated_height) / 2)
-                    crop_top = 0
-                    crop_right = crop_left + updated_height
-                    crop_bottom = updated_height
-                    # left, top, right, bottom
-                    resized_image = image.crop((crop_left, crop_top, crop_right, crop_bottom))
-
-                # image.save(f'{settings.MEDIA_ROOT}/profile_images/{image.name}')
-                # Create a BytesIO buffer to temporarily hold the resized image data
-                buffer = BytesIO()
-
-                # Save the resized image to the buffer in the same format as the uploaded image
-                resized_image.save(buffer, format='JPEG')
-
-                # Create an InMemoryUploadedFile from the buffer with the same name as the original
-                resized_image_file = InMemoryUploadedFile(
-                    buffer,
-                    None,  # field_name, not needed in this case
-                    request_image.name,  # the original image filename
-                    request_image.content_type,  # content type of the original image
-                    resized_image.tell(),  # size of the resized image in bytes
-                    None,  # charset, not needed in this case
-                )
-
-                # Remove previous image
-                img_path = user_profile.image.path
-                if os.path.exists(img_path):
-                    os.remove(img_path)
-
-                user_profile.image = resized_image_file
-                # Save resized image
-                user_profile.save()
-                # Close Buffer
-                buffer.close()
 
-        user.save()
+        # The profile first, then save_user_profile finds nothing changed
         user_profile.save()
+        user.save()
 
         context = {
             'user': user,
@@ -268,11 +190,14 @@ def profile_update(request):
 @login_required(login_url='/accounts/login')
 def detail(request, id):
     """
-    View for stock detail. By given stock id, checks if
-    it is present in model Stock and returns its data to the
-    template.
+    View for stock detail of an all-digit ticker, e.g. /stock/7203.
+    Pages link to stocks by ticker. When no ticker matches, id is the
+    stock id of an old link and redirects to the ticker of that stock.
     """
-    stock = get_object_or_404(Stock, pk=id)
+    stock = Stock.objects.filter(stock_code=Stock.normalize_code(id)).first()
+    if stock is None:
+        stock = get_object_or_404(Stock, pk=int(id))
+        return redirect('detail-by-code', code=stock.stock_code, permanent=True)
     data = {
         'stock': stock,
     }
@@ -280,57 +205,218 @@ def detail(request, id):
     return render(request, 'pages/detail.html', data)
 
 
-class StockListAPIView(viewsets.ReadOnlyModelViewSet):
+@login_required(login_url='/accounts/login')
+def detail_by_code(request, code):
+    """
+    View for stock detail by ticker, e.g. /stock/AAPL
+    """
+    stock = get_object_or_404(Stock, stock_code=Stock.normalize_code(code))
+    data = {
+        'stock': stock,
+    }
+
+    return render(request, 'pages/detail.html', data)
+
+
+class StockListAPIView(RateLimitHeadersMixin, viewsets.ReadOnlyModelViewSet):
     """
     API list View that will get:
     fa_score, rsi, avg_gain_loss, five_year_avg_dividend_yield
     from request. All indicators should be present.
     If they are not present an Exception will be raised.
+    Stocks are searched in the screener snapshot, every result has
+    all fields of StockSerializer.
+    Results can be ordered with sort=<field>&direction=<ascending|descending>.
+    Requests are rate limited with scope stock_list, see pages.throttling
     To test this API open
     http://localhost:8000/dashboard-api/?fa_score=30&rsi=40&avg_gain_loss=10&five_year_avg_dividend_yield=1
     """
     queryset = Stock.objects.all()
     serializer_class = StockSerializer
     permission_classes = [IsAuthenticated]
+    renderer_classes = [FastJSONRenderer, BrowsableAPIRenderer]
+    throttle_scope = 'stock_list'
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        fa_score = self.request.query_params.get('fa_score')
-        rsi = self.request.query_params.get('rsi')
-        avg_gain_loss = self.request.query_params.get('avg_gain_loss')
-        five_year_avg_dividend_yield = self.request.query_params.get('five_year_avg_dividend_yield')
-
-        # If any of the parameters are missing, return an empty queryset
-        if not (fa_score and rsi and avg_gain_loss and five_year_avg_dividend_yield):
-            raise ParseError("All required indicators (fa_score, rsi, avg_gain_loss, "
-                             "five_year_avg_dividend_yield) must be provided.")
-
-        # Apply filters
-        if fa_score:
-            queryset = queryset.filter(fa_score__gt=int(fa_score))
-        if rsi:
-            queryset = queryset.filter(rsi__lte=int(rsi))
-        if avg_gain_loss:
-            queryset = queryset.filter(avg_gain_loss__gt=float(avg_gain_loss))
-        if five_year_avg_dividend_yield:
-            queryset = queryset.filter(five_year_avg_dividend_yield__gt=float(five_year_avg_dividend_yield))
-
-        return queryset
-
-
-class StockDetailViewSet(viewsets.ViewSet):
+        try:
+            query = ScreenerQuery.from_params(self.request.query_params, required=True)
+        except ScreenerError as exc:
+            raise ParseError(str(exc))
+
+        return query.apply(screener_queryset())
+
+    @conditional(stock_list_validators)
+    def list(self, request, *args, **kwargs):
+        """
+        Supports If-None-Match / If-Modified-Since, see pages.conditional
+        Rows are read with values_list() and rendered by FastJSONRenderer,
+        the output is the same as StockSerializer.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+        return response.Response(stock_queryset_rows(queryset))
+
+
+class ExportContentNegotiation(BaseContentNegotiation):
+    """
+    The export format comes from the URL, so the Accept header is ignored.
+    """
+
+    def select_parser(self, request, parsers):
+        return parsers[0]
+
+    def select_renderer(self, request, renderers, format_suffix=None):
+        return renderers[0], renderers[0].media_type
+
+
+class StockExportView(RateLimitHeadersMixin, views.APIView):
+    """
+    Stream screener results as a CSV file.
+    Accepts the same filters as dashboard-api, but none of them is required.
+    Example:
+    http://localhost:8000/dashboard-export/csv?fa_score=30&rsi=40&sector=Technology
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
+    throttle_scope = 'stock_export'
+
+    def get(self, request, export_format):
+        if export_format not in export.EXPORT_FORMATS:
+            return response.Response({"error": "Unknown export format."},
+                                     status=status.HTTP_404_NOT_FOUND)
+
+        try:
+            query = ScreenerQuery.from_params(request.query_params)
+        except ScreenerError as exc:
+            raise ParseError(str(exc))
+
+        content_type, extension = export.EXPORT_FORMATS[export_format]
+        stream = export.STREAMS[export_format](query.apply(screener_queryset()))
+        stream_response = StreamingHttpResponse(stream, content_type=content_type)
+        stream_response['Content-Disposition'] = f'attachment; filename="stocks.{extension}"'
+        return stream_response
+
+
+# Seconds between keep-alive comments on stock-stream
+STREAM_KEEPALIVE = 15
+# Seconds after which stock-stream ends, the browser reconnects by itself
+STREAM_MAX_SECONDS = 300
+# Streams one user can keep open at the same time, every one holds a worker thread
+STREAM_MAX_PER_USER = 3
+
+
+def _stream_slots_key(user):
+    return f'stock_stream_open_{user.pk}'
+
+
+def acquire_stream_slot(user, limit=STREAM_MAX_PER_USER):
+    """
+    Count an open stream of user in the cache.
+    Returns False, without counting it, when user has limit streams open already.
+    The count expires after the longest stream, so a stream that
+    was never released does not block the user for ever.
+    """
+    key = _stream_slots_key(user)
+    timeout = STREAM_MAX_SECONDS + STREAM_KEEPALIVE
+    cache.add(key, 0, timeout)
+    try:
+        count = cache.incr(key)
+    except ValueError:
+        # Expired between add() and incr()
+        cache.add(key, 1, timeout)
+        count = 1
+    cache.touch(key, timeout)
+    if count > limit:
+        release_stream_slot(user)
+        return False
+    return True
+
+
+def release_stream_slot(user):
+    """
+    Count a stream of user as closed
+    """
+    try:
+        cache.decr(_stream_slots_key(user))
+    except ValueError:
+        pass
+
+
+def event_stream(subscription, codes=None, keepalive=STREAM_KEEPALIVE, max_seconds=STREAM_MAX_SECONDS,
+                 on_close=None):
+    """
+    Yield Server-Sent Events with the indicator deltas of the subscription.
+    codes limits the events to the given stock codes.
+    The subscription is closed and on_close() is called when the client
+    disconnects or time is up.
+    """
+    deadline = time.monotonic() + max_seconds
+    try:
+        yield f'retry: {keepalive * 1000}\n\n'
+        while time.monotonic() < deadline:
+            message = subscription.get(timeout=keepalive)
+            if message is None:
+                # Comment line, keeps proxies from closing an idle connection
+                yield ': keepalive\n\n'
+            elif not codes or message['stock_code'] in codes:
+                yield f'event: indicators\ndata: {json.dumps(message)}\n\n'
+    finally:
+        subscription.close()
+        if on_close is not None:
+            on_close()
+
+
+class StockStreamView(RateLimitHeadersMixin, views.APIView):
+    """
+    Push indicator updates as Server-Sent Events instead of polling dashboard-api.
+    Every event is a JSON delta of one stock:
+    {"id": 1, "stock_code": "ABC", "updated_at": "...", "changes": {"rsi": 35}}
+    Only some stocks: stock-stream/?stock_code=ABC,DEF
+    Every open stream keeps a worker thread busy (Django 3.2 has no async
+    streaming), run it with threaded workers, see core.pubsub for brokers.
+    A user can keep STREAM_MAX_PER_USER streams open, more are rejected with 429.
+    """
+    permission_classes = [IsAuthenticated]
+    content_negotiation_class = ExportContentNegotiation
+    throttle_scope = 'stock_stream'
+
+    def get(self, request):
+        codes = {Stock.normalize_code(code) for code in get_list_param(request.query_params, 'stock_code')}
+        user = request.user
+        if not acquire_stream_slot(user):
+            raise Throttled(detail=f'At most {STREAM_MAX_PER_USER} streams can be open at once.')
+        # Subscribe before returning, so no update is lost before the first read
+        subscription = get_broker().subscribe(INDICATORS_CHANNEL)
+        stream = event_stream(subscription, codes, on_close=lambda: release_stream_slot(user))
+        stream_response = StreamingHttpResponse(stream, content_type='text/event-stream')
+        stream_response['Cache-Control'] = 'no-cache'
+        # Disable buffering in nginx
+        stream_response['X-Accel-Buffering'] = 'no'
+        return stream_response
+
+
+# Largest number of ids and codes accepted by stock/bulk/
+BULK_LIMIT = 100
+# Tickers in URLs, dots are part of tickers such as BRK.B or BT.L
+STOCK_CODE_REGEX = r'[^/]+'
+
+
+class StockDetailViewSet(RateLimitHeadersMixin, viewsets.ViewSet):
     """
     ViewSet for stocks. Retrieves data for given stock by its ID.
     If stock is not found ParseError is raised
+    Requests are rate limited with scope stock_detail, stock/bulk/ with stock_bulk
     """
     queryset = Stock.objects.all()
     permission_classes = [IsAuthenticated]
+    throttle_scope = 'stock_detail'
 
+    @conditional(stock_detail_validators)
     def retrieve(self, request, pk=None):
         """
         Override the retrieve method.
         request is argument might see that is not used but without it
         the API returns html, not JSON.
+        Supports If-None-Match / If-Modified-Since, see pages.conditional
         """
         try:
             stock = self.queryset.get(pk=pk)
@@ -340,6 +426,156 @@ class StockDetailViewSet(viewsets.ViewSet):
         serializer = StockSerializer(stock)
         return response.Response(serializer.data)
 
+    @action(detail=False, url_path=rf'by-code/(?P<code>{STOCK_CODE_REGEX})')
+    def by_code(self, request, code=None):
+        """
+        Retrieve stock by its ticker, e.g. /stock/by-code/AAPL/ or /stock/by-code/BRK.B/
+        Uses the unique index on stock_code.
+        """
+        try:
+            stock = self.queryset.get(stock_code=Stock.normalize_code(code))
+        except Stock.DoesNotExist:
+            return response.Response({"error": "Stock not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        serializer = StockSerializer(stock)
+        return response.Response(serializer.data)
+
+    @action(detail=True, renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer])
+    def history(self, request, pk=None):
+        """
+        Daily indicator history of a stock, downsampled to at most points values.
+        Parameters (all optional):
+        start, end - dates as YYYY-MM-DD
+        fields - comma separated, default all of rsi, fa_score, avg_gain_loss,
+                 five_year_avg_dividend_yield, composite_score
+        points - largest number of points, default 200
+        Example:
+        http://localhost:8000/stock/1/history/?start=2023-01-01&fields=rsi,fa_score&points=100
+        By ticker: http://localhost:8000/stock/by-code/AAPL/history/?start=2023-01-01
+        """
+        return self._history(request, pk=pk)
+
+    @action(detail=False, url_path=rf'by-code/(?P<code>{STOCK_CODE_REGEX})/history',
+            url_name='history-by-code', renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer])
+    def history_by_code(self, request, code=None):
+        """
+        Daily indicator history of a stock by its ticker, takes the same parameters as history
+        """
+        return self._history(request, stock_code=Stock.normalize_code(code))
+
+    def _history(self, request, **lookup):
+        try:
+            stock = self.queryset.only('pk', 'stock_code').get(**lookup)
+        except Stock.DoesNotExist:
+            return response.Response({"error": "Stock not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        params = request.query_params
+        dates = {}
+        for name in ('start', 'end'):
+            try:
+                dates[name] = parse_date(params[name]) if params.get(name) else None
+            except ValueError:
+                dates[name] = None
+            if params.get(name) and dates[name] is None:
+                raise ParseError(f"{name} should be a date as YYYY-MM-DD.")
+
+        requested = get_list_param(params, 'fields')
+        unknown = set(requested) - set(HISTORY_FIELDS)
+        if unknown:
+            raise ParseError(f"Unknown fields: {', '.join(sorted(unknown))}.")
+        fields = [field for field in HISTORY_FIELDS if field in requested] if requested else HISTORY_FIELDS
+
+        try:
+            points = int(params.get('points', DEFAULT_POINTS))
+        except ValueError:
+            raise ParseError("points should be an integer.")
+        if not 2 <= points <= MAX_POINTS:
+            raise ParseError(f"points should be between 2 and {MAX_POINTS}.")
+
+        return response.Response({
+            'id': stock.pk,
+            'stock_code': stock.stock_code,
+            'history': get_history(stock, fields, start=dates['start'], end=dates['end'], max_points=points),
+        })
+
+    @action(detail=True, renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer])
+    def chart(self, request, pk=None):
+        """
+        Daily close prices for a price chart, downsampled on the server
+        to at most width points with LTTB, see core.charts.
+        Parameters (optional):
+        range - 1m, 3m, 6m, 1y, 5y or max, default 1y
+        width - chart width in pixels, default 600
+        Example:
+        http://localhost:8000/stock/1/chart/?range=5y&width=800
+        """
+        try:
+            stock = self.queryset.only('pk', 'stock_code').get(pk=pk)
+        except Stock.DoesNotExist:
+            return response.Response({"error": "Stock not found."}, status=status.HTTP_404_NOT_FOUND)
+
+        range_name = request.query_params.get('range', charts.DEFAULT_RANGE)
+        if range_name not in charts.CHART_RANGES:
+            raise ParseError(f"range should be one of {', '.join(charts.CHART_RANGES)}.")
+        try:
+            width = int(request.query_params.get('width', charts.DEFAULT_WIDTH))
+        except ValueError:
+            raise ParseError("width should be an integer.")
+        if not charts.MIN_WIDTH <= width <= charts.MAX_WIDTH:
+            raise ParseError(f"width should be between {charts.MIN_WIDTH} and {charts.MAX_WIDTH}.")
+
+        return response.Response({
+            'id': stock.pk,
+            'stock_code': stock.stock_code,
+            'range': range_name,
+            'points': charts.get_chart(stock, range_name, width),
+        })
+
+    @action(detail=False, methods=['get', 'post'], renderer_classes=[FastJSONRenderer, BrowsableAPIRenderer],
+            throttle_scope='stock_bulk')
+    def bulk(self, request):
+        """
+        Retrieve many stocks in one request and one query.
+        ids and codes are given as comma separated lists in the query string
+        (GET) or as lists in the request body (POST), at most BULK_LIMIT in total.
+        Ids and codes that were not found are listed under "missing".
+        Example:
+        http://localhost:8000/stock/bulk/?ids=1,2&codes=AAPL,MSFT
+        """
+        params = request.data if request.method == 'POST' else request.query_params
+        if not isinstance(params, dict):
+            raise ParseError("The request body should be an object with ids and codes.")
+        if not hasattr(params, 'getlist'):
+            # JSON body
+            for name in ('ids', 'codes'):
+                if params.get(name) is not None and not isinstance(params[name], list):
+                    raise ParseError(f"{name} should be a list.")
+        raw_ids = get_list_param(params, 'ids')
+        codes = {Stock.normalize_code(code) for code in get_list_param(params, 'codes')}
+
+        try:
+            ids = {int(pk) for pk in raw_ids}
+        except ValueError:
+            raise ParseError("ids should be integers.")
+        if not ids and not codes:
+            raise ParseError("Provide ids or codes.")
+        if len(ids) + len(codes) > BULK_LIMIT:
+            raise ParseError(f"At most {BULK_LIMIT} ids and codes can be requested at once.")
+
+        stocks = screener_queryset_rows(
+            self.queryset.filter(Q(pk__in=ids) | Q(stock_code__in=codes)).order_by('pk')
+        )
+
+        found_ids = {stock['id'] for stock in stocks}
+        found_codes = {stock['stock_code'] for stock in stocks}
+        return response.Response({
+            'results': stocks,
+            'missing': {
+                'ids': sorted(ids - found_ids),
+                'codes': sorted(codes - found_codes),
+            },
+        })
+
 
 # class UserProfileViewSet(viewsets.ViewSet):
 #     """
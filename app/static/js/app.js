@@ -3,3 +3,174 @@ setTimeout(function(){
   $('#message').fadeOut('slow');
 }, 4000)
 
+
+/*
+ * Dashboard table sorting.
+ * Small result sets are sorted in the browser, larger ones are re-sorted
+ * by dashboard-api. Either way the sort state is kept in the URL and
+ * the header links keep working when JavaScript is disabled.
+ */
+(function () {
+  var table = document.getElementById('dashboard-table');
+  if (!table) {
+    return;
+  }
+
+  var tbody = table.tBodies[0];
+  var limit = parseInt(table.dataset.clientSortLimit, 10);
+  var links = table.querySelectorAll('thead a[data-sort]');
+  var numericFields = ['rsi', 'fa_score', 'avg_gain_loss', 'five_year_avg_dividend_yield', 'composite_score'];
+
+  function cellValue(row, index, numeric) {
+    var cell = row.cells[index];
+    var value = cell.dataset.value !== undefined ? cell.dataset.value : cell.textContent.trim();
+    if (value === '' || value === 'None') {
+      return null;
+    }
+    return numeric ? parseFloat(value) : value.toLowerCase();
+  }
+
+  function compare(a, b) {
+    // Empty values always go last
+    if (a === null) {
+      return b === null ? 0 : 1;
+    }
+    if (b === null) {
+      return -1;
+    }
+    return a < b ? -1 : (a > b ? 1 : 0);
+  }
+
+  function sortRows(index, field, direction) {
+    var numeric = numericFields.indexOf(field) !== -1;
+    var sign = direction === 'descending' ? -1 : 1;
+    var rows = Array.prototype.slice.call(tbody.rows);
+    rows.sort(function (a, b) {
+      return sign * compare(cellValue(a, index, numeric), cellValue(b, index, numeric));
+    });
+    rows.forEach(function (row) {
+      tbody.appendChild(row);
+    });
+  }
+
+  function textCell(value) {
+    var td = document.createElement('td');
+    td.textContent = value === null ? 'None' : value;
+    return td;
+  }
+
+  function renderRows(stocks) {
+    var fragment = document.createDocumentFragment();
+    stocks.forEach(function (stock) {
+      var tr = document.createElement('tr');
+      var td = document.createElement('td');
+      var a = document.createElement('a');
+      a.href = '/stock/' + encodeURIComponent(stock.stock_code);
+      a.style.cssText = 'text-decoration:none;color:black;';
+      a.textContent = stock.stock_code;
+      td.appendChild(a);
+      tr.appendChild(td);
+      ['sector', 'industry', 'country', 'exchange_short_name', 'company_name'].forEach(function (key) {
+        tr.appendChild(textCell(stock[key]));
+      });
+      numericFields.forEach(function (key) {
+        var cell = textCell(stock[key]);
+        cell.dataset.value = stock[key] === null ? '' : stock[key];
+        tr.appendChild(cell);
+      });
+      fragment.appendChild(tr);
+    });
+    tbody.innerHTML = '';
+    tbody.appendChild(fragment);
+  }
+
+  function updateLinks(field, direction) {
+    links.forEach(function (link) {
+      var params = new URLSearchParams(link.search);
+      var next = 'ascending';
+      if (link.dataset.sort === field) {
+        link.dataset.direction = direction;
+        next = direction === 'ascending' ? 'descending' : 'ascending';
+      } else {
+        delete link.dataset.direction;
+      }
+      params.set('direction', next);
+      link.search = params.toString();
+    });
+  }
+
+  links.forEach(function (link, index) {
+    link.addEventListener('click', function (event) {
+      var params = new URLSearchParams(link.search);
+      var field = params.get('sort');
+      var direction = params.get('direction');
+
+      event.preventDefault();
+      if (tbody.rows.length <= limit) {
+        sortRows(index, field, direction);
+      } else {
+        fetch(table.dataset.apiUrl + link.search, {headers: {'Accept': 'application/json'}})
+          .then(function (response) {
+            if (!response.ok) {
+              throw new Error(response.statusText);
+            }
+            return response.json();
+          })
+          .then(renderRows)
+          .catch(function () {
+            window.location = link.href;
+          });
+      }
+      updateLinks(field, direction);
+      window.history.replaceState(null, '', link.search);
+    });
+  });
+})();
+
+
+/*
+ * Price chart on page detail.
+ * The server downsamples the prices to the width of the chart,
+ * so one point is drawn per pixel at most.
+ */
+(function () {
+  var svg = document.getElementById('price-chart');
+  if (!svg) {
+    return;
+  }
+
+  var width = Math.max(Math.round(svg.getBoundingClientRect().width), 10);
+  var height = svg.getBoundingClientRect().height;
+
+  fetch(svg.dataset.chartUrl + '?range=1y&width=' + width, {headers: {'Accept': 'application/json'}})
+    .then(function (response) {
+      if (!response.ok) {
+        throw new Error(response.statusText);
+      }
+      return response.json();
+    })
+    .then(function (data) {
+      if (data.points.length < 2) {
+        svg.style.display = 'none';
+        return;
+      }
+      var closes = data.points.map(function (point) { return point.close; });
+      var min = Math.min.apply(null, closes);
+      var range = (Math.max.apply(null, closes) - min) || 1;
+      var step = width / (closes.length - 1);
+      var coordinates = closes.map(function (close, index) {
+        return (index * step).toFixed(1) + ',' + (height - (close - min) / range * height).toFixed(1);
+      });
+
+      svg.setAttribute('viewBox', '0 0 ' + width + ' ' + height);
+      var line = document.createElementNS('http://www.w3.org/2000/svg', 'polyline');
+      line.setAttribute('points', coordinates.join(' '));
+      line.setAttribute('fill', 'none');
+      line.setAttribute('stroke', '#dc3545');
+      line.setAttribute('stroke-width', '1.5');
+      svg.appendChild(line);
+    })
+    .catch(function () {
+      svg.style.display = 'none';
+    });
+})();